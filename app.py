@@ -1,41 +1,153 @@
+import logging
+import os
+
 from flask import Flask
 
 from todolist.config import load_config, parse_args
-from todolist.db import DatabaseConnection, DatabaseInitializer, TodoRepository
-from todolist.routes import RoutesManager
-from todolist.utils import fromjson_filter
+from todolist.db import (
+    DatabaseConnection,
+    DatabaseInitializer,
+    TodoRepository,
+    WriteExecutor,
+    WriteQueue,
+    register_unit_of_work,
+)
+from todolist.routes import ApiRoutes, ChangeStreamRoutes, RoutesManager
+from todolist.utils import fromjson_filter, original_id_filter
 
-# Create Flask application instance
-app = Flask(__name__)
 
-# Register template filters
-app.template_filter('fromjson')(fromjson_filter)
+def create_app(env, db_path=None, init_db=True):
+    """Create a fully configured TodoList application
 
+    Args:
+        env: Environment name (local, stage, live, test)
+        db_path: Optional database path overriding DATABASE_PATH
+        init_db: Run database migrations; servers run them once before
+            starting workers and pass False in the workers
 
-def main():
-    """Main entry point for the TodoList application"""
-    # Parse command line arguments
-    args = parse_args()
+    Returns:
+        Flask: Application with routes and per-request transactions registered
+    """
+    app = Flask(__name__)
+
+    # Register template filters
+    app.template_filter('fromjson')(fromjson_filter)
+    app.template_filter('original_id')(original_id_filter)
 
     # Load configuration
-    config, db_path = load_config(app, args.env)
+    config, config_db_path = load_config(app, env)
 
     # Initialize database
-    db_connection = DatabaseConnection(db_path)
-    db_initializer = DatabaseInitializer(db_connection)
-    db_initializer.init_db()
+    db_connection = DatabaseConnection.from_config(config, db_path or config_db_path)
+    if init_db:
+        DatabaseInitializer(db_connection).init_db()
+    app.extensions['todolist_db'] = db_connection
 
-    # Initialize repository
-    todo_repository = TodoRepository(db_connection)
+    # Initialize repository; writes retry while the database is busy and
+    # retries and lock waits are logged periodically
+    if app.logger.level == logging.NOTSET:
+        app.logger.setLevel(logging.INFO)
+    write_executor = WriteExecutor(db_connection, report_interval=config.WRITE_METRICS_LOG_INTERVAL,
+                                   logger=app.logger)
+    write_queue = None
+    if config.WRITE_QUEUE_ENABLED:
+        write_queue = WriteQueue(write_executor, max_delay=config.WRITE_QUEUE_MAX_DELAY)
+    todo_repository = TodoRepository(db_connection, write_executor=write_executor, write_queue=write_queue)
+
+    # Run each request in a single database transaction; with the write queue
+    # enabled, writes of concurrent requests share transactions instead
+    register_unit_of_work(app, db_connection, write_executor, include_writes=write_queue is None)
 
     # Register routes
     RoutesManager(app, todo_repository)
+    ApiRoutes(app, todo_repository)
+    ChangeStreamRoutes(app, todo_repository)
+
+    return app
+
+
+def server_options(config, workers=None, threads=None, keepalive=None, preload=None):
+    """Build gunicorn settings from the environment config and overrides
+
+    Args:
+        config: Flask config of the application
+        workers: Worker processes; 0 or None falls back to SERVER_WORKERS,
+            which uses one worker per CPU core when it is 0
+        threads: Threads per worker, defaults to SERVER_THREADS
+        keepalive: Keep-alive seconds, defaults to SERVER_KEEPALIVE
+        preload: Load the application before forking, defaults to SERVER_PRELOAD
+
+    Returns:
+        dict: gunicorn settings
+    """
+    return {
+        'bind': f"{config['HOST']}:{config['PORT']}",
+        'workers': workers or config['SERVER_WORKERS'] or os.cpu_count() or 1,
+        'worker_class': 'gthread',
+        'threads': threads or config['SERVER_THREADS'],
+        'keepalive': config['SERVER_KEEPALIVE'] if keepalive is None else keepalive,
+        'preload_app': config['SERVER_PRELOAD'] if preload is None else preload,
+    }
+
+
+def serve(env, workers=None, threads=None, keepalive=None, preload=None):
+    """Serve the application with gunicorn worker processes
+
+    The database is migrated once here, in the master process. With preload
+    the workers fork this application; otherwise each worker creates its own
+    without migrating again.
+    """
+    # gunicorn只在生产服务时需要，且不支持Windows
+    # pylint: disable=import-outside-toplevel
+    from gunicorn.app.base import BaseApplication
+
+    application = create_app(env)
+    options = server_options(application.config, workers, threads, keepalive, preload)
+    # 不把已打开的SQLite连接带入fork出的worker
+    application.extensions['todolist_db'].close()
+    print(f"Serving with gunicorn: {options}")
+
+    class TodoListServer(BaseApplication):
+        """gunicorn application serving TodoList"""
+
+        def load_config(self):
+            for name, value in options.items():
+                self.cfg.set(name, value)
+
+        def load(self):
+            if options['preload_app']:
+                return application
+            return create_app(env, init_db=False)
+
+    TodoListServer().run()
+
+
+def __getattr__(name):
+    """Create the module-level app on first access (e.g. gunicorn app:app)
+
+    The environment is taken from TODOLIST_ENV (default: local).
+    """
+    if name == 'app':
+        globals()['app'] = create_app(os.environ.get('TODOLIST_ENV', 'local'))
+        return globals()['app']
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def main():
+    """Main entry point for the TodoList application"""
+    # Parse command line arguments
+    args = parse_args()
+
+    if args.serve:
+        serve(args.env, args.workers, args.threads, args.keepalive, args.preload)
+        return
 
-    # Start application
+    # Start development server
+    app = create_app(args.env)
     app.run(
-        debug=config.DEBUG,
-        host=config.HOST,
-        port=config.PORT
+        debug=app.config['DEBUG'],
+        host=app.config['HOST'],
+        port=app.config['PORT']
     )
 
 
@@ -6,4 +6,39 @@ class Config:
     PORT = 5000
     DATABASE_PATH = 'todolist_local.db'
     HOST = '127.0.0.1'
-    SECRET_KEY = 'local_development_secret_key'
\ No newline at end of file
+    SECRET_KEY = 'local_development_secret_key'
+    # Production server (python app.py --serve); 0 workers means one per CPU core
+    SERVER_WORKERS = 2
+    SERVER_THREADS = 4
+    SERVER_KEEPALIVE = 5
+    SERVER_PRELOAD = True
+    # Number of todos shown per index page
+    TODOS_PAGE_SIZE = 50
+    # Database connection pool settings
+    DATABASE_POOL_SIZE = 5
+    DATABASE_POOL_MAX_IDLE = 300
+    # Seconds a request waits for a free pooled connection
+    DATABASE_POOL_TIMEOUT = 10.0
+    # Group-commit writes of concurrent requests in a single writer thread
+    # instead of one transaction per request
+    WRITE_QUEUE_ENABLED = False
+    WRITE_QUEUE_MAX_DELAY = 0.002
+    # Seconds between log lines with write retry and lock-wait metrics; 0 disables them
+    WRITE_METRICS_LOG_INTERVAL = 60
+    # Live change stream (/events): seconds between reads of the change event
+    # log, and seconds before a stream ends and the browser reconnects
+    CHANGE_STREAM_POLL_INTERVAL = 1.0
+    CHANGE_STREAM_TIMEOUT = 25
+    # Streams served at the same time per worker. Each open stream holds one of
+    # the SERVER_THREADS threads (2 of 4 here) for as long as the page is open;
+    # further pages poll the change log every few seconds instead
+    CHANGE_STREAM_MAX_CONNECTIONS = 2
+    # SQLite performance profile, applied once per pooled connection
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -16000,
+        'temp_store': 'MEMORY',
+        'mmap_size': 67108864,
+        'busy_timeout': 5000,
+    }
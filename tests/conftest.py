@@ -2,6 +2,7 @@
 import os
 import subprocess
 import sys
+import tempfile
 import time
 
 import pytest
@@ -10,6 +11,9 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 
+from app import create_app
+from todolist.db import DatabaseConnection, DatabaseInitializer
+
 # 设置Chrome选项
 chrome_options = Options()
 chrome_options.add_argument("--headless")  # 无头模式
@@ -66,6 +70,44 @@ def setup_teardown():
             FLASK_PROCESS.kill()
 
 
+@pytest.fixture
+def db_connection():
+    """初始化好的临时数据库"""
+    with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as tmp:
+        path = tmp.name
+    connection = DatabaseConnection(path)
+    DatabaseInitializer(connection).init_db()
+    yield connection
+    connection.close()
+    if os.path.exists(path):
+        try:
+            os.remove(path)
+        except OSError as e:
+            print(f"警告：无法删除测试数据库文件 {path}: {e}")
+
+
+@pytest.fixture
+def todolist_app():
+    """使用临时数据库的应用"""
+    with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as tmp:
+        path = tmp.name
+    app = create_app('test', db_path=path)
+    yield app
+    app.extensions['todolist_db'].close()
+    if os.path.exists(path):
+        try:
+            os.remove(path)
+        except OSError as e:
+            print(f"警告：无法删除测试数据库文件 {path}: {e}")
+
+
+@pytest.fixture
+def client(todolist_app):
+    """测试客户端"""
+    with todolist_app.test_client() as test_client:
+        yield test_client
+
+
 @pytest.fixture
 def driver():
     """创建WebDriver实例"""
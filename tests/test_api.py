@@ -0,0 +1,101 @@
+# pylint: disable=locally-disabled,broad-exception-caught,useless-suppression,suppressed-message
+"""
+JSON API tests for the TodoList application.
+These tests verify the /api/v1/todos endpoints, field selection and ETags.
+"""
+
+
+def _repository(app, endpoint):
+    """获取路由使用的仓库"""
+    return app.view_functions[endpoint].__self__.todo_repository
+
+
+class TestTodosApi:
+    """测试事项API"""
+
+    def test_create_get_patch_delete(self, client):
+        """测试创建、读取、修改和删除事项"""
+        response = client.post('/api/v1/todos', json={'title': 'api todo', 'deadline': '2026-01-01T09:00'})
+        assert response.status_code == 201
+        todo = response.get_json()
+        assert (todo['title'], todo['deadline'], todo['completed']) == ('api todo', '2026-01-01 09:00:00', False)
+        assert response.headers['Location'].endswith(f"/api/v1/todos/{todo['id']}")
+
+        response = client.get(f"/api/v1/todos/{todo['id']}")
+        etag = response.headers['ETag']
+        assert client.get(f"/api/v1/todos/{todo['id']}", headers={'If-None-Match': etag}).status_code == 304
+
+        response = client.patch(f"/api/v1/todos/{todo['id']}", json={'completed': True}, headers={'If-Match': etag})
+        assert response.status_code == 200
+        assert response.get_json()['completed'] is True
+        assert response.headers['ETag'] != etag
+        # 使用过期的ETag修改时返回412
+        response = client.patch(f"/api/v1/todos/{todo['id']}", json={'title': 'stale'}, headers={'If-Match': etag})
+        assert response.status_code == 412
+        assert client.get(f"/api/v1/todos/{todo['id']}").get_json()['title'] == 'api todo'
+
+        assert client.delete(f"/api/v1/todos/{todo['id']}").status_code == 204
+        assert client.get(f"/api/v1/todos/{todo['id']}").status_code == 404
+        assert client.delete(f"/api/v1/todos/{todo['id']}").status_code == 404
+
+    def test_invalid_bodies_are_rejected(self, client):
+        """测试无效的请求体返回400"""
+        assert client.post('/api/v1/todos', json={'deadline': '2026-01-01T09:00'}).status_code == 400
+        assert client.post('/api/v1/todos', json={'title': 'x', 'deadline': 'soon'}).status_code == 400
+        assert client.post('/api/v1/todos', json={'title': 'x', 'owner': 'me'}).status_code == 400
+        response = client.post('/api/v1/todos', json={'title': 'x', 'recurrence_days': [7]})
+        assert response.status_code == 400
+        assert 'recurrence_days' in response.get_json()['error']
+
+    def test_list_pagination_fields_and_etag(self, todolist_app, client):
+        """测试列表的游标分页、字段选择和条件请求"""
+        for title, deadline in (('a', '2026-01-01T09:00'), ('b', '2026-01-02T09:00'), ('c', '2026-01-03T09:00')):
+            client.post('/api/v1/todos', json={'title': title, 'deadline': deadline})
+
+        response = client.get('/api/v1/todos?limit=2&fields=id,title')
+        page = response.get_json()
+        assert [set(todo) for todo in page['todos']] == [{'id', 'title'}, {'id', 'title'}]
+        assert [todo['title'] for todo in page['todos']] == ['a', 'b']
+        assert page['prev_cursor'] is None
+        next_page = client.get(f"/api/v1/todos?limit=2&after={page['next_cursor']}").get_json()
+        assert [todo['title'] for todo in next_page['todos']] == ['c']
+        assert client.get('/api/v1/todos?fields=owner').status_code == 400
+
+        # 数据未变化时不读取事项直接返回304
+        etag = response.headers['ETag']
+        repository = _repository(todolist_app, 'api_list_todos')
+        get_todos_page = repository.get_todos_page
+        repository.get_todos_page = None
+        try:
+            response = client.get('/api/v1/todos?limit=2&fields=id,title', headers={'If-None-Match': etag})
+            assert response.status_code == 304
+        finally:
+            repository.get_todos_page = get_todos_page
+
+        client.post('/toggle/1')
+        response = client.get('/api/v1/todos?limit=2&fields=id,title', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+
+    def test_occurrence_window(self, client):
+        """测试按时间窗口展开周期实例"""
+        todo = client.post('/api/v1/todos', json={
+            'title': 'daily', 'deadline': '2026-01-01T09:00', 'is_recurring': True,
+            'recurrence_type': 'daily', 'recurrence_interval': 1,
+        }).get_json()
+        url = f"/api/v1/todos/{todo['id']}/occurrences?start=2026-01-02T00:00&end=2026-01-06T00:00"
+
+        response = client.get(url)
+        occurrences = response.get_json()['occurrences']
+        assert [occurrence['occurrence_at'] for occurrence in occurrences] == [
+            '2026-01-02 09:00:00', '2026-01-03 09:00:00', '2026-01-04 09:00:00', '2026-01-05 09:00:00'
+        ]
+        assert client.get(url, headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+
+        client.post(f"/toggle/{occurrences[0]['id']}")
+        client.post('/batch-delete', data={'todo_ids': f'{{"todo_ids": [{occurrences[1]["id"]}]}}'})
+        occurrences = client.get(f"{url}&limit=2").get_json()['occurrences']
+        assert [(occurrence['occurrence_at'], occurrence['completed']) for occurrence in occurrences] == [
+            ('2026-01-02 09:00:00', True), ('2026-01-04 09:00:00', False)
+        ]
+        assert client.get(f"/api/v1/todos/{todo['id'] + 1}/occurrences").status_code == 404
@@ -4,9 +4,12 @@ Basic functionality tests for the TodoList application.
 These tests verify that core components load and function correctly.
 """
 
+import os
+import tempfile
+
 import pytest
 
-from app import app
+from app import create_app, server_options
 from todolist.config import load_config
 from todolist.db import DatabaseConnection, DatabaseInitializer
 
@@ -36,37 +39,46 @@ def test_database_initialization():
     assert True
 
 
+def _temp_db_path():
+    """创建临时数据库文件路径"""
+    with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as tmp:
+        return tmp.name
+
+
+def _remove(path):
+    """删除临时数据库文件"""
+    if os.path.exists(path):
+        try:
+            os.remove(path)
+        except OSError as e:
+            print(f"Warning: Could not remove temporary database file: {e}")
+
+
 def test_app_import():
-    """Test that app can be imported"""
-    assert app is not None
-    # 检查模板过滤器是否已注册的正确方式
-    assert 'fromjson' in app.jinja_env.filters
+    """Test that the application factory builds a complete app"""
+    temp_db_path = _temp_db_path()
+    try:
+        app = create_app('test', db_path=temp_db_path)
+        assert app is not None
+        # 检查模板过滤器是否已注册的正确方式
+        assert 'fromjson' in app.jinja_env.filters
+        assert {'index', 'add_todo', 'toggle_todo', 'batch_delete'} <= set(app.view_functions)
+        app.extensions['todolist_db'].close()
+    finally:
+        _remove(temp_db_path)
 
 
 def test_home_page_loads():
     """Test that home page loads correctly"""
-    import os
-    import tempfile
-
-    from todolist.db import TodoRepository
-    from todolist.routes import RoutesManager
-
     # 使用临时文件数据库，这样连接关闭后数据会被保存
-    with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as tmp:
-        temp_db_path = tmp.name
-
+    temp_db_path = _temp_db_path()
     try:
-        # 初始化数据库连接
-        db_connection = DatabaseConnection(temp_db_path)
-        db_initializer = DatabaseInitializer(db_connection)
-        db_initializer.init_db()
-
-        # 初始化TodoRepository和RoutesManager，这会注册所有路由
-        todo_repository = TodoRepository(db_connection)
-        RoutesManager(app, todo_repository)
+        app = create_app('test', db_path=temp_db_path)
 
         # 使用Flask测试客户端进行测试
         with app.test_client() as client:
+            response = client.post('/add', data={'title': 'factory todo', 'deadline': '2026-01-01T09:00'})
+            assert response.status_code == 302
             response = client.get('/')
             # 检查响应状态码
             assert response.status_code == 200, \
@@ -75,13 +87,25 @@ def test_home_page_loads():
             response_data = response.data.decode('utf-8')
             assert 'TodoList' in response_data, "Response should contain 'TodoList'"
             assert 'add-form' in response_data, "Response should contain add-form class"
+            assert 'factory todo' in response_data
+        app.extensions['todolist_db'].close()
     finally:
         # 清理临时文件
-        if os.path.exists(temp_db_path):
-            try:
-                os.remove(temp_db_path)
-            except OSError as e:
-                print(f"Warning: Could not remove temporary database file: {e}")
+        _remove(temp_db_path)
+
+
+def test_server_options():
+    """Test that gunicorn settings fall back to one worker per CPU core"""
+    config = {'HOST': '0.0.0.0', 'PORT': 8000, 'SERVER_WORKERS': 0, 'SERVER_THREADS': 8,
+              'SERVER_KEEPALIVE': 5, 'SERVER_PRELOAD': True}
+
+    options = server_options(config)
+    assert options['bind'] == '0.0.0.0:8000'
+    assert options['workers'] == (os.cpu_count() or 1)
+    assert (options['threads'], options['keepalive'], options['preload_app']) == (8, 5, True)
+
+    options = server_options(config, workers=3, threads=2, keepalive=0, preload=False)
+    assert (options['workers'], options['threads'], options['keepalive'], options['preload_app']) == (3, 2, 0, False)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,66 @@
+# pylint: disable=locally-disabled,broad-exception-caught,useless-suppression,suppressed-message
+"""
+Batch delete tests for the TodoList application.
+These tests verify set-based batch deletes in the repository.
+"""
+
+from todolist.db import TodoRepository
+from todolist.utils import encode_occurrence_id
+
+
+class TestBatchDelete:
+    """测试仓库的批量删除"""
+
+    def test_mixed_batch(self, db_connection):
+        """测试一次删除普通事项和周期实例"""
+        repository = TodoRepository(db_connection)
+        repository.add_todo('plain', '2026-01-01T08:00')
+        repository.add_todo('daily', '2026-01-01T09:00', True, 'daily', 1, None)
+        plain_id, recurring_id = [todo.id for todo in repository.get_all_todos()]
+
+        repository.batch_delete_todos([
+            plain_id,
+            encode_occurrence_id(recurring_id, '2026-01-01 09:00:00'),
+            encode_occurrence_id(recurring_id, '2026-01-03 09:00:00'),
+            # 不属于该周期的实例被忽略
+            encode_occurrence_id(recurring_id, '2026-01-04 10:00:00'),
+        ])
+
+        assert [todo.id for todo in repository.get_all_todos()] == [recurring_id]
+        assert repository.get_occurrence_states() == {
+            recurring_id: {'2026-01-01 09:00:00': 'deleted', '2026-01-03 09:00:00': 'deleted'}
+        }
+        assert repository.get_todo(recurring_id)['next_occurrence'] == '2026-01-04 09:00:00'
+
+    def test_delete_all_removes_recurring_todo(self, db_connection):
+        """测试删除全部时删除整个周期事项"""
+        repository = TodoRepository(db_connection)
+        repository.add_todo('daily', '2026-01-01T09:00', True, 'daily', 1, None)
+        recurring_id = repository.get_all_todos()[0].id
+
+        repository.batch_delete_todos([encode_occurrence_id(recurring_id, '2026-01-02 09:00:00')], delete_all=True)
+
+        assert repository.get_all_todos() == []
+        assert repository.get_upcoming_occurrences() == {}
+
+    def test_statement_count_does_not_grow_per_item(self, db_connection):
+        """测试删除上千个事项时语句数量与事项数量无关"""
+        repository = TodoRepository(db_connection)
+        with db_connection.transaction() as conn:
+            conn.executemany('INSERT INTO todos (title, deadline) VALUES (?, ?)',
+                             [(f'todo {i}', '2026-01-01 09:00:00') for i in range(1200)])
+        todo_ids = [todo.id for todo in repository.get_all_todos()]
+
+        statements = []
+        pooled = db_connection.get_connection()
+        raw = pooled.raw
+        raw.set_trace_callback(statements.append)
+        pooled.close()
+        try:
+            repository.batch_delete_todos(todo_ids)
+        finally:
+            raw.set_trace_callback(None)
+
+        assert repository.get_all_todos() == []
+        # 每500个ID一批，每批3条DELETE
+        assert len([statement for statement in statements if statement.startswith('DELETE')]) == 9
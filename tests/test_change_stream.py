@@ -0,0 +1,126 @@
+# pylint: disable=locally-disabled,broad-exception-caught,useless-suppression,suppressed-message
+"""
+Change stream tests for the TodoList application.
+These tests verify the change event log and the /events server-sent event stream.
+"""
+
+import json
+
+from todolist.db import TodoRepository
+from todolist.db import repository as repository_module
+from todolist.utils import encode_occurrence_id
+
+
+def _events(response):
+    """解析事件流中的(id, event, data)"""
+    events = []
+    for block in response.get_data(as_text=True).strip().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.split('\n'))
+        if 'data' in fields:
+            events.append((fields.get('id'), fields.get('event'), json.loads(fields['data'])))
+    return events
+
+
+class TestChangeEvents:
+    """测试变更事件日志"""
+
+    def test_writes_are_logged_in_order(self, db_connection):
+        """测试每次写入记录一个事件，事件ID即变更计数"""
+        repository = TodoRepository(db_connection)
+        todo_id = repository.add_todo('todo', '2026-01-01T09:00')
+        recurring_id = repository.add_todo('daily', '2026-01-01T09:00', True, 'daily', 1)
+        repository.update_todo(todo_id, title='renamed')
+        repository.toggle_occurrence_completed(recurring_id, '2026-01-01 09:00:00')
+        repository.batch_delete_todos([encode_occurrence_id(recurring_id, '2026-01-02 09:00:00'), todo_id, 999])
+
+        assert repository.get_change_events(0) == [
+            (1, 'created', [todo_id], None),
+            (2, 'created', [recurring_id], None),
+            (3, 'updated', [todo_id], None),
+            (4, 'occurrence_toggled', [recurring_id], '2026-01-01 09:00:00'),
+            (5, 'deleted', [todo_id], None),
+            (6, 'occurrence_deleted', [recurring_id], None),
+        ]
+        assert repository.get_change_counter() == 6
+        assert repository.get_change_events(6) == []
+        assert repository.get_change_events(4, limit=1) == [(5, 'deleted', [todo_id], None)]
+        # 计数之后的ID说明客户端看到的是另一份数据
+        assert repository.get_change_events(7) is None
+        # 未改变任何数据的写入不记录事件
+        assert not repository.delete_todo(999)
+        assert repository.get_change_counter() == 6
+
+    def test_log_is_bounded(self, db_connection, monkeypatch):
+        """测试事件日志定期截断，被截断的事件无法恢复"""
+        monkeypatch.setattr(repository_module, 'CHANGE_EVENTS_RETAINED', 3)
+        monkeypatch.setattr(repository_module, 'CHANGE_EVENTS_PRUNE_INTERVAL', 2)
+        repository = TodoRepository(db_connection)
+        for i in range(6):
+            repository.add_todo(f'todo {i}', '2026-01-01T09:00')
+
+        with db_connection.connection() as conn:
+            assert [row[0] for row in conn.execute('SELECT id FROM change_events')] == [4, 5, 6]
+        assert repository.get_change_events(2) is None
+        assert [event[0] for event in repository.get_change_events(3)] == [4, 5, 6]
+
+
+class TestChangeStream:
+    """测试/events事件流"""
+
+    def test_stream_resumes_after_last_event_id(self, todolist_app, client):
+        """测试事件流从after或Last-Event-ID之后继续"""
+        todolist_app.config['CHANGE_STREAM_TIMEOUT'] = 0
+        client.post('/add', data={'title': 'a', 'deadline': '2026-01-01T09:00'})
+        client.post('/add', data={'title': 'b', 'deadline': '2026-01-02T09:00'})
+        client.post('/toggle/1')
+
+        response = client.get('/events?after=1', buffered=True)
+        assert response.mimetype == 'text/event-stream'
+        assert response.get_data(as_text=True).startswith('retry: ')
+        assert _events(response) == [
+            ('2', None, {'type': 'created', 'todo_ids': [2], 'occurrence_at': None}),
+            ('3', None, {'type': 'updated', 'todo_ids': [1], 'occurrence_at': None}),
+        ]
+        # 重连时Last-Event-ID优先于页面的after参数
+        response = client.get('/events?after=1', headers={'Last-Event-ID': '2'}, buffered=True)
+        assert [event[0] for event in _events(response)] == ['3']
+        # 没有起点时只推送之后的变更
+        assert _events(client.get('/events', buffered=True)) == []
+        assert _events(client.get('/events?after=9', buffered=True)) == [(None, 'reset', {'after': 9})]
+
+    def test_clients_beyond_cap_poll(self, todolist_app, client):
+        """测试流名额已满时客户端改为轮询，流结束时把名额让给轮询的客户端"""
+        todolist_app.config['CHANGE_STREAM_TIMEOUT'] = 0
+        client.post('/add', data={'title': 'a', 'deadline': '2026-01-01T09:00'})
+        # 测试环境每个进程最多两个流；未读取的响应一直占用名额
+        streams = [client.get('/events?after=0') for _ in range(2)]
+
+        polled = client.get('/events?after=0', buffered=True)
+        assert polled.status_code == 200
+        assert polled.get_data(as_text=True).startswith('retry: 5000')
+        assert [event[0] for event in _events(polled)] == ['1']
+
+        # 有客户端在轮询时，结束的流推迟重连
+        assert streams[0].get_data(as_text=True).endswith('retry: 10000\n\n')
+        for stream in streams:
+            stream.close()
+        response = client.get('/events?after=0', buffered=True)
+        assert response.get_data(as_text=True).startswith('retry: 1000\n')
+
+    def test_changed_todos_are_rendered_in_index_order(self, client):
+        """测试按ID渲染变更后的事项及其在首页中的后继事项"""
+        client.post('/add', data={'title': 'late', 'deadline': '2026-01-03T09:00'})
+        client.post('/add', data={'title': 'early', 'deadline': '2026-01-01T09:00'})
+        client.post('/add', data={
+            'title': 'daily', 'deadline': '2026-01-02T09:00', 'is_recurring': 'on',
+            'recurrence_type': 'daily', 'recurrence_interval': '1',
+        })
+        assert 'data-last-event-id="3"' in client.get('/').get_data(as_text=True)
+
+        groups = client.get('/fragments/todos?ids=2,3,1,9').get_json()['groups']
+        assert groups['2']['before'] == 3 and groups['3']['before'] == 1 and groups['1']['before'] is None
+        assert 'early' in groups['2']['html']
+        assert groups['3']['html'].count('<li ') == 4
+        assert groups['9'] == {'html': '', 'before': None}
+        assert client.get('/fragments/todos?ids=x').status_code == 400
+        assert client.get(f"/fragments/todos?ids={','.join(map(str, range(1, 102)))}").status_code == 400
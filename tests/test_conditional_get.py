@@ -0,0 +1,53 @@
+# pylint: disable=locally-disabled,broad-exception-caught,useless-suppression,suppressed-message
+"""
+Conditional GET tests for the TodoList application.
+These tests verify that unchanged index pages are answered with 304.
+"""
+
+from datetime import datetime
+
+from todolist.routes import routes
+
+
+class _Clock(datetime):
+    """可设置当前时间的datetime"""
+    current = datetime(2026, 1, 1, 9, 0, 10)
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.current
+
+
+class TestIndexEtag:
+    """测试首页的ETag和304响应"""
+
+    def test_unchanged_page_is_not_rendered(self, todolist_app, client, monkeypatch):
+        """测试数据和分钟未变化时不读取事项，写入或进入下一分钟后重新渲染"""
+        _Clock.current = datetime(2026, 1, 1, 9, 0, 10)
+        monkeypatch.setattr(routes, 'datetime', _Clock)
+        client.post('/add', data={'title': 'todo', 'deadline': '2026-01-02T09:00'})
+
+        response = client.get('/')
+        assert response.status_code == 200
+        assert response.headers['Cache-Control'] == 'no-cache'
+        etag = response.headers['ETag']
+
+        repository = todolist_app.view_functions['index'].__self__.todo_repository
+        monkeypatch.setattr(repository, 'get_todos_page', None)
+        _Clock.current = datetime(2026, 1, 1, 9, 0, 50)
+        response = client.get('/', headers={'If-None-Match': etag})
+        assert response.status_code == 304
+        assert response.headers['ETag'] == etag
+        monkeypatch.undo()
+
+        # 写入后变更计数增加
+        monkeypatch.setattr(routes, 'datetime', _Clock)
+        client.post('/add', data={'title': 'other', 'deadline': '2026-01-03T09:00'})
+        response = client.get('/', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert b'other' in response.data
+        etag = response.headers['ETag']
+
+        # 进入下一分钟后周期实例和截止时间状态可能变化
+        _Clock.current = datetime(2026, 1, 1, 9, 1, 0)
+        assert client.get('/', headers={'If-None-Match': etag}).status_code == 200
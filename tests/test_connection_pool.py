@@ -0,0 +1,161 @@
+# pylint: disable=locally-disabled,broad-exception-caught,useless-suppression,suppressed-message
+"""
+Connection pool tests for the TodoList application.
+These tests verify that SQLite connections are reused and bounded.
+"""
+
+import os
+import sqlite3
+import tempfile
+import time
+
+import pytest
+
+from config.test.config import Config
+from todolist.db import ConnectionPool, DatabaseConnection, PoolTimeoutError
+
+
+@pytest.fixture
+def db_path():
+    """临时数据库文件"""
+    with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as tmp:
+        path = tmp.name
+    yield path
+    if os.path.exists(path):
+        try:
+            os.remove(path)
+        except OSError as e:
+            print(f"警告：无法删除测试数据库文件 {path}: {e}")
+
+
+class TestConnectionPool:
+    """测试连接池功能"""
+
+    def test_connection_is_reused(self, db_path):
+        """测试归还的连接会被复用"""
+        pool = ConnectionPool(db_path, size=2)
+        conn = pool.acquire()
+        raw = conn.raw
+        conn.close()
+
+        conn = pool.acquire()
+        assert conn.raw is raw
+        conn.close()
+        pool.close_all()
+
+    def test_double_close_returns_connection_once(self, db_path):
+        """测试重复归还同一连接不会让两个借用者共享连接，归还后不能再使用"""
+        pool = ConnectionPool(db_path, size=2)
+        conn = pool.acquire()
+        conn.close()
+        conn.close()
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute('SELECT 1')
+
+        first, second = pool.acquire(), pool.acquire()
+        assert first.raw is not second.raw
+        first.close()
+        second.close()
+        pool.close_all()
+
+    def test_pool_is_bounded(self, db_path):
+        """测试连接池达到上限时获取连接超时"""
+        pool = ConnectionPool(db_path, size=1, timeout=0.1)
+        conn = pool.acquire()
+        with pytest.raises(PoolTimeoutError):
+            pool.acquire()
+        conn.close()
+        pool.close_all()
+
+    def test_idle_connection_is_recycled(self, db_path):
+        """测试超过最大空闲时间的连接会被替换"""
+        pool = ConnectionPool(db_path, size=1, max_idle_time=0.01)
+        conn = pool.acquire()
+        raw = conn.raw
+        conn.close()
+        time.sleep(0.05)
+
+        conn = pool.acquire()
+        assert conn.raw is not raw
+        conn.close()
+        pool.close_all()
+
+    def test_uncommitted_work_is_rolled_back_on_release(self, db_path):
+        """测试归还连接时回滚未提交的事务"""
+        pool = ConnectionPool(db_path, size=1)
+        conn = pool.acquire()
+        conn.execute('CREATE TABLE items (id INTEGER PRIMARY KEY)')
+        conn.commit()
+        conn.execute('INSERT INTO items (id) VALUES (1)')
+        conn.close()
+
+        conn = pool.acquire()
+        count = conn.execute('SELECT COUNT(*) FROM items').fetchone()[0]
+        assert count == 0
+        conn.close()
+        pool.close_all()
+
+    @pytest.mark.skipif(not hasattr(os, 'fork'), reason='需要os.fork')
+    def test_forked_child_opens_own_connections(self, db_path):
+        """测试fork出的子进程不使用父进程的连接"""
+        pool = ConnectionPool(db_path, size=1, timeout=0.5)
+        held = pool.acquire()
+
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 1
+            try:
+                # 父进程占用了唯一的连接，子进程仍能打开自己的连接
+                conn = pool.acquire()
+                if conn.raw is not held.raw and conn.execute('SELECT 1').fetchone()[0] == 1:
+                    exit_code = 0
+                conn.close()
+            finally:
+                os._exit(exit_code)  # pylint: disable=protected-access
+
+        _, status = os.waitpid(pid, 0)
+        held.close()
+        pool.close_all()
+        assert os.waitstatus_to_exitcode(status) == 0
+
+    def test_pool_settings_from_config(self, db_path):
+        """测试从环境配置创建连接管理器时使用配置的连接池参数"""
+        class SlowPoolConfig(Config):
+            """等待空闲连接0.1秒的配置"""
+            DATABASE_POOL_SIZE = 1
+            DATABASE_POOL_TIMEOUT = 0.1
+
+        db_connection = DatabaseConnection.from_config(SlowPoolConfig, db_path)
+        assert db_connection.pool.timeout == 0.1
+        conn = db_connection.get_connection()
+        started = time.monotonic()
+        with pytest.raises(PoolTimeoutError):
+            db_connection.get_connection()
+        assert time.monotonic() - started < 5
+        conn.close()
+        db_connection.close()
+
+
+class TestSqlitePragmas:
+    """测试SQLite性能配置"""
+
+    def test_pragmas_applied_to_pooled_connection(self, db_path):
+        """测试新建的池化连接应用了配置的pragma"""
+        db_connection = DatabaseConnection(db_path, pragmas={
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'busy_timeout': 1234,
+            'temp_store': 'MEMORY',
+        })
+        conn = db_connection.get_connection()
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        assert conn.execute('PRAGMA synchronous').fetchone()[0] == 1
+        assert conn.execute('PRAGMA busy_timeout').fetchone()[0] == 1234
+        assert conn.execute('PRAGMA temp_store').fetchone()[0] == 2
+        conn.close()
+        db_connection.close()
+
+    def test_unknown_pragma_rejected(self, db_path):
+        """测试不支持的pragma会被拒绝"""
+        with pytest.raises(ValueError):
+            DatabaseConnection(db_path, pragmas={'writable_schema': 1})
@@ -7,8 +7,10 @@ These tests verify that database schema updates work correctly.
 import os
 import sqlite3
 import tempfile
+import threading
 
 from todolist.db import DatabaseConnection, DatabaseInitializer
+from todolist.db.migrations import LATEST_VERSION
 
 
 class TestDatabaseMigration:
@@ -109,4 +111,106 @@ class TestDatabaseMigration:
                     os.remove(test_db_path)
                 except OSError as e:
                     # 如果删除失败，记录日志但不影响测试结果
-                    print(f"警告：无法删除测试数据库文件 {test_db_path}: {e}")
\ No newline at end of file
+                    print(f"警告：无法删除测试数据库文件 {test_db_path}: {e}")
+
+    def test_init_db_backfills_occurrence_state(self):
+        """测试init_db函数将JSON实例列表迁移到occurrence_state表"""
+        # 使用临时文件来避免文件锁定问题
+        with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as tmp:
+            test_db_path = tmp.name
+
+        try:
+            # 创建带有JSON实例列表列的旧表
+            conn = sqlite3.connect(test_db_path)
+            cursor = conn.cursor()
+            cursor.execute('''
+                CREATE TABLE todos (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    title TEXT NOT NULL,
+                    completed INTEGER DEFAULT 0,
+                    deadline DATETIME,
+                    is_recurring BOOLEAN DEFAULT 0,
+                    deleted_occurrences TEXT DEFAULT NULL,
+                    completed_occurrences TEXT DEFAULT NULL
+                )
+            ''')
+            cursor.execute('''
+                INSERT INTO todos (title, deadline, is_recurring, deleted_occurrences, completed_occurrences)
+                VALUES (?, ?, 1, ?, ?)
+            ''', ('daily', '2026-01-01 10:00:00',
+                  '["2026-01-02 10:00:00"]',
+                  '["2026-01-01 10:00:00", "2026-01-02 10:00:00"]'))
+            conn.commit()
+            conn.close()
+
+            db_connection = DatabaseConnection(test_db_path)
+            db_initializer = DatabaseInitializer(db_connection)
+            db_initializer.init_db()
+
+            conn = sqlite3.connect(test_db_path)
+            cursor = conn.cursor()
+            cursor.execute('SELECT occurrence_at, state FROM occurrence_state ORDER BY occurrence_at')
+            states = cursor.fetchall()
+            conn.close()
+
+            # 已删除状态覆盖已完成状态
+            assert states == [
+                ('2026-01-01 10:00:00', 'completed'),
+                ('2026-01-02 10:00:00', 'deleted'),
+            ]
+        finally:
+            # 清理测试数据库
+            if os.path.exists(test_db_path):
+                try:
+                    os.remove(test_db_path)
+                except OSError as e:
+                    # 如果删除失败，记录日志但不影响测试结果
+                    print(f"警告：无法删除测试数据库文件 {test_db_path}: {e}")
+
+    def test_init_db_skips_current_schema(self, db_connection):
+        """测试数据库版本为最新时init_db不做任何检查"""
+        statements = []
+        pooled = db_connection.get_connection()
+        raw = pooled.raw
+        raw.set_trace_callback(statements.append)
+        pooled.close()
+        try:
+            assert DatabaseInitializer(db_connection).init_db() == LATEST_VERSION
+        finally:
+            raw.set_trace_callback(None)
+
+        # 只执行了连接池的健康检查和版本查询
+        assert [statement for statement in statements if statement != 'SELECT 1'] == ['PRAGMA user_version']
+
+    def test_concurrent_init_db_migrates_once(self):
+        """测试多个进程同时启动时只有一个执行迁移"""
+        with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as tmp:
+            test_db_path = tmp.name
+
+        try:
+            versions = []
+            errors = []
+
+            def start():
+                connection = DatabaseConnection(test_db_path)
+                try:
+                    versions.append(DatabaseInitializer(connection).init_db())
+                except Exception as e:
+                    errors.append(e)
+                finally:
+                    connection.close()
+
+            threads = [threading.Thread(target=start) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            assert errors == []
+            assert sorted(versions) == [0, LATEST_VERSION, LATEST_VERSION, LATEST_VERSION]
+        finally:
+            if os.path.exists(test_db_path):
+                try:
+                    os.remove(test_db_path)
+                except OSError as e:
+                    print(f"警告：无法删除测试数据库文件 {test_db_path}: {e}")
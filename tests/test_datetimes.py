@@ -0,0 +1,34 @@
+# pylint: disable=locally-disabled,broad-exception-caught,useless-suppression,suppressed-message
+"""
+Datetime parsing tests for the TodoList application.
+These tests verify the deadline parser and occurrence formatter.
+"""
+
+from datetime import datetime
+
+import pytest
+
+from todolist.utils import format_datetime, parse_datetime
+
+
+class TestDatetimeParsing:
+    """测试截止时间解析与格式化"""
+
+    @pytest.mark.parametrize('value', ['2026-03-01 09:30:00', '2026-03-01T09:30', '2026-03-01T09:30:00'])
+    def test_parse_supported_formats(self, value):
+        """测试支持的截止时间格式"""
+        assert parse_datetime(value) == datetime(2026, 3, 1, 9, 30)
+
+    @pytest.mark.parametrize('value', ['2026-03-01', '2026-03-01 09:30', '2026-02-30 09:30:00',
+                                       '2026-03-01T09:30:00+08', 'not a date'])
+    def test_parse_rejects_unsupported_values(self, value):
+        """测试不支持或不合法的时间字符串"""
+        with pytest.raises(ValueError):
+            parse_datetime(value)
+
+    def test_format_round_trip(self):
+        """测试格式化结果可以解析回同一时间"""
+        value = datetime(2026, 12, 31, 23, 59, 5)
+        formatted = format_datetime(value)
+        assert formatted == '2026-12-31 23:59:05'
+        assert parse_datetime(formatted) == value
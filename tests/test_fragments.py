@@ -0,0 +1,63 @@
+# pylint: disable=locally-disabled,broad-exception-caught,useless-suppression,suppressed-message
+"""
+Fragment endpoint tests for the TodoList application.
+These tests verify that toggle and delete return only the affected list items.
+"""
+
+import re
+
+from todolist.utils import encode_occurrence_id
+
+
+def _item_ids(html):
+    """获取片段中所有<li>的ID"""
+    return re.findall(r'<li id="todo-(\d+)"', html)
+
+
+class TestFragments:
+    """测试局部更新接口"""
+
+    def test_toggle_and_delete_regular_todo(self, client):
+        """测试切换返回该事项的<li>，删除返回204"""
+        client.post('/add', data={'title': 'regular', 'deadline': '2026-01-02T09:00'})
+
+        response = client.post('/fragments/toggle/1')
+        assert response.status_code == 200
+        html = response.get_data(as_text=True)
+        assert _item_ids(html) == ['1']
+        assert 'class="todo-item completed' in html and 'regular' in html
+        assert 'completed' not in client.post('/fragments/toggle/1').get_data(as_text=True).split('>')[0]
+
+        assert client.post('/fragments/delete/1').status_code == 204
+        assert client.post('/fragments/delete/1').status_code == 404
+        assert client.post('/fragments/toggle/1').status_code == 404
+
+    def test_occurrence_toggle_and_batch_delete(self, client):
+        """测试周期实例的切换和批量删除只返回该周期事项的实例"""
+        client.post('/add', data={
+            'title': 'daily', 'deadline': '2026-01-01T09:00', 'is_recurring': 'on',
+            'recurrence_type': 'daily', 'recurrence_interval': '1',
+        })
+        client.post('/add', data={'title': 'regular', 'deadline': '2026-01-02T09:00'})
+        first = encode_occurrence_id(1, '2026-01-01 09:00:00')
+        second = encode_occurrence_id(1, '2026-01-02 09:00:00')
+
+        html = client.post(f'/fragments/toggle/{first}').get_data(as_text=True)
+        assert _item_ids(html) == [str(first)]
+        assert 'class="todo-item completed recurring" data-original-id="1"' in html
+
+        response = client.post('/fragments/batch-delete', json={'todo_ids': [second, 2], 'delete_all': False})
+        result = response.get_json()
+        assert result['removed'] == [2]
+        occurrence_ids = _item_ids(result['groups']['1'])
+        assert occurrence_ids[0] == str(first) and str(second) not in occurrence_ids
+        # 删除实例后窗口向后补齐，与首页显示的实例一致
+        index_ids = _item_ids(client.get('/').get_data(as_text=True))
+        assert index_ids == occurrence_ids
+
+        result = client.post('/fragments/batch-delete', json={'todo_ids': [1], 'delete_all': True}).get_json()
+        assert result == {'removed': [1], 'groups': {'1': ''}}
+        assert _item_ids(client.get('/').get_data(as_text=True)) == []
+        # 格式错误的请求体返回400
+        for body in ([1], {'todo_ids': 1}, {'todo_ids': ['x']}, {'todo_ids': [[1]]}):
+            assert client.post('/fragments/batch-delete', json=body).status_code == 400
@@ -0,0 +1,93 @@
+# pylint: disable=locally-disabled,broad-exception-caught,useless-suppression,suppressed-message
+"""
+Materialized occurrence tests for the TodoList application.
+These tests verify that the occurrences table follows repository writes.
+"""
+
+import sqlite3
+
+from todolist.db import DatabaseConnection, TodoRepository, UnitOfWork, WriteExecutor
+from todolist.utils import encode_occurrence_id
+
+
+def _occurrences(repository, todo_id):
+    """获取某个周期事项的物化实例时间列表"""
+    return [occurrence for occurrence, _ in repository.get_upcoming_occurrences().get(todo_id, [])]
+
+
+class TestMaterializedOccurrences:
+    """测试物化的周期实例"""
+
+    def test_add_recurring_todo_materializes_horizon(self, db_connection):
+        """测试添加周期事项时写入前几个实例"""
+        repository = TodoRepository(db_connection)
+        repository.add_todo('daily', '2026-01-01T09:00', True, 'daily', 1, None)
+        todo_id = repository.get_all_todos()[0].id
+
+        assert _occurrences(repository, todo_id) == [
+            '2026-01-01 09:00:00', '2026-01-02 09:00:00', '2026-01-03 09:00:00', '2026-01-04 09:00:00'
+        ]
+
+    def test_batch_delete_refills_occurrences(self, db_connection):
+        """测试删除实例后物化表跳过该实例并补齐"""
+        repository = TodoRepository(db_connection)
+        repository.add_todo('daily', '2026-01-01T09:00', True, 'daily', 1, None)
+        todo_id = repository.get_all_todos()[0].id
+
+        repository.batch_delete_todos([encode_occurrence_id(todo_id, '2026-01-02 09:00:00')])
+
+        assert _occurrences(repository, todo_id) == [
+            '2026-01-01 09:00:00', '2026-01-03 09:00:00', '2026-01-04 09:00:00', '2026-01-05 09:00:00'
+        ]
+
+    def test_top_up_fills_missing_todos(self, db_connection):
+        """测试补齐步骤为缺少实例的周期事项生成实例"""
+        repository = TodoRepository(db_connection)
+        repository.add_todo('weekly', '2026-01-05 09:00:00', True, 'weekly', 1, '[0, 3]')
+        todo_id = repository.get_all_todos()[0].id
+        with db_connection.transaction() as conn:
+            conn.execute('DELETE FROM occurrences')
+
+        assert repository.top_up_occurrences(force=True) == 1
+        assert _occurrences(repository, todo_id) == [
+            '2026-01-05 09:00:00', '2026-01-08 09:00:00', '2026-01-12 09:00:00', '2026-01-15 09:00:00'
+        ]
+        assert repository.top_up_occurrences(force=True) == 0
+
+    def test_top_up_runs_outside_read_unit_of_work(self, db_connection):
+        """测试补齐在只读工作单元之外提交，锁冲突时跳过而不报错"""
+        # WAL模式下读事务开始后仍可由其他连接提交写入
+        wal_connection = DatabaseConnection(db_connection.db_path, pragmas={'journal_mode': 'WAL'})
+        repository = TodoRepository(wal_connection, write_executor=WriteExecutor(
+            wal_connection, max_attempts=2, base_delay=0.001, busy_timeout=0))
+        repository.add_todo('daily', '2026-01-01T09:00', True, 'daily', 1, None)
+        with wal_connection.transaction() as conn:
+            conn.execute('DELETE FROM occurrences')
+
+        blocker = sqlite3.connect(db_connection.db_path, isolation_level=None)
+        blocker.execute('BEGIN IMMEDIATE')
+        try:
+            with UnitOfWork(wal_connection):
+                repository.get_change_counter()
+                assert repository.top_up_occurrences(force=True) == 0
+        finally:
+            blocker.rollback()
+            blocker.close()
+
+        with UnitOfWork(wal_connection) as unit_of_work:
+            repository.get_change_counter()
+            changes = unit_of_work.connection().total_changes
+            assert repository.top_up_occurrences() == 1
+            # 工作单元的连接没有写入，补齐的实例由独立事务提交
+            assert unit_of_work.connection().total_changes == changes
+        assert len(_occurrences(repository, repository.get_all_todos()[0].id)) == 4
+        wal_connection.close()
+
+    def test_occurrences_without_id_are_skipped(self, db_connection):
+        """测试1970年之前无法编码ID的实例不被物化"""
+        repository = TodoRepository(db_connection)
+        todo_id = repository.add_todo('daily', '1969-12-30T09:00', True, 'daily', 1, None)
+
+        assert _occurrences(repository, todo_id) == [
+            '1970-01-01 09:00:00', '1970-01-02 09:00:00', '1970-01-03 09:00:00', '1970-01-04 09:00:00'
+        ]
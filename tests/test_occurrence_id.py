@@ -0,0 +1,60 @@
+# pylint: disable=locally-disabled,broad-exception-caught,useless-suppression,suppressed-message
+"""
+Occurrence ID tests for the TodoList application.
+These tests verify that generated occurrence IDs can be decoded in O(1).
+"""
+
+import pytest
+
+from todolist.utils import (
+    OCCURRENCE_ID_BASE,
+    decode_occurrence_id,
+    encode_occurrence_id,
+    has_occurrence_id,
+    is_occurrence_id,
+    original_todo_id,
+)
+
+
+class TestOccurrenceId:
+    """测试周期实例ID的编码与解码"""
+
+    def test_round_trip(self):
+        """测试实例ID解码后得到原始ID和实例时间"""
+        occurrence_id = encode_occurrence_id(42, '2026-03-29 02:30:00')
+        assert is_occurrence_id(occurrence_id)
+        assert decode_occurrence_id(occurrence_id) == (42, '2026-03-29 02:30:00')
+        assert original_todo_id(occurrence_id) == 42
+
+    def test_plain_todo_id_is_not_decoded(self):
+        """测试普通待办事项ID不会被当作实例ID"""
+        assert not is_occurrence_id(42)
+        assert decode_occurrence_id(42) is None
+        assert original_todo_id(42) == 42
+
+    def test_distinct_occurrences_never_collide(self):
+        """测试不同实例时间（包括夏令时切换附近）生成不同ID"""
+        occurrences = [
+            '2026-10-25 01:30:00',
+            '2026-10-25 02:30:00',
+            '2026-10-25 03:30:00',
+            '2027-10-25 02:30:00',
+        ]
+        ids = {encode_occurrence_id(1, occurrence) for occurrence in occurrences}
+        assert len(ids) == len(occurrences)
+
+    def test_ids_stay_within_javascript_safe_range(self):
+        """测试常见ID范围内的实例ID在JavaScript中可以精确表示"""
+        occurrence_id = encode_occurrence_id(100000, '2099-12-31 23:59:59')
+        assert occurrence_id < 2 ** 53
+        assert occurrence_id // OCCURRENCE_ID_BASE == 100000
+
+    def test_out_of_range_occurrences_are_rejected(self):
+        """测试1970年之前和超出ID范围的实例时间无法编码"""
+        assert decode_occurrence_id(encode_occurrence_id(1, '1970-01-01 00:00:00')) == (1, '1970-01-01 00:00:00')
+        assert decode_occurrence_id(encode_occurrence_id(5, '2286-11-20 17:46:39')) == (5, '2286-11-20 17:46:39')
+        for occurrence in ('1969-12-31 23:00:00', '1965-01-01 00:00:00', '2286-11-20 17:46:40', '2300-01-01 00:00:00'):
+            assert not has_occurrence_id(occurrence)
+            with pytest.raises(ValueError):
+                encode_occurrence_id(5, occurrence)
+        assert has_occurrence_id('2026-01-01 09:00:00')
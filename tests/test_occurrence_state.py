@@ -0,0 +1,66 @@
+# pylint: disable=locally-disabled,broad-exception-caught,useless-suppression,suppressed-message
+"""
+Occurrence state tests for the TodoList application.
+These tests verify single-statement updates of recurring occurrence states.
+"""
+
+import threading
+
+from todolist.db import TodoRepository
+from todolist.utils import encode_occurrence_id
+
+OCCURRENCE = '2026-01-02 09:00:00'
+
+
+def _add_daily(repository):
+    """添加一个每日周期事项并返回其ID"""
+    repository.add_todo('daily', '2026-01-01T09:00', True, 'daily', 1, None)
+    return repository.get_all_todos()[0].id
+
+
+class TestOccurrenceStateUpdates:
+    """测试周期实例状态的原子更新"""
+
+    def test_toggle_completed(self, db_connection):
+        """测试切换实例完成状态"""
+        repository = TodoRepository(db_connection)
+        todo_id = _add_daily(repository)
+
+        assert repository.toggle_occurrence_completed(todo_id, OCCURRENCE) is True
+        assert repository.get_occurrence_state(todo_id, OCCURRENCE) == 'completed'
+        assert repository.toggle_occurrence_completed(todo_id, OCCURRENCE) is False
+        assert repository.get_occurrence_state(todo_id, OCCURRENCE) is None
+
+    def test_deleted_occurrence_and_missing_todo_are_unchanged(self, db_connection):
+        """测试已删除的实例和不存在的事项不会被修改"""
+        repository = TodoRepository(db_connection)
+        todo_id = _add_daily(repository)
+        repository.batch_delete_todos([encode_occurrence_id(todo_id, OCCURRENCE)])
+
+        assert repository.toggle_occurrence_completed(todo_id, OCCURRENCE) is None
+        assert repository.get_occurrence_state(todo_id, OCCURRENCE) == 'deleted'
+        assert repository.toggle_occurrence_completed(todo_id + 1, OCCURRENCE) is None
+        assert repository.get_occurrence_states() == {todo_id: {OCCURRENCE: 'deleted'}}
+
+    def test_concurrent_toggles_are_not_lost(self, db_connection):
+        """测试并发切换不会丢失更新"""
+        repository = TodoRepository(db_connection)
+        todo_id = _add_daily(repository)
+        errors = []
+
+        def toggle_many():
+            try:
+                for _ in range(25):
+                    repository.toggle_occurrence_completed(todo_id, OCCURRENCE)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=toggle_many) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # 共切换100次，最终应回到未完成状态
+        assert errors == []
+        assert repository.get_occurrence_state(todo_id, OCCURRENCE) is None
@@ -0,0 +1,68 @@
+# pylint: disable=locally-disabled,broad-exception-caught,useless-suppression,suppressed-message
+"""
+Optimistic concurrency tests for the TodoList application.
+These tests verify versioned updates of todo rows.
+"""
+
+import pytest
+
+from todolist.db import ConcurrentUpdateError, TodoRepository, UnitOfWork
+
+
+class TestOptimisticConcurrency:
+    """测试基于行版本的乐观并发控制"""
+
+    def test_stale_version_is_rejected(self, db_connection):
+        """测试版本过期的更新不会生效"""
+        repository = TodoRepository(db_connection)
+        repository.add_todo('todo', '2026-01-01 10:00:00')
+        todo = repository.get_todo(repository.get_all_todos()[0].id)
+
+        assert repository.update_todo(todo['id'], expected_version=todo['version'], title='first')
+        assert not repository.update_todo(todo['id'], expected_version=todo['version'], title='second')
+        assert repository.get_todo(todo['id'])['title'] == 'first'
+
+    def test_modify_todo_retries_after_concurrent_change(self, db_connection):
+        """测试读改写期间被其他写入抢先时重新读取并重试"""
+        repository = TodoRepository(db_connection)
+        repository.add_todo('todo', '2026-01-01 10:00:00')
+        todo_id = repository.get_all_todos()[0].id
+        attempts = []
+
+        def toggle(todo):
+            attempts.append(todo['version'])
+            if len(attempts) == 1:
+                # 模拟另一个请求在读取之后抢先完成了切换（在同一工作单元中写入）
+                repository.update_todo(todo_id, completed=1 - todo['completed'])
+            return {'completed': 1 - todo['completed']}
+
+        # 读取与条件更新在同一事务中执行，只有同一事务中的写入才能插入其间
+        with UnitOfWork(db_connection, immediate=True):
+            assert repository.modify_todo(todo_id, toggle) == {'completed': 0}
+        assert attempts == [0, 1]
+        assert repository.get_todo(todo_id)['completed'] == 0
+
+    def test_modify_todo_gives_up(self, db_connection):
+        """测试持续冲突时抛出ConcurrentUpdateError"""
+        repository = TodoRepository(db_connection)
+        repository.add_todo('todo', '2026-01-01 10:00:00')
+        todo_id = repository.get_all_todos()[0].id
+
+        def always_conflict(todo):
+            repository.update_todo(todo_id, title=todo['title'])
+            return {'completed': 1}
+
+        with UnitOfWork(db_connection, immediate=True):
+            with pytest.raises(ConcurrentUpdateError):
+                repository.modify_todo(todo_id, always_conflict, max_attempts=3)
+
+    def test_toggle_conflict_returns_409(self, client, monkeypatch):
+        """测试切换完成状态时乐观并发重试用尽返回409而不是500"""
+        client.post('/add', data={'title': 'todo', 'deadline': '2026-01-01T10:00'})
+
+        def conflict(*_args, **_kwargs):
+            raise ConcurrentUpdateError('Todo 1 changed concurrently 5 times')
+
+        monkeypatch.setattr(TodoRepository, 'modify_todo', conflict)
+        assert client.post('/toggle/1').status_code == 409
+        assert client.post('/fragments/toggle/1').status_code == 409
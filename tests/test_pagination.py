@@ -0,0 +1,50 @@
+# pylint: disable=locally-disabled,broad-exception-caught,useless-suppression,suppressed-message
+"""
+Pagination tests for the TodoList application.
+These tests verify keyset pagination of todos by (deadline, id).
+"""
+
+import pytest
+
+from todolist.db import TodoRepository
+from todolist.utils import decode_cursor, encode_cursor
+
+
+class TestKeysetPagination:
+    """测试按(deadline, id)游标分页"""
+
+    def test_pages_forward_and_backward(self, db_connection):
+        """测试向后和向前翻页覆盖全部事项且顺序一致"""
+        repository = TodoRepository(db_connection)
+        for title, deadline in (('c', '2026-01-03T09:00'), ('a', '2026-01-01 09:00:00'),
+                                ('b2', '2026-01-02T09:00'), ('b1', '2026-01-02 09:00:00'),
+                                ('d', '2026-01-04T09:00')):
+            repository.add_todo(title, deadline)
+
+        first, has_previous, has_next = repository.get_todos_page(2)
+        assert [todo.title for todo in first] == ['a', 'b2']
+        assert (has_previous, has_next) == (False, True)
+
+        second, has_previous, has_next = repository.get_todos_page(2, after=(first[-1].deadline, first[-1].id))
+        assert [todo.title for todo in second] == ['b1', 'c']
+        assert (has_previous, has_next) == (True, True)
+
+        third, _, has_next = repository.get_todos_page(2, after=(second[-1].deadline, second[-1].id))
+        assert [todo.title for todo in third] == ['d']
+        assert not has_next
+
+        back, has_previous, has_next = repository.get_todos_page(2, before=(third[0].deadline, third[0].id))
+        assert back == second
+        assert (has_previous, has_next) == (True, True)
+
+    def test_deadlines_are_normalized(self, db_connection):
+        """测试datetime-local格式的截止时间统一保存为秒级格式"""
+        repository = TodoRepository(db_connection)
+        repository.add_todo('todo', '2026-01-02T09:00')
+        assert repository.get_all_todos()[0].deadline == '2026-01-02 09:00:00'
+
+    def test_cursor_round_trip(self):
+        """测试游标编码解码及非法游标"""
+        assert decode_cursor(encode_cursor('2026-01-02 09:00:00', 7)) == ('2026-01-02 09:00:00', 7)
+        with pytest.raises(ValueError):
+            decode_cursor('not-a-cursor')
@@ -0,0 +1,111 @@
+# pylint: disable=locally-disabled,broad-exception-caught,useless-suppression,suppressed-message
+"""
+Query plan tests for the TodoList application.
+These tests run EXPLAIN QUERY PLAN on every statement TodoRepository executes
+and fail when a statement scans a whole table instead of using an index.
+"""
+
+import os
+import re
+import tempfile
+
+import pytest
+
+from todolist.db import DatabaseConnection, DatabaseInitializer, TodoRepository
+from todolist.db import repository as repository_module
+from todolist.utils import encode_occurrence_id
+
+# Plan lines of a full table scan, e.g. "SCAN todos" (index scans read "SCAN todos USING INDEX ...")
+FULL_SCAN = re.compile(r'^SCAN (\w+)$')
+
+DATA_STATEMENTS = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH')
+
+
+@pytest.fixture
+def traced_repository():
+    """记录所有SQL语句的仓库（连接池只有一个连接）"""
+    with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as tmp:
+        path = tmp.name
+    connection = DatabaseConnection(path, pool_size=1)
+    DatabaseInitializer(connection).init_db()
+
+    statements = []
+    pooled = connection.get_connection()
+    raw = pooled.raw
+    pooled.close()
+    raw.set_trace_callback(statements.append)
+
+    yield TodoRepository(connection), raw, statements
+
+    raw.set_trace_callback(None)
+    connection.close()
+    if os.path.exists(path):
+        try:
+            os.remove(path)
+        except OSError as e:
+            print(f"警告：无法删除测试数据库文件 {path}: {e}")
+
+
+def _full_scans(raw, statements):
+    """获取语句中全表扫描的表及对应语句"""
+    scans = []
+    for statement in statements:
+        if not statement.lstrip().upper().startswith(DATA_STATEMENTS):
+            continue
+        for row in raw.execute(f'EXPLAIN QUERY PLAN {statement}').fetchall():
+            match = FULL_SCAN.match(row[3])
+            if match:
+                scans.append((match.group(1), ' '.join(statement.split())))
+    return scans
+
+
+class TestQueryPlans:
+    """测试仓库语句的查询计划"""
+
+    def test_repository_statements_use_indexes(self, traced_repository, monkeypatch):
+        """测试仓库的有界查询和写入都不会全表扫描"""
+        # get_all_todos及不带条件的get_occurrence_states/get_upcoming_occurrences按约定读取整表，不在检查范围内
+        repository, raw, statements = traced_repository
+        # 每次写入都截断变更事件日志，使截断语句也被检查
+        monkeypatch.setattr(repository_module, 'CHANGE_EVENTS_PRUNE_INTERVAL', 1)
+        repository.add_todo('todo', '2026-01-01T09:00')
+        repository.add_todo('daily', '2026-01-01T09:00', True, 'daily', 1, None)
+        todos = repository.get_all_todos()
+        plain_id, recurring_id = todos[0].id, todos[1].id
+        del statements[:]
+
+        calls = [
+            lambda: repository.get_todos_page(10),
+            lambda: repository.get_todos_page(10, after=('2026-01-01 09:00:00', plain_id)),
+            lambda: repository.get_todos_page(10, before=('2026-01-02 09:00:00', recurring_id)),
+            lambda: repository.get_todo(plain_id),
+            lambda: repository.update_todo(plain_id, completed=1),
+            lambda: repository.update_todo(recurring_id, recurrence_interval=2),
+            lambda: repository.get_occurrence_states([recurring_id]),
+            lambda: repository.get_occurrence_state(recurring_id, '2026-01-03 09:00:00'),
+            lambda: repository.toggle_occurrence_completed(recurring_id, '2026-01-03 09:00:00'),
+            lambda: repository.get_upcoming_occurrences(todo_ids=[recurring_id]),
+            lambda: repository.top_up_occurrences(force=True),
+            lambda: repository.batch_delete_todos([encode_occurrence_id(recurring_id, '2026-01-05 09:00:00')]),
+            lambda: repository.batch_delete_todos([plain_id]),
+            lambda: repository.delete_todo(recurring_id),
+            lambda: repository.get_change_counter(),
+            lambda: repository.get_change_events(0),
+            lambda: repository.get_change_events(1, limit=5),
+        ]
+        for call in calls:
+            call()
+
+        assert statements, "没有记录到任何SQL语句"
+        # 变更计数和变更事件日志的语句都在检查范围内
+        checked = ' '.join(statements)
+        for statement in ('UPDATE change_counter', 'SELECT value FROM change_counter', 'INSERT INTO change_events',
+                          'DELETE FROM change_events', 'FROM change_events WHERE id >'):
+            assert statement in checked
+        assert _full_scans(raw, statements) == []
+
+    def test_full_scan_is_detected(self, traced_repository):
+        """测试检查本身能发现全表扫描"""
+        repository, raw, statements = traced_repository
+        repository.get_all_todos()
+        assert [table for table, _ in _full_scans(raw, statements)] == ['todos']
@@ -0,0 +1,43 @@
+# pylint: disable=locally-disabled,broad-exception-caught,useless-suppression,suppressed-message
+"""
+Record tests for the TodoList application.
+These tests verify the slotted Todo and Occurrence records returned by the repository.
+"""
+
+import pytest
+
+from todolist.db import Occurrence, Todo, TodoRepository
+from todolist.utils import decode_occurrence_id
+
+
+class TestRecords:
+    """测试Todo和Occurrence记录"""
+
+    def test_repository_returns_todo_records(self, db_connection):
+        """测试仓库直接返回Todo记录"""
+        repository = TodoRepository(db_connection)
+        repository.add_todo('weekly', '2026-01-05T09:00', True, 'weekly', 2, '[0, 2]')
+
+        todo = repository.get_all_todos()[0]
+
+        assert isinstance(todo, Todo)
+        assert not hasattr(todo, '__dict__')
+        assert (todo.title, todo.deadline, todo.recurrence_interval, todo.recurrence_days, todo.version) == \
+            ('weekly', '2026-01-05 09:00:00', 2, '[0, 2]', 0)
+        assert repository.get_todo(todo.id) == todo
+        assert todo['recurrence_type'] == 'weekly'
+        with pytest.raises(KeyError):
+            todo['deleted_occurrences']
+
+    def test_occurrence_renders_like_todo(self, db_connection):
+        """测试周期实例记录具有与事项相同的显示属性"""
+        repository = TodoRepository(db_connection)
+        repository.add_todo('daily', '2026-01-01T09:00', True, 'daily', 1, None)
+        todo = repository.get_all_todos()[0]
+
+        occurrence = Occurrence(todo, '2026-01-02 09:00:00', 1)
+
+        assert decode_occurrence_id(occurrence.id) == (todo.id, '2026-01-02 09:00:00')
+        assert (occurrence.title, occurrence.completed, occurrence.is_recurring) == ('daily', 1, True)
+        assert occurrence.deadline == occurrence.next_occurrence == '2026-01-02 09:00:00'
+        assert not hasattr(occurrence, '__dict__')
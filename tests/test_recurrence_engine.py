@@ -0,0 +1,141 @@
+# pylint: disable=locally-disabled,broad-exception-caught,useless-suppression,suppressed-message
+"""
+Recurrence engine tests for the TodoList application.
+These tests verify occurrence expansion without a browser.
+"""
+
+from datetime import datetime
+from itertools import islice
+
+import pytest
+
+from todolist.utils import (
+    RecurrenceRule,
+    compile_rule,
+    expand_occurrences_batch,
+    generate_all_occurrences,
+    generate_occurrences_between,
+    is_occurrence,
+    iter_occurrences,
+)
+
+RULES = [
+    ('2024-01-31 10:00:00', 'monthly', 1, None),
+    ('2024-02-29T08:30', 'yearly', 1, None),
+    ('2026-05-15 00:00:00', 'weekly', 1, '[0, 2, 4]'),
+    ('2026-05-15 00:00:00', 'weekly', 2, '[]'),
+    ('2026-10-25 02:30:00', 'daily', 3, None),
+    ('2026-10-25 02:30:00', 'hourly', 5, None),
+    ('2025-08-30T12:00', 'minutely', 7, None),
+]
+
+
+class TestOccurrenceWindow:
+    """测试按时间窗口生成周期实例"""
+
+    @pytest.mark.parametrize('deadline,recurrence_type,interval,days', RULES)
+    def test_window_matches_full_expansion(self, deadline, recurrence_type, interval, days):
+        """测试窗口结果与从创建时间逐个生成的结果一致"""
+        occurrences = generate_all_occurrences(deadline, recurrence_type, interval, days, limit=60)
+        window = generate_occurrences_between(
+            deadline, recurrence_type, interval, days, occurrences[25], occurrences[40])
+        assert window == occurrences[25:40]
+
+    def test_window_seeks_without_stepping_from_creation(self):
+        """测试很久以前创建的每分钟事项可以直接定位到窗口"""
+        window = generate_occurrences_between(
+            '2000-01-01 00:00:00', 'minutely', 1, None,
+            '2026-01-01 00:00:30', '2026-01-01 00:03:00')
+        assert window == ['2026-01-01 00:01:00', '2026-01-01 00:02:00']
+
+    def test_window_before_creation_starts_at_deadline(self):
+        """测试窗口早于创建时间时从截止时间开始"""
+        window = generate_occurrences_between(
+            '2026-01-01T09:00', 'daily', 1, None,
+            '2025-01-01 00:00:00', '2026-01-03 00:00:00')
+        assert window == ['2026-01-01 09:00:00', '2026-01-02 09:00:00']
+
+    def test_is_occurrence(self):
+        """测试判断某个时间是否为周期实例"""
+        assert is_occurrence('2026-01-01T09:00', 'daily', 2, None, '2026-03-02 09:00:00')
+        assert not is_occurrence('2026-01-01T09:00', 'daily', 2, None, '2026-03-03 09:00:00')
+        assert not is_occurrence('2026-01-01T09:00', 'daily', 2, None, '2025-12-30 09:00:00')
+
+
+class TestOccurrenceIterator:
+    """测试惰性周期实例迭代器"""
+
+    def test_iterator_skips_excluded_occurrences(self):
+        """测试迭代器跳过已删除的实例并可提前终止"""
+        deleted = {'2026-01-01 09:00:00', '2026-01-03 09:00:00'}
+        occurrences = list(islice(iter_occurrences('2026-01-01T09:00', 'daily', 1, None, exclude=deleted), 3))
+        assert occurrences == ['2026-01-02 09:00:00', '2026-01-04 09:00:00', '2026-01-05 09:00:00']
+
+    def test_iterator_with_invalid_deadline_is_empty(self):
+        """测试截止时间无法解析时迭代器为空"""
+        assert list(iter_occurrences('not a date', 'daily', 1, None)) == []
+
+
+class TestRecurrenceRule:
+    """测试编译后的周期规则"""
+
+    def test_rule_is_memoized_by_signature(self):
+        """测试相同的周期设置复用同一个规则对象"""
+        rule = compile_rule('2026-01-05T09:00', 'weekly', 1, '[4, 0, 2]')
+        assert rule is compile_rule('2026-01-05T09:00', 'weekly', 1, '[4, 0, 2]')
+        assert rule.weekdays == (0, 2, 4)
+
+    def test_rule_from_todo_row(self):
+        """测试从数据库行编译规则"""
+        row = {
+            'deadline': '2026-01-05 09:00:00',
+            'recurrence_type': 'daily',
+            'recurrence_interval': 2,
+            'recurrence_days': None,
+        }
+        rule = RecurrenceRule.from_todo(row)
+        assert rule.contains('2026-01-09 09:00:00')
+        assert rule.next_after('2026-01-09 09:00:00') == '2026-01-11 09:00:00'
+
+
+    @pytest.mark.parametrize('anchor, recurrence_type, interval', [
+        (datetime(1900, 1, 30, 9), 'monthly', 2),
+        (datetime(1900, 1, 31, 9), 'monthly', 1),
+        (datetime(1908, 2, 29, 9), 'monthly', 48),
+        (datetime(1904, 2, 29, 9), 'yearly', 1),
+    ])
+    def test_seek_month_end_without_stepping(self, monkeypatch, anchor, recurrence_type, interval):
+        """测试月末锚点定位时不从创建时间逐步推进，结果与逐步推进一致"""
+        rule = RecurrenceRule(recurrence_type, interval, None, anchor)
+        start = datetime(2126, 1, 1)
+        expected = anchor
+        while expected < start:
+            expected = rule.step(expected)
+
+        steps = []
+        original_step = RecurrenceRule.step
+
+        def counting_step(self, current):
+            steps.append(current)
+            return original_step(self, current)
+
+        monkeypatch.setattr(RecurrenceRule, 'step', counting_step)
+        assert rule.seek(start) == expected
+        assert steps == []
+
+
+class TestBatchExpansion:
+    """测试批量展开多个周期规则"""
+
+    @pytest.mark.parametrize('use_numpy', [False, True])
+    def test_batch_matches_single_rule_expansion(self, use_numpy):
+        """测试批量展开与逐条展开结果一致"""
+        if use_numpy:
+            pytest.importorskip('numpy')
+        rules = [compile_rule(*settings) for settings in RULES]
+        rules.append(compile_rule('9999-12-30 00:00:00', 'daily', 1, None))
+        counts = [30, 0, 12, 25, 7, 3, 18, 5]
+        expanded = expand_occurrences_batch(rules, counts, use_numpy=use_numpy)
+        for rule, count, occurrences in zip(rules, counts, expanded):
+            assert occurrences == list(islice(rule.occurrences(), count))
+        assert len(expanded[-1]) == 2
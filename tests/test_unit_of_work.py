@@ -0,0 +1,67 @@
+# pylint: disable=locally-disabled,broad-exception-caught,useless-suppression,suppressed-message
+"""
+Unit of work tests for the TodoList application.
+These tests verify that repository calls share one transaction per request.
+"""
+
+import os
+
+import pytest
+from flask import Flask
+
+from todolist.db import TodoRepository, UnitOfWork, register_unit_of_work
+from todolist.routes import RoutesManager
+from todolist.utils import fromjson_filter, original_id_filter
+
+
+class TestUnitOfWork:
+    """测试请求级事务"""
+
+    def test_commit_on_success(self, db_connection):
+        """测试工作单元正常结束时提交"""
+        repository = TodoRepository(db_connection)
+        with UnitOfWork(db_connection, immediate=True):
+            repository.add_todo('first', '2026-01-01 10:00:00')
+            repository.add_todo('second', '2026-01-02 10:00:00')
+            # 同一事务内可以读到尚未提交的写入
+            assert len(repository.get_all_todos()) == 2
+
+        assert len(repository.get_all_todos()) == 2
+
+    def test_rollback_on_error(self, db_connection):
+        """测试工作单元异常结束时回滚全部写入"""
+        repository = TodoRepository(db_connection)
+        with pytest.raises(RuntimeError):
+            with UnitOfWork(db_connection, immediate=True):
+                repository.add_todo('first', '2026-01-01 10:00:00')
+                raise RuntimeError('boom')
+
+        assert repository.get_all_todos() == []
+
+    def test_request_shares_one_transaction(self, db_connection):
+        """测试一次HTTP请求内的仓库调用只使用一个连接"""
+        app = Flask(__name__, template_folder=os.path.join(os.path.dirname(__file__), '..', 'templates'))
+        app.template_filter('fromjson')(fromjson_filter)
+        app.template_filter('original_id')(original_id_filter)
+        repository = TodoRepository(db_connection)
+        RoutesManager(app, repository)
+        register_unit_of_work(app, db_connection)
+
+        repository.add_todo('todo', '2026-01-01 10:00:00')
+        todo_id = repository.get_all_todos()[0].id
+
+        acquired = []
+        original_acquire = db_connection.pool.acquire
+
+        def counting_acquire():
+            acquired.append(1)
+            return original_acquire()
+
+        db_connection.pool.acquire = counting_acquire
+        with app.test_client() as client:
+            response = client.post(f'/toggle/{todo_id}')
+            assert response.status_code == 302
+        db_connection.pool.acquire = original_acquire
+
+        assert len(acquired) == 1
+        assert repository.get_todo(todo_id)['completed'] == 1
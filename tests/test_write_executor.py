@@ -0,0 +1,142 @@
+# pylint: disable=locally-disabled,broad-exception-caught,useless-suppression,suppressed-message
+"""
+Write executor tests for the TodoList application.
+These tests verify busy retries, metrics and per-item savepoints of repository writes.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from todolist.db import DatabaseBusyError, DatabaseConnection, TodoRepository, UnitOfWork, WriteExecutor
+from todolist.utils import encode_occurrence_id
+
+
+@pytest.fixture
+def impatient_connection(db_connection):
+    """不等待锁（busy_timeout为0）的数据库连接，使锁冲突立即暴露"""
+    connection = DatabaseConnection(db_connection.db_path, pragmas={'busy_timeout': 0})
+    yield connection
+    connection.close()
+
+
+def _insert(conn):
+    conn.execute("INSERT INTO todos (title, deadline) VALUES ('locked', '2026-01-01 09:00:00')")
+
+
+def _count_todos(db_connection):
+    with db_connection.connection() as conn:
+        return conn.execute('SELECT COUNT(*) FROM todos').fetchone()[0]
+
+
+class TestWriteExecutor:
+    """测试写入执行器的重试与指标"""
+
+    def test_retries_until_lock_is_released(self, impatient_connection):
+        """测试其他连接持有写锁时重试直到成功"""
+        blocker = sqlite3.connect(impatient_connection.db_path, isolation_level=None, check_same_thread=False)
+        blocker.execute('BEGIN IMMEDIATE')
+        release = threading.Timer(0.2, blocker.rollback)
+        release.start()
+        try:
+            executor = WriteExecutor(impatient_connection, max_attempts=20, base_delay=0.02, max_delay=0.05)
+            executor.run(_insert)
+        finally:
+            release.join()
+            blocker.close()
+
+        metrics = executor.metrics.snapshot()
+        assert _count_todos(impatient_connection) == 1
+        assert metrics['transactions'] == 1
+        assert metrics['retries'] >= 1
+        assert metrics['failures'] == 0
+        assert metrics['lock_wait'] >= 0.1
+
+    def test_gives_up_with_busy_error(self, impatient_connection):
+        """测试重试次数用尽后抛出DatabaseBusyError且不写入任何数据"""
+        blocker = sqlite3.connect(impatient_connection.db_path, isolation_level=None)
+        blocker.execute('BEGIN IMMEDIATE')
+        try:
+            executor = WriteExecutor(impatient_connection, max_attempts=3, base_delay=0.001)
+            with pytest.raises(DatabaseBusyError):
+                executor.run(_insert)
+        finally:
+            blocker.rollback()
+            blocker.close()
+
+        metrics = executor.metrics.snapshot()
+        assert _count_todos(impatient_connection) == 0
+        assert metrics['retries'] == 2
+        assert metrics['failures'] == 1
+
+    def test_short_busy_timeout_while_taking_lock(self, db_connection):
+        """测试取锁时使用短busy_timeout，不与退避叠加等待，之后恢复连接配置"""
+        patient_connection = DatabaseConnection(db_connection.db_path, pragmas={'busy_timeout': 15000})
+        blocker = sqlite3.connect(db_connection.db_path, isolation_level=None)
+        blocker.execute('BEGIN IMMEDIATE')
+        started = time.monotonic()
+        try:
+            executor = WriteExecutor(patient_connection, max_attempts=3, base_delay=0.001, busy_timeout=10)
+            with pytest.raises(DatabaseBusyError):
+                executor.run(_insert)
+        finally:
+            blocker.rollback()
+            blocker.close()
+
+        assert time.monotonic() - started < 5
+        with patient_connection.connection() as conn:
+            assert conn.execute('PRAGMA busy_timeout').fetchone()[0] == 15000
+        patient_connection.close()
+
+    def test_retries_and_metrics_are_logged(self, impatient_connection, caplog):
+        """测试重试记录到日志，并按间隔输出指标"""
+        blocker = sqlite3.connect(impatient_connection.db_path, isolation_level=None)
+        blocker.execute('BEGIN IMMEDIATE')
+        executor = WriteExecutor(impatient_connection, max_attempts=2, base_delay=0.001, report_interval=0.001)
+        caplog.set_level(logging.INFO, logger='todolist.db.executor')
+        try:
+            with pytest.raises(DatabaseBusyError):
+                executor.run(_insert)
+        finally:
+            blocker.rollback()
+            blocker.close()
+        time.sleep(0.01)
+        executor.run(_insert)
+
+        messages = [record.getMessage() for record in caplog.records]
+        assert any(message.startswith('Database busy, retrying') for message in messages)
+        assert any(message.startswith('Write metrics: 1 transactions') for message in messages)
+
+    def test_counts_unit_of_work_transactions(self, db_connection):
+        """测试工作单元开始的写事务同样计入指标"""
+        executor = WriteExecutor(db_connection)
+        for immediate in (True, False):
+            unit_of_work = UnitOfWork(db_connection, immediate=immediate, write_executor=executor)
+            unit_of_work.connection()
+            unit_of_work.commit()
+
+        assert executor.metrics.snapshot()['transactions'] == 1
+
+    def test_batch_delete_isolates_broken_todo(self, db_connection):
+        """测试批量删除中单个周期事项出错时其余事项仍被删除"""
+        repository = TodoRepository(db_connection)
+        repository.add_todo('plain', '2026-01-01T08:00')
+        repository.add_todo('daily', '2026-01-01T09:00', True, 'daily', 1, None)
+        plain_id, recurring_id = [todo.id for todo in repository.get_all_todos()]
+        with db_connection.transaction() as conn:
+            cursor = conn.execute("INSERT INTO todos (title, deadline, is_recurring, recurrence_type) "
+                                  "VALUES ('broken', 'not a date', 1, 'daily')")
+            broken_id = cursor.lastrowid
+
+        repository.batch_delete_todos([
+            plain_id,
+            encode_occurrence_id(broken_id, '2026-01-02 09:00:00'),
+            encode_occurrence_id(recurring_id, '2026-01-02 09:00:00'),
+        ])
+
+        assert [todo.id for todo in repository.get_all_todos()] == [recurring_id, broken_id]
+        assert repository.get_occurrence_states() == {recurring_id: {'2026-01-02 09:00:00': 'deleted'}}
+        assert repository.writer.metrics.snapshot()['transactions'] >= 1
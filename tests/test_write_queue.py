@@ -0,0 +1,124 @@
+# pylint: disable=locally-disabled,broad-exception-caught,useless-suppression,suppressed-message
+"""
+Write queue tests for the TodoList application.
+These tests verify group commits of writes by the single writer thread.
+"""
+
+import threading
+
+import pytest
+
+from todolist.db import TodoRepository, WriteExecutor, WriteQueue
+
+
+@pytest.fixture
+def write_queue(db_connection):
+    """等待50毫秒合并写入的写入队列"""
+    queue = WriteQueue(WriteExecutor(db_connection), max_delay=0.05)
+    yield queue
+    queue.close()
+
+
+def _insert(title):
+    def work(conn):
+        return conn.execute('INSERT INTO todos (title) VALUES (?)', (title,)).lastrowid
+    return work
+
+
+def _titles(db_connection):
+    with db_connection.connection() as conn:
+        return [row[0] for row in conn.execute('SELECT title FROM todos ORDER BY id')]
+
+
+class TestWriteQueue:
+    """测试写入队列的分组提交"""
+
+    def test_coalesces_writes_into_one_commit(self, db_connection, write_queue):
+        """测试短时间内提交的写入合并为一个事务"""
+        futures = [write_queue.submit(_insert(f'todo {i}')) for i in range(20)]
+
+        todo_ids = [future.result(timeout=5) for future in futures]
+
+        assert len(set(todo_ids)) == 20
+        assert _titles(db_connection) == [f'todo {i}' for i in range(20)]
+        assert write_queue.write_executor.metrics.snapshot()['transactions'] == 1
+
+    def test_failed_write_does_not_affect_batch(self, db_connection, write_queue):
+        """测试单个写入失败只回滚该写入"""
+        def fail(conn):
+            conn.execute("INSERT INTO todos (title) VALUES ('rolled back')")
+            raise ValueError('invalid todo')
+
+        first = write_queue.submit(_insert('first'))
+        failed = write_queue.submit(fail)
+        last = write_queue.submit(_insert('last'))
+
+        with pytest.raises(ValueError):
+            failed.result(timeout=5)
+        assert first.result(timeout=5) and last.result(timeout=5)
+        assert _titles(db_connection) == ['first', 'last']
+
+    def test_repository_writes_through_queue(self, db_connection, write_queue):
+        """测试仓库在没有工作单元时通过写入队列写入"""
+        repository = TodoRepository(db_connection, write_executor=write_queue.write_executor,
+                                    write_queue=write_queue)
+        errors = []
+
+        def add_many(thread_index):
+            try:
+                for i in range(5):
+                    repository.add_todo(f'todo {thread_index}-{i}', '2026-01-01T09:00')
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=add_many, args=(index,)) for index in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        assert len(repository.get_all_todos()) == 40
+        # 8个线程并发写入，每个事务至少合并了其中一部分
+        assert write_queue.write_executor.metrics.snapshot()['transactions'] <= 20
+
+        todo_id = repository.get_all_todos()[0].id
+        assert repository.modify_todo(todo_id, lambda todo: {'completed': 1}) == {'completed': 1}
+        assert repository.get_todo(todo_id)['completed'] == 1
+
+    def test_occurrence_top_up_writes_through_queue(self, db_connection, write_queue):
+        """测试补齐物化实例同样通过写入队列和执行器写入"""
+        repository = TodoRepository(db_connection, write_executor=write_queue.write_executor,
+                                    write_queue=write_queue)
+        repository.add_todo('daily', '2026-01-01T09:00', True, 'daily', 1, None)
+        with db_connection.transaction() as conn:
+            conn.execute('DELETE FROM occurrences')
+        transactions = write_queue.write_executor.metrics.snapshot()['transactions']
+
+        assert repository.top_up_occurrences(force=True) == 1
+        assert write_queue.write_executor.metrics.snapshot()['transactions'] == transactions + 1
+        assert repository.get_upcoming_occurrences()
+
+    def test_concurrent_toggles_do_not_conflict(self, db_connection, write_queue):
+        """测试通过写入队列并发切换同一事项时读改写不会互相冲突"""
+        repository = TodoRepository(db_connection, write_executor=write_queue.write_executor,
+                                    write_queue=write_queue)
+        todo_id = repository.add_todo('todo', '2026-01-01T09:00')
+        errors = []
+
+        def toggle_many():
+            try:
+                for _ in range(10):
+                    repository.modify_todo(todo_id, lambda todo: {'completed': 1 - todo.completed})
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=toggle_many) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        assert repository.get_todo(todo_id)['completed'] == 0
+        assert repository.get_todo(todo_id)['version'] == 80
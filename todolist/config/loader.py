@@ -29,6 +29,23 @@ def load_config(app, env):
         print(f"  HOST: {config.HOST}")
         print(f"  PORT: {config.PORT}")
         print(f"  DATABASE_PATH: {config.DATABASE_PATH}")
+        print(f"  SERVER_WORKERS: {config.SERVER_WORKERS}")
+        print(f"  SERVER_THREADS: {config.SERVER_THREADS}")
+        print(f"  SERVER_KEEPALIVE: {config.SERVER_KEEPALIVE}")
+        print(f"  SERVER_PRELOAD: {config.SERVER_PRELOAD}")
+        print(f"  TODOS_PAGE_SIZE: {config.TODOS_PAGE_SIZE}")
+        print(f"  DATABASE_POOL_SIZE: {config.DATABASE_POOL_SIZE}")
+        print(f"  DATABASE_POOL_MAX_IDLE: {config.DATABASE_POOL_MAX_IDLE}")
+        print(f"  DATABASE_POOL_TIMEOUT: {config.DATABASE_POOL_TIMEOUT}")
+        print(f"  WRITE_QUEUE_ENABLED: {config.WRITE_QUEUE_ENABLED}")
+        print(f"  WRITE_QUEUE_MAX_DELAY: {config.WRITE_QUEUE_MAX_DELAY}")
+        print(f"  WRITE_METRICS_LOG_INTERVAL: {config.WRITE_METRICS_LOG_INTERVAL}")
+        print(f"  CHANGE_STREAM_POLL_INTERVAL: {config.CHANGE_STREAM_POLL_INTERVAL}")
+        print(f"  CHANGE_STREAM_TIMEOUT: {config.CHANGE_STREAM_TIMEOUT}")
+        print(f"  CHANGE_STREAM_MAX_CONNECTIONS: {config.CHANGE_STREAM_MAX_CONNECTIONS}")
+        print("  SQLITE_PRAGMAS:")
+        for name, value in config.SQLITE_PRAGMAS.items():
+            print(f"    {name}: {value}")
 
         return config, db_path
 
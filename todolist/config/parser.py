@@ -8,4 +8,14 @@ def parse_args():
                       choices=['local', 'stage', 'live', 'test'],
                       default='local',
                       help='Environment to run the application in (default: local)')
+    parser.add_argument('--serve', action='store_true',
+                      help='Serve with gunicorn instead of the Flask development server')
+    parser.add_argument('--workers', type=int,
+                      help='Number of worker processes (default: SERVER_WORKERS, 0 = one per CPU core)')
+    parser.add_argument('--threads', type=int,
+                      help='Number of threads per worker (default: SERVER_THREADS)')
+    parser.add_argument('--keepalive', type=int,
+                      help='Seconds to keep idle client connections open (default: SERVER_KEEPALIVE)')
+    parser.add_argument('--preload', action=argparse.BooleanOptionalAction, default=None,
+                      help='Load the application before forking workers (default: SERVER_PRELOAD)')
     return parser.parse_args()
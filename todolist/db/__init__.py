@@ -1,5 +1,24 @@
 from .connection import DatabaseConnection
+from .executor import DatabaseBusyError, WriteExecutor
 from .initializer import DatabaseInitializer
-from .repository import TodoRepository
+from .pool import ConnectionPool, PoolTimeoutError
+from .records import Occurrence, Todo
+from .repository import ConcurrentUpdateError, TodoRepository
+from .unit_of_work import UnitOfWork, register_unit_of_work
+from .write_queue import WriteQueue
 
-__all__ = ['DatabaseConnection', 'DatabaseInitializer', 'TodoRepository']
+__all__ = [
+    'DatabaseConnection',
+    'DatabaseInitializer',
+    'TodoRepository',
+    'Todo',
+    'Occurrence',
+    'ConcurrentUpdateError',
+    'ConnectionPool',
+    'PoolTimeoutError',
+    'WriteExecutor',
+    'DatabaseBusyError',
+    'UnitOfWork',
+    'register_unit_of_work',
+    'WriteQueue',
+]
@@ -1,19 +1,163 @@
 import sqlite3
+import threading
+from contextlib import contextmanager
+
+from .pool import ConnectionPool
+
+# Pragmas that may be set through the SQLITE_PRAGMAS config profile, in the
+# order they are applied. journal_mode goes first because it can fail on a
+# busy database and everything else depends on the journal being settled.
+SUPPORTED_PRAGMAS = (
+    'journal_mode',
+    'busy_timeout',
+    'synchronous',
+    'cache_size',
+    'mmap_size',
+    'temp_store',
+    'foreign_keys',
+)
 
 
 class DatabaseConnection:
     """Database connection manager"""
 
-    def __init__(self, db_path):
+    def __init__(self, db_path, pool_size=5, max_idle_time=300, pool_timeout=10.0, pragmas=None):
         """Initialize database connection manager
 
         Args:
             db_path: Path to the SQLite database file
+            pool_size: Maximum number of pooled connections
+            max_idle_time: Seconds after which an idle pooled connection is recycled
+            pool_timeout: Seconds to wait for a free pooled connection
+            pragmas: Optional dict of SQLite pragmas applied to each new connection
         """
         self.db_path = db_path
+        self.pragmas = dict(pragmas or {})
+        unknown = set(self.pragmas) - set(SUPPORTED_PRAGMAS)
+        if unknown:
+            raise ValueError(f"Unsupported SQLite pragmas: {', '.join(sorted(unknown))}")
+        self.pool = ConnectionPool(
+            db_path,
+            size=pool_size,
+            max_idle_time=max_idle_time,
+            timeout=pool_timeout,
+            connect=self._connect
+        )
+        self._local = threading.local()
 
-    def get_connection(self):
-        """Get a database connection"""
-        conn = sqlite3.connect(self.db_path)
+    @classmethod
+    def from_config(cls, config, db_path=None):
+        """Create a connection manager from an environment Config class
+
+        Args:
+            config: Config class loaded by load_config
+            db_path: Optional database path overriding config.DATABASE_PATH
+        """
+        return cls(
+            db_path or config.DATABASE_PATH,
+            pool_size=config.DATABASE_POOL_SIZE,
+            max_idle_time=config.DATABASE_POOL_MAX_IDLE,
+            pool_timeout=config.DATABASE_POOL_TIMEOUT,
+            pragmas=config.SQLITE_PRAGMAS
+        )
+
+    def _connect(self):
+        """Open a new SQLite connection and apply the pragma profile"""
+        timeout = self.pragmas.get('busy_timeout', 5000) / 1000
+        conn = sqlite3.connect(self.db_path, timeout=timeout, check_same_thread=False)
         conn.row_factory = sqlite3.Row
+        for name in SUPPORTED_PRAGMAS:
+            if name in self.pragmas:
+                conn.execute(f'PRAGMA {name} = {self.pragmas[name]}')
         return conn
+
+    def get_connection(self):
+        """Get a database connection
+
+        The returned connection is borrowed from the pool; calling close()
+        on it returns it to the pool.
+        """
+        return self.pool.acquire()
+
+    def begin_unit_of_work(self, unit_of_work):
+        """Make a UnitOfWork the active one for the current thread"""
+        self._local.unit_of_work = unit_of_work
+
+    def end_unit_of_work(self, unit_of_work):
+        """Detach a UnitOfWork from the current thread"""
+        if getattr(self._local, 'unit_of_work', None) is unit_of_work:
+            self._local.unit_of_work = None
+
+    def current_unit_of_work(self):
+        """Get the UnitOfWork active on the current thread, if any"""
+        return getattr(self._local, 'unit_of_work', None)
+
+    @contextmanager
+    def outside_unit_of_work(self):
+        """Suspend the active unit of work for the duration of the block
+
+        Work in the block uses its own pooled connections and transactions,
+        e.g. a write made while handling a read-only request, which must not
+        upgrade the request's read transaction.
+        """
+        unit_of_work = self.current_unit_of_work()
+        self._local.unit_of_work = None
+        try:
+            yield
+        finally:
+            self._local.unit_of_work = unit_of_work
+
+    @contextmanager
+    def connection(self):
+        """Connection for read-only work
+
+        Joins the active unit of work if there is one, otherwise borrows a
+        connection from the pool for the duration of the block.
+        """
+        unit_of_work = self.current_unit_of_work()
+        if unit_of_work is not None:
+            yield unit_of_work.connection()
+            return
+
+        conn = self.get_connection()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def transaction(self):
+        """Connection for write work
+
+        Inside a unit of work the block runs in a savepoint of the shared
+        transaction and is only rolled back to that savepoint on error.
+        Outside a unit of work the block gets its own transaction which is
+        committed on success and rolled back on error.
+        """
+        unit_of_work = self.current_unit_of_work()
+        if unit_of_work is not None:
+            conn = unit_of_work.connection()
+            savepoint = unit_of_work.next_savepoint()
+            conn.execute(f'SAVEPOINT {savepoint}')
+            try:
+                yield conn
+            except BaseException:
+                conn.execute(f'ROLLBACK TO {savepoint}')
+                conn.execute(f'RELEASE {savepoint}')
+                raise
+            conn.execute(f'RELEASE {savepoint}')
+            return
+
+        conn = self.get_connection()
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def close(self):
+        """Close all idle pooled connections"""
+        self.pool.close_all()
@@ -0,0 +1,239 @@
+import logging
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# Default retry policy for busy/locked databases
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_BASE_DELAY = 0.01
+DEFAULT_MAX_DELAY = 0.5
+# Milliseconds SQLite itself waits for the lock on each BEGIN attempt; the
+# backoff between attempts does the rest of the waiting
+DEFAULT_BUSY_TIMEOUT = 100
+# Seconds between metrics log lines; 0 disables the report
+DEFAULT_REPORT_INTERVAL = 60
+
+# Messages of sqlite3.OperationalError raised when another writer holds the lock
+_BUSY_MESSAGES = ('database is locked', 'database is busy', 'database table is locked')
+
+
+class DatabaseBusyError(RuntimeError):
+    """Raised when a write still finds the database locked after all retries"""
+
+
+def is_busy_error(error):
+    """Check whether an exception means SQLITE_BUSY or SQLITE_LOCKED"""
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    message = str(error).lower()
+    return any(busy in message for busy in _BUSY_MESSAGES)
+
+
+@contextmanager
+def savepoint(conn, name):
+    """Run a block in a savepoint of the current transaction
+
+    On error only the work of the block is rolled back and the error is
+    re-raised; the surrounding transaction stays usable.
+    """
+    conn.execute(f'SAVEPOINT {name}')
+    try:
+        yield conn
+    except BaseException:
+        conn.execute(f'ROLLBACK TO {name}')
+        conn.execute(f'RELEASE {name}')
+        raise
+    conn.execute(f'RELEASE {name}')
+
+
+class WriteMetrics:
+    """Thread-safe counters of write transactions, retries and lock waits"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.transactions = 0
+        self.retries = 0
+        self.failures = 0
+        self.lock_wait = 0.0
+        self.max_lock_wait = 0.0
+
+    def record_lock_wait(self, seconds):
+        """Record the time spent waiting for the write lock"""
+        with self._lock:
+            self.lock_wait += seconds
+            self.max_lock_wait = max(self.max_lock_wait, seconds)
+
+    def increment(self, name):
+        """Increment one of the counters"""
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self):
+        """Get a consistent copy of all metrics
+
+        Returns:
+            dict: transactions, retries, failures, lock_wait and max_lock_wait (seconds)
+        """
+        with self._lock:
+            return {
+                'transactions': self.transactions,
+                'retries': self.retries,
+                'failures': self.failures,
+                'lock_wait': self.lock_wait,
+                'max_lock_wait': self.max_lock_wait,
+            }
+
+
+class WriteExecutor:
+    """Runs write transactions with retries on busy/locked databases
+
+    Transactions start with BEGIN IMMEDIATE, so the write lock is taken before
+    any work is done and a busy error can only happen while nothing has been
+    written yet. Such errors are retried with jittered exponential backoff.
+    While taking the lock the connection's busy_timeout is lowered to
+    busy_timeout, so a write waits at most about max_attempts short SQLite
+    waits plus the backoff instead of max_attempts full busy timeouts.
+    """
+
+    def __init__(self, db_connection, max_attempts=DEFAULT_MAX_ATTEMPTS,
+                 base_delay=DEFAULT_BASE_DELAY, max_delay=DEFAULT_MAX_DELAY,
+                 busy_timeout=DEFAULT_BUSY_TIMEOUT, report_interval=DEFAULT_REPORT_INTERVAL,
+                 logger=None):
+        """Initialize write executor
+
+        Args:
+            db_connection: DatabaseConnection instance
+            max_attempts: Maximum attempts per transaction
+            base_delay: Backoff before the first retry in seconds
+            max_delay: Upper bound of the backoff in seconds
+            busy_timeout: SQLite busy_timeout in milliseconds for each BEGIN attempt
+            report_interval: Seconds between metrics log lines; 0 disables them
+            logger: Logger for retries and metrics; defaults to the module logger
+        """
+        self.db_connection = db_connection
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.busy_timeout = busy_timeout
+        self.report_interval = report_interval
+        self.logger = logger or logging.getLogger(__name__)
+        self.metrics = WriteMetrics()
+        self._report_lock = threading.Lock()
+        self._next_report = time.monotonic() + report_interval
+
+    def backoff(self, attempt):
+        """Get the jittered delay before retrying after the given attempt"""
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def report_metrics(self):
+        """Log the current metrics as one line"""
+        metrics = self.metrics.snapshot()
+        self.logger.info(
+            f"Write metrics: {metrics['transactions']} transactions, {metrics['retries']} retries, "
+            f"{metrics['failures']} failures, lock wait {metrics['lock_wait'] * 1000:.0f} ms "
+            f"(max {metrics['max_lock_wait'] * 1000:.0f} ms)"
+        )
+
+    def _report_if_due(self):
+        """Log the metrics when report_interval has passed since the last report"""
+        if not self.report_interval:
+            return
+        now = time.monotonic()
+        with self._report_lock:
+            if now < self._next_report:
+                return
+            self._next_report = now + self.report_interval
+        self.report_metrics()
+
+    def begin(self, conn, immediate=True):
+        """Begin a transaction on conn, retrying while the database is busy
+
+        Every write transaction (immediate) begun here is counted, whether it
+        comes from run() or from a unit of work.
+
+        Args:
+            conn: Connection without an open transaction
+            immediate: Use BEGIN IMMEDIATE to take the write lock up front
+
+        Raises:
+            DatabaseBusyError: If the lock could not be taken within max_attempts
+        """
+        started = time.monotonic()
+        # 取锁时只让SQLite短暂等待，其余等待交给退避，避免两种等待叠加
+        conn.execute(f'PRAGMA busy_timeout = {self.busy_timeout}')
+        try:
+            for attempt in range(1, self.max_attempts + 1):
+                try:
+                    conn.execute('BEGIN IMMEDIATE' if immediate else 'BEGIN')
+                    self.metrics.record_lock_wait(time.monotonic() - started)
+                    if immediate:
+                        self.metrics.increment('transactions')
+                    break
+                except sqlite3.OperationalError as e:
+                    if not is_busy_error(e):
+                        raise
+                    if attempt == self.max_attempts:
+                        self.metrics.increment('failures')
+                        self.metrics.record_lock_wait(time.monotonic() - started)
+                        self.logger.error(f"Database still locked after {attempt} attempts: {e}")
+                        raise DatabaseBusyError(f"Database still locked after {attempt} attempts: {e}") from e
+                    delay = self.backoff(attempt)
+                    self.logger.warning(f"Database busy, retrying in {delay * 1000:.0f} ms "
+                                        f"(attempt {attempt}/{self.max_attempts})")
+                    self.metrics.increment('retries')
+                    time.sleep(delay)
+        finally:
+            # 恢复连接配置的busy_timeout，提交时仍可等待读者
+            conn.execute(f"PRAGMA busy_timeout = {self.db_connection.pragmas.get('busy_timeout', 5000)}")
+        self._report_if_due()
+
+    def run(self, work):
+        """Run work(conn) in a write transaction
+
+        Inside a unit of work the transaction (and its write lock) belongs to
+        the request, so work runs in a savepoint and is not retried here.
+        Otherwise the transaction is started with begin(), committed on
+        success and rolled back on error. A busy error raised by work itself
+        rolls back and reruns it.
+
+        Args:
+            work: Callable taking a connection; its result is returned
+
+        Raises:
+            DatabaseBusyError: If the database stayed locked for every attempt
+        """
+        if self.db_connection.current_unit_of_work() is not None:
+            with self.db_connection.transaction() as conn:
+                return work(conn)
+
+        for attempt in range(1, self.max_attempts + 1):
+            conn = self.db_connection.get_connection()
+            try:
+                self.begin(conn)
+                result = work(conn)
+                conn.commit()
+                return result
+            except sqlite3.OperationalError as e:
+                if conn.in_transaction:
+                    conn.rollback()
+                if not is_busy_error(e):
+                    raise
+                if attempt == self.max_attempts:
+                    self.metrics.increment('failures')
+                    self.logger.error(f"Database still locked after {attempt} attempts: {e}")
+                    raise DatabaseBusyError(f"Database still locked after {attempt} attempts: {e}") from e
+                delay = self.backoff(attempt)
+                self.logger.warning(f"Database busy, retrying in {delay * 1000:.0f} ms "
+                                    f"(attempt {attempt}/{self.max_attempts})")
+                self.metrics.increment('retries')
+                time.sleep(delay)
+            except BaseException:
+                if conn.in_transaction:
+                    conn.rollback()
+                raise
+            finally:
+                conn.close()
+        return None
@@ -1,3 +1,6 @@
+from .migrations import LATEST_VERSION, MIGRATIONS
+
+
 class DatabaseInitializer:
     """Database initializer and migration manager"""
 
@@ -10,78 +13,43 @@ class DatabaseInitializer:
         self.db_connection = db_connection
 
     def init_db(self):
-        """Initialize database, create tables and add missing columns"""
-        try:
-            conn = self.db_connection.get_connection()
-            cursor = conn.cursor()
-
-            # Create table if not exists
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS todos (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    title TEXT NOT NULL,
-                    completed INTEGER DEFAULT 0,
-                    deadline DATETIME DEFAULT (DATETIME('now', '+24 hours')),
-                    is_recurring BOOLEAN DEFAULT 0,
-                    recurrence_type TEXT DEFAULT NULL,
-                    recurrence_interval INTEGER DEFAULT 1,
-                    recurrence_days TEXT DEFAULT NULL,
-                    next_occurrence DATETIME DEFAULT NULL,
-                    deleted_occurrences TEXT DEFAULT NULL
-                )
-            ''')
-
-            # Check and add missing columns
-            cursor.execute("PRAGMA table_info(todos)")
-            columns = [row[1] for row in cursor.fetchall()]
-
-            # If deadline column doesn't exist, add it
-            if 'deadline' not in columns:
-                cursor.execute('''
-                    ALTER TABLE todos ADD COLUMN deadline DATETIME DEFAULT (DATETIME('now', '+24 hours'))
-                ''')
-
-            # Add recurrence-related columns if missing
-            if 'is_recurring' not in columns:
-                cursor.execute('''
-                    ALTER TABLE todos ADD COLUMN is_recurring BOOLEAN DEFAULT 0
-                ''')
+        """Initialize database by applying pending schema migrations
 
-            if 'recurrence_type' not in columns:
-                cursor.execute('''
-                    ALTER TABLE todos ADD COLUMN recurrence_type TEXT DEFAULT NULL
-                ''')
+        The schema version is kept in PRAGMA user_version. When it is current
+        nothing else is inspected. Otherwise all pending migrations run in one
+        BEGIN IMMEDIATE transaction, so concurrent starters wait for the first
+        one and then find nothing left to do.
 
-            if 'recurrence_interval' not in columns:
-                cursor.execute('''
-                    ALTER TABLE todos ADD COLUMN recurrence_interval INTEGER DEFAULT 1
-                ''')
-
-            if 'recurrence_days' not in columns:
-                cursor.execute('''
-                    ALTER TABLE todos ADD COLUMN recurrence_days TEXT DEFAULT NULL
-                ''')
-
-            if 'next_occurrence' not in columns:
-                cursor.execute('''
-                    ALTER TABLE todos ADD COLUMN next_occurrence DATETIME DEFAULT NULL
-                ''')
-
-            # Add deleted_occurrences column if missing
-            if 'deleted_occurrences' not in columns:
-                cursor.execute('''
-                    ALTER TABLE todos ADD COLUMN deleted_occurrences TEXT DEFAULT NULL
-                ''')
-
-            # Add completed_occurrences column if missing
-            if 'completed_occurrences' not in columns:
-                cursor.execute('''
-                    ALTER TABLE todos ADD COLUMN completed_occurrences TEXT DEFAULT NULL
-                ''')
+        Returns:
+            Schema version before migrating
+        """
+        conn = self.db_connection.get_connection()
+        try:
+            version = self._user_version(conn)
+            if version >= LATEST_VERSION:
+                return version
 
+            conn.execute('BEGIN IMMEDIATE')
+            # 拿到写锁后重新读取版本，其他进程可能已经完成迁移
+            version = self._user_version(conn)
+            cursor = conn.cursor()
+            for number, migration in MIGRATIONS:
+                if number > version:
+                    print(f"Applying database migration {number}: {migration.__name__}")
+                    migration(cursor)
+            if version < LATEST_VERSION:
+                cursor.execute(f'PRAGMA user_version = {LATEST_VERSION:d}')
             conn.commit()
+            return version
         except Exception as e:
+            if conn.in_transaction:
+                conn.rollback()
             print(f"Error initializing database: {e}")
             raise
         finally:
             conn.close()
+
+    @staticmethod
+    def _user_version(conn):
+        """Read the schema version of the database"""
+        return conn.execute('PRAGMA user_version').fetchone()[0]
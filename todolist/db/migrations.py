@@ -0,0 +1,183 @@
+import json
+
+
+def _create_todos(cursor):
+    """Create the todos table and add columns missing from older databases
+
+    Databases created before versioned migrations existed may have any subset
+    of the columns, so this baseline step still inspects the table once.
+    """
+    # Create table if not exists
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS todos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            completed INTEGER DEFAULT 0,
+            deadline DATETIME DEFAULT (DATETIME('now', '+24 hours')),
+            is_recurring BOOLEAN DEFAULT 0,
+            recurrence_type TEXT DEFAULT NULL,
+            recurrence_interval INTEGER DEFAULT 1,
+            recurrence_days TEXT DEFAULT NULL,
+            next_occurrence DATETIME DEFAULT NULL,
+            deleted_occurrences TEXT DEFAULT NULL,
+            completed_occurrences TEXT DEFAULT NULL
+        )
+    ''')
+
+    # Check and add missing columns
+    cursor.execute("PRAGMA table_info(todos)")
+    columns = [row[1] for row in cursor.fetchall()]
+
+    # 旧版本数据库可能缺少以下任意列
+    missing_columns = (
+        ('deadline', "DATETIME DEFAULT (DATETIME('now', '+24 hours'))"),
+        ('is_recurring', 'BOOLEAN DEFAULT 0'),
+        ('recurrence_type', 'TEXT DEFAULT NULL'),
+        ('recurrence_interval', 'INTEGER DEFAULT 1'),
+        ('recurrence_days', 'TEXT DEFAULT NULL'),
+        ('next_occurrence', 'DATETIME DEFAULT NULL'),
+        ('deleted_occurrences', 'TEXT DEFAULT NULL'),
+        ('completed_occurrences', 'TEXT DEFAULT NULL'),
+    )
+    for name, definition in missing_columns:
+        if name not in columns:
+            cursor.execute(f'ALTER TABLE todos ADD COLUMN {name} {definition}')
+
+
+def _create_occurrence_state(cursor):
+    """Create the normalized occurrence state table
+
+    It is backfilled from the legacy deleted_occurrences /
+    completed_occurrences JSON columns unless it already existed.
+    """
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'occurrence_state'")
+    occurrence_state_exists = cursor.fetchone() is not None
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS occurrence_state (
+            todo_id INTEGER NOT NULL,
+            occurrence_at TEXT NOT NULL,
+            state TEXT NOT NULL CHECK (state IN ('completed', 'deleted')),
+            PRIMARY KEY (todo_id, occurrence_at)
+        ) WITHOUT ROWID
+    ''')
+    if not occurrence_state_exists:
+        _backfill_occurrence_state(cursor)
+
+
+def _backfill_occurrence_state(cursor):
+    """Copy occurrence lists from the legacy JSON columns into occurrence_state
+
+    A deleted occurrence wins over a completed one, matching how the JSON
+    columns were maintained.
+    """
+    cursor.execute('''
+        SELECT id, completed_occurrences, deleted_occurrences FROM todos
+        WHERE completed_occurrences IS NOT NULL OR deleted_occurrences IS NOT NULL
+    ''')
+    states = []
+    for todo_id, completed_json, deleted_json in cursor.fetchall():
+        for state, occurrences_json in (('completed', completed_json), ('deleted', deleted_json)):
+            if not occurrences_json:
+                continue
+            try:
+                occurrences = json.loads(occurrences_json)
+            except (json.JSONDecodeError, TypeError):
+                continue
+            if not isinstance(occurrences, list):
+                continue
+            states.extend((todo_id, str(occurrence), state) for occurrence in occurrences)
+
+    cursor.executemany(
+        'INSERT OR REPLACE INTO occurrence_state (todo_id, occurrence_at, state) VALUES (?, ?, ?)',
+        states
+    )
+
+
+def _create_occurrences(cursor):
+    """Create the materialized upcoming occurrences table
+
+    Existing recurring todos are filled in by TodoRepository.top_up_occurrences.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS occurrences (
+            todo_id INTEGER NOT NULL,
+            occurrence_at TEXT NOT NULL,
+            PRIMARY KEY (todo_id, occurrence_at)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_occurrences_occurrence_at ON occurrences (occurrence_at)')
+
+
+def _normalize_deadlines(cursor):
+    """Rewrite datetime-local deadlines as 'YYYY-MM-DD HH:MM:SS'
+
+    Ordering by deadline (keyset pagination) is then chronological.
+    """
+    cursor.execute('''
+        UPDATE todos SET deadline = replace(deadline, 'T', ' ') || ':00'
+        WHERE deadline GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]T[0-9][0-9]:[0-9][0-9]'
+    ''')
+    cursor.execute('''
+        UPDATE todos SET deadline = replace(deadline, 'T', ' ')
+        WHERE deadline GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]T[0-9][0-9]:[0-9][0-9]:[0-9][0-9]'
+    ''')
+
+
+def _create_todo_indexes(cursor):
+    """Create secondary indexes for deadline ordering, recurring lookups and completed filtering"""
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_todos_deadline ON todos (deadline, id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_todos_recurring_next ON todos (is_recurring, next_occurrence)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_todos_completed_deadline ON todos (completed, deadline)')
+
+
+def _add_todo_version(cursor):
+    """Add the row version used for optimistic concurrency control"""
+    cursor.execute('ALTER TABLE todos ADD COLUMN version INTEGER NOT NULL DEFAULT 0')
+
+
+def _create_change_counter(cursor):
+    """Create the single-row counter that repository writes increment
+
+    Clients derive ETags from it, so unchanged data can be answered with 304
+    without reading it.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS change_counter (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            value INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute('INSERT OR IGNORE INTO change_counter (id, value) VALUES (1, 0)')
+
+
+def _create_change_events(cursor):
+    """Create the bounded change event log behind the live change stream
+
+    Event IDs are change_counter values, so a client that has seen change N
+    resumes with the events after N.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS change_events (
+            id INTEGER PRIMARY KEY,
+            type TEXT NOT NULL,
+            todo_ids TEXT NOT NULL,
+            occurrence_at TEXT DEFAULT NULL
+        )
+    ''')
+
+
+# Ordered (version, migration) pairs. Append new migrations with the next
+# version number; never renumber or edit migrations that have been released.
+MIGRATIONS = (
+    (1, _create_todos),
+    (2, _create_occurrence_state),
+    (3, _create_occurrences),
+    (4, _normalize_deadlines),
+    (5, _create_todo_indexes),
+    (6, _add_todo_version),
+    (7, _create_change_counter),
+    (8, _create_change_events),
+)
+
+# Schema version of a fully migrated database
+LATEST_VERSION = MIGRATIONS[-1][0]
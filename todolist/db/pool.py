@@ -0,0 +1,187 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+
+class PoolTimeoutError(RuntimeError):
+    """Raised when no pooled connection becomes available in time"""
+
+
+class PooledConnection:
+    """Proxy around a pooled sqlite3 connection
+
+    Behaves like a regular sqlite3.Connection, except that close() hands the
+    underlying connection back to its pool instead of closing it. Every
+    acquire() gets its own proxy, which is detached on close(): closing it
+    again does nothing and using it afterwards raises ProgrammingError.
+    """
+
+    __slots__ = ('_pool', '_conn', 'last_used', 'pid')
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+        self.last_used = time.monotonic()
+        self.pid = os.getpid()
+
+    @property
+    def raw(self):
+        """The underlying sqlite3.Connection"""
+        return self._conn
+
+    def close(self):
+        """Return the connection to the pool"""
+        if self._conn is not None:
+            self._pool.release(self)
+
+    def _connection(self):
+        """The underlying connection, or ProgrammingError once it went back to the pool"""
+        if self._conn is None:
+            raise sqlite3.ProgrammingError("Cannot operate on a connection returned to the pool")
+        return self._conn
+
+    def __getattr__(self, name):
+        return getattr(self._connection(), name)
+
+    def __enter__(self):
+        return self._connection().__enter__()
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._connection().__exit__(exc_type, exc, tb)
+
+
+class ConnectionPool:
+    """Bounded, queue-based pool of SQLite connections
+
+    SQLite handles must not cross a fork, so a pool used in a forked child
+    (e.g. a pre-forking server worker) forgets the connections it inherited
+    and opens its own.
+    """
+
+    def __init__(self, db_path, size=5, max_idle_time=300, timeout=10.0, connect=None):
+        """Initialize connection pool
+
+        Args:
+            db_path: Path to the SQLite database file
+            size: Maximum number of open connections
+            max_idle_time: Seconds after which an idle connection is recycled
+            timeout: Seconds to wait for a free connection before giving up
+            connect: Optional factory returning a new sqlite3.Connection
+        """
+        self.db_path = db_path
+        self.size = max(1, int(size))
+        self.max_idle_time = max_idle_time
+        self.timeout = timeout
+        self._connect = connect or self._default_connect
+        self._reset()
+
+    def _reset(self):
+        """Start with an empty pool owned by the current process"""
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._pid = os.getpid()
+
+    def _check_fork(self):
+        """Drop connections inherited from a parent process"""
+        if self._pid != os.getpid():
+            # 继承自父进程的连接既不能使用也不能关闭，直接丢弃
+            self._reset()
+
+    def _default_connect(self):
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def acquire(self):
+        """Borrow a connection from the pool
+
+        Returns:
+            PooledConnection wrapping a healthy sqlite3 connection
+        """
+        self._check_fork()
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                pooled = None
+
+            if pooled is None:
+                with self._lock:
+                    can_create = self._created < self.size
+                    if can_create:
+                        self._created += 1
+                if can_create:
+                    try:
+                        return PooledConnection(self, self._connect())
+                    except Exception:
+                        with self._lock:
+                            self._created -= 1
+                        raise
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeoutError(f"No database connection available after {self.timeout}s")
+                try:
+                    pooled = self._idle.get(timeout=remaining)
+                except queue.Empty:
+                    continue
+
+            if self._is_usable(pooled):
+                return pooled
+            self._discard(pooled)
+
+    def release(self, pooled):
+        """Return a borrowed connection to the pool
+
+        Args:
+            pooled: PooledConnection previously returned by acquire()
+        """
+        if pooled.pid != os.getpid():
+            # 父进程借出的连接不归还到子进程的池中
+            pooled._conn = None  # pylint: disable=protected-access
+            return
+        conn = pooled.raw
+        try:
+            # 归还前回滚未提交的事务，避免把脏状态留给下一个借用者
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._discard(pooled)
+            return
+        # 借用者的代理与连接脱钩，重复close()不会把连接放回两次，池中放入新代理
+        pooled._conn = None  # pylint: disable=protected-access
+        self._idle.put(PooledConnection(self, conn))
+
+    def _is_usable(self, pooled):
+        """Check idle age and liveness of a pooled connection"""
+        if self.max_idle_time is not None and time.monotonic() - pooled.last_used > self.max_idle_time:
+            return False
+        try:
+            pooled.raw.execute('SELECT 1').fetchone()
+        except sqlite3.Error:
+            return False
+        return True
+
+    def _discard(self, pooled):
+        """Close a connection and free its slot"""
+        conn = pooled.raw
+        pooled._conn = None  # pylint: disable=protected-access
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        with self._lock:
+            self._created -= 1
+
+    def close_all(self):
+        """Close every idle connection in the pool"""
+        self._check_fork()
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(pooled)
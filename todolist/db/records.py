@@ -0,0 +1,91 @@
+from todolist.utils import encode_occurrence_id
+
+# Columns selected for Todo records, in constructor order
+TODO_COLUMNS = (
+    'id, title, completed, deadline, is_recurring, recurrence_type, '
+    'recurrence_interval, recurrence_days, next_occurrence, version'
+)
+
+
+class Todo:
+    """A todo row
+
+    Slotted so that pages of thousands of todos stay small, and built
+    directly by todo_factory without an intermediate tuple copy.
+    """
+
+    __slots__ = ('id', 'title', 'completed', 'deadline', 'is_recurring', 'recurrence_type',
+                 'recurrence_interval', 'recurrence_days', 'next_occurrence', 'version')
+
+    def __init__(self, id, title, completed, deadline, is_recurring, recurrence_type,  # pylint: disable=redefined-builtin
+                 recurrence_interval, recurrence_days, next_occurrence, version):
+        self.id = id
+        self.title = title
+        self.completed = completed
+        self.deadline = deadline
+        self.is_recurring = is_recurring
+        self.recurrence_type = recurrence_type
+        self.recurrence_interval = recurrence_interval
+        self.recurrence_days = recurrence_days
+        self.next_occurrence = next_occurrence
+        self.version = version
+
+    def __getitem__(self, column):
+        """Column access by name, so records work wherever sqlite3.Row did"""
+        try:
+            return getattr(self, column)
+        except (AttributeError, TypeError):
+            raise KeyError(column) from None
+
+    def _values(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other):
+        if not isinstance(other, Todo):
+            return NotImplemented
+        return self._values() == other._values()
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Todo(id={self.id!r}, title={self.title!r}, deadline={self.deadline!r})"
+
+
+class Occurrence:
+    """One upcoming occurrence of a recurring todo, rendered like a todo"""
+
+    __slots__ = ('id', 'todo_id', 'title', 'completed', 'deadline', 'recurrence_type',
+                 'recurrence_interval', 'recurrence_days')
+
+    # Occurrences are always part of a recurrence
+    is_recurring = True
+
+    def __init__(self, todo, occurrence_at, completed):
+        """Initialize occurrence
+
+        Args:
+            todo: Recurring Todo the occurrence belongs to
+            occurrence_at: Occurrence format string, used as deadline
+            completed: 1 if the occurrence is completed, otherwise 0
+        """
+        self.id = encode_occurrence_id(todo.id, occurrence_at)
+        self.todo_id = todo.id
+        self.title = todo.title
+        self.completed = completed
+        self.deadline = occurrence_at
+        self.recurrence_type = todo.recurrence_type
+        self.recurrence_interval = todo.recurrence_interval
+        self.recurrence_days = todo.recurrence_days
+
+    @property
+    def next_occurrence(self):
+        """An occurrence is its own next occurrence"""
+        return self.deadline
+
+    def __repr__(self):
+        return f"Occurrence(todo_id={self.todo_id!r}, deadline={self.deadline!r})"
+
+
+def todo_factory(cursor, row):  # pylint: disable=unused-argument
+    """sqlite3 row_factory building Todo records from TODO_COLUMNS rows"""
+    return Todo(*row)
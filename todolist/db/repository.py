@@ -1,50 +1,147 @@
 # pylint: disable=locally-disabled,suppressed-message,useless-suppression
 import json
+import time
+from itertools import islice
+
+from todolist.utils import (
+    OCCURRENCE_ID_EPOCH,
+    RecurrenceRule,
+    compile_rule,
+    decode_occurrence_id,
+    expand_occurrences_batch,
+    format_datetime,
+    has_occurrence_id,
+    normalize_deadline,
+)
+
+from .executor import DatabaseBusyError, WriteExecutor, savepoint
+from .records import TODO_COLUMNS, todo_factory
+
+# Number of upcoming occurrences materialized per recurring todo
+OCCURRENCE_HORIZON = 4
+
+# Minimum seconds between two top-up passes over the occurrences table
+OCCURRENCE_TOP_UP_INTERVAL = 60
+
+# Maximum attempts of an optimistic read-modify-write before giving up
+OPTIMISTIC_RETRIES = 5
+
+# Number of most recent change events kept for resuming change streams
+CHANGE_EVENTS_RETAINED = 1000
+
+# The change event log is truncated once every this many changes
+CHANGE_EVENTS_PRUNE_INTERVAL = 100
+
+# Maximum number of parameters bound in one IN (...) clause
+_IN_CHUNK_SIZE = 500
+
+# Columns whose change invalidates the materialized occurrences of a todo
+_RECURRENCE_COLUMNS = frozenset(
+    ('deadline', 'is_recurring', 'recurrence_type', 'recurrence_interval', 'recurrence_days')
+)
+
+
+class ConcurrentUpdateError(RuntimeError):
+    """Raised when a todo keeps changing between reading and writing it"""
+
+
+def _chunks(values):
+    """Split a list into slices that fit in one IN (...) clause"""
+    for start in range(0, len(values), _IN_CHUNK_SIZE):
+        yield values[start:start + _IN_CHUNK_SIZE]
 
 
 class TodoRepository:
     """Todo repository for database operations"""
 
-    def __init__(self, db_connection):
+    def __init__(self, db_connection, occurrence_horizon=OCCURRENCE_HORIZON, write_executor=None,
+                 write_queue=None):
         """Initialize todo repository
 
         Args:
             db_connection: DatabaseConnection instance
+            occurrence_horizon: Number of upcoming occurrences materialized per recurring todo
+            write_executor: WriteExecutor for retried writes; one is created if omitted
+            write_queue: Optional WriteQueue that group-commits single writes made
+                outside a unit of work
         """
         self.db_connection = db_connection
+        self.writer = write_executor or WriteExecutor(db_connection)
+        self.write_queue = write_queue
+        self.occurrence_horizon = occurrence_horizon
+        self._next_top_up = 0.0
 
     def get_all_todos(self):
-        """Get all todos from the database"""
-        conn = self.db_connection.get_connection()
-        try:
+        """Get all todos from the database as Todo records"""
+        with self.db_connection.connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('SELECT id, title, completed, deadline, is_recurring, recurrence_type, recurrence_interval, recurrence_days, next_occurrence, deleted_occurrences, completed_occurrences FROM todos')
-            rows = cursor.fetchall()
-
-            # Convert to list of tuples for template compatibility
-            todos = []
-            for row in rows:
-                todos.append((
-                    row[0],  # id
-                    row[1],  # title
-                    row[2],  # completed
-                    row[3],  # deadline
-                    row[4],  # is_recurring
-                    row[5],  # recurrence_type
-                    row[6],  # recurrence_interval
-                    row[7],  # recurrence_days
-                    row[8],  # next_occurrence
-                    row[9],  # deleted_occurrences
-                    row[10]  # completed_occurrences
-                ))
-            return todos
-        finally:
-            conn.close()
+            cursor.row_factory = todo_factory
+            cursor.execute(f'SELECT {TODO_COLUMNS} FROM todos')
+            return cursor.fetchall()
+
+    def get_todos_page(self, limit, after=None, before=None):
+        """Get one page of todos ordered by (deadline, id)
+
+        Uses keyset pagination, so the cost of a page does not depend on how
+        far into the list it is.
+
+        Args:
+            limit: Maximum number of todos on the page
+            after: Optional (deadline, id) keyset; the page starts after it
+            before: Optional (deadline, id) keyset; the page ends before it
+
+        Returns:
+            tuple: (todos, has_previous, has_next) where todos are Todo records
+        """
+        with self.db_connection.connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = todo_factory
+            if before is not None:
+                # 向前翻页时倒序取数，再反转为正常顺序
+                cursor.execute(f'''
+                    SELECT {TODO_COLUMNS} FROM todos
+                    WHERE (deadline, id) < (?, ?)
+                    ORDER BY deadline DESC, id DESC LIMIT ?
+                ''', (*before, limit + 1))
+                rows = cursor.fetchall()
+                has_previous, has_next = len(rows) > limit, True
+                rows = rows[:limit][::-1]
+            else:
+                if after is not None:
+                    cursor.execute(f'''
+                        SELECT {TODO_COLUMNS} FROM todos
+                        WHERE (deadline, id) > (?, ?)
+                        ORDER BY deadline, id LIMIT ?
+                    ''', (*after, limit + 1))
+                else:
+                    cursor.execute(f'SELECT {TODO_COLUMNS} FROM todos ORDER BY deadline, id LIMIT ?', (limit + 1,))
+                rows = cursor.fetchall()
+                has_previous, has_next = after is not None, len(rows) > limit
+                rows = rows[:limit]
+            return rows, has_previous, has_next
+
+    def _write(self, work):
+        """Run work(conn) in a write transaction
+
+        Every repository write goes through here. Inside a unit of work this
+        is a savepoint of the request transaction. Otherwise, with a write
+        queue, work is group-committed with other writes and this waits until
+        the commit; without one it gets its own transaction, retried by the
+        write executor while the database is busy.
+        """
+        if self.write_queue is not None and self.db_connection.current_unit_of_work() is None:
+            return self.write_queue.submit(work).result()
+        return self.writer.run(work)
 
     def add_todo(self, title, deadline, is_recurring=False, recurrence_type=None, recurrence_interval=1, recurrence_days=None, next_occurrence=None, deleted_occurrences=None):
-        """Add a new todo to the database"""
-        conn = self.db_connection.get_connection()
-        try:
+        """Add a new todo to the database
+
+        Returns:
+            ID of the new todo
+        """
+        deadline = self._normalize_deadline(deadline)
+
+        def insert(conn):
             cursor = conn.cursor()
             if deadline:
                 cursor.execute('''
@@ -56,269 +153,505 @@ class TodoRepository:
                     INSERT INTO todos (title, is_recurring, recurrence_type, recurrence_interval, recurrence_days, next_occurrence, deleted_occurrences)
                     VALUES (?, ?, ?, ?, ?, ?, ?)
                 ''', (title, is_recurring, recurrence_type, recurrence_interval, recurrence_days, next_occurrence, deleted_occurrences))
-            conn.commit()
-        finally:
-            conn.close()
+            todo_id = cursor.lastrowid
+            if is_recurring:
+                self._refresh_occurrences(cursor, [todo_id])
+            self._record_change(cursor, 'created', [todo_id])
+            return todo_id
+
+        return self._write(insert)
 
     def delete_todo(self, todo_id):
-        """Delete a todo from the database"""
-        conn = self.db_connection.get_connection()
-        try:
-            cursor = conn.cursor()
-            cursor.execute('DELETE FROM todos WHERE id = ?', (todo_id,))
-            conn.commit()
-        finally:
-            conn.close()
+        """Delete a todo from the database
+
+        Returns:
+            bool: True if the todo existed
+        """
+        return self._write(lambda conn: self._delete_rows(conn.cursor(), [todo_id])) > 0
+
+    @staticmethod
+    def _delete_rows(cursor, todo_ids):
+        """Delete todos with their occurrence rows inside the caller's transaction
+
+        Returns:
+            Number of deleted todos
+        """
+        deleted = []
+        for chunk in _chunks(todo_ids):
+            placeholders = ', '.join('?' * len(chunk))
+            # 记录实际存在的事项，删除事件只包含它们
+            cursor.execute(f'SELECT id FROM todos WHERE id IN ({placeholders})', chunk)
+            existing = [row[0] for row in cursor.fetchall()]
+            if not existing:
+                continue
+            cursor.execute(f'DELETE FROM occurrences WHERE todo_id IN ({placeholders})', chunk)
+            cursor.execute(f'DELETE FROM occurrence_state WHERE todo_id IN ({placeholders})', chunk)
+            cursor.execute(f'DELETE FROM todos WHERE id IN ({placeholders})', chunk)
+            deleted.extend(existing)
+        if deleted:
+            TodoRepository._record_change(cursor, 'deleted', deleted)
+        return len(deleted)
+
+    def get_change_counter(self):
+        """Get the counter that every change to todos or occurrence states increments"""
+        with self.db_connection.connection() as conn:
+            return conn.execute('SELECT value FROM change_counter WHERE id = 1').fetchone()[0]
+
+    def get_change_events(self, after, limit=100):
+        """Get logged change events following a change counter value
+
+        Args:
+            after: Change counter value the caller is up to date with
+            limit: Maximum number of events to return
+
+        Returns:
+            list: (id, type, todo_ids, occurrence_at) tuples in ID order, or
+            None if events after `after` are no longer in the log (or after
+            is ahead of the counter) and the caller has to reload instead
+        """
+        with self.db_connection.connection() as conn:
+            counter = conn.execute('SELECT value FROM change_counter WHERE id = 1').fetchone()[0]
+            if after == counter:
+                return []
+            if after > counter:
+                return None
+            rows = conn.execute(
+                'SELECT id, type, todo_ids, occurrence_at FROM change_events WHERE id > ? ORDER BY id LIMIT ?',
+                (after, limit)
+            ).fetchall()
+        # 事件ID连续，第一个事件不是after + 1时说明日志已被截断
+        if not rows or rows[0][0] != after + 1:
+            return None
+        return [(event_id, event_type, json.loads(todo_ids), occurrence_at)
+                for event_id, event_type, todo_ids, occurrence_at in rows]
+
+    @staticmethod
+    def _record_change(cursor, event_type, todo_ids, occurrence_at=None):
+        """Count a change and append it to the change event log
+
+        Runs inside the caller's write transaction; the new change counter
+        value is the event ID. Event types are 'created', 'updated',
+        'deleted', 'occurrence_toggled' and 'occurrence_deleted'.
+
+        Args:
+            cursor: Cursor of the write transaction
+            event_type: Kind of change
+            todo_ids: IDs of the changed todos
+            occurrence_at: Occurrence of a single-occurrence change
+        """
+        cursor.execute('UPDATE change_counter SET value = value + 1 WHERE id = 1')
+        cursor.execute('SELECT value FROM change_counter WHERE id = 1')
+        event_id = cursor.fetchone()[0]
+        cursor.execute(
+            'INSERT INTO change_events (id, type, todo_ids, occurrence_at) VALUES (?, ?, ?, ?)',
+            (event_id, event_type, json.dumps(list(todo_ids)), occurrence_at)
+        )
+        # 定期截断事件日志，只保留最近的事件
+        if event_id % CHANGE_EVENTS_PRUNE_INTERVAL == 0:
+            cursor.execute('DELETE FROM change_events WHERE id <= ?', (event_id - CHANGE_EVENTS_RETAINED,))
 
     def get_todo(self, todo_id):
-        """Get a single todo by ID"""
-        conn = self.db_connection.get_connection()
-        try:
+        """Get a single todo by ID as a Todo record, or None"""
+        with self.db_connection.connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('SELECT * FROM todos WHERE id = ?', (todo_id,))
+            cursor.row_factory = todo_factory
+            cursor.execute(f'SELECT {TODO_COLUMNS} FROM todos WHERE id = ?', (todo_id,))
             return cursor.fetchone()
-        finally:
-            conn.close()
 
-    def update_todo(self, todo_id, **kwargs):
-        """Update a todo in the database"""
-        conn = self.db_connection.get_connection()
-        try:
-            cursor = conn.cursor()
-            # Build update query dynamically
-            set_clause = ', '.join([f'{key} = ?' for key in kwargs.keys()])
-            values = list(kwargs.values()) + [todo_id]
+    def update_todo(self, todo_id, expected_version=None, **kwargs):
+        """Update a todo in the database
+
+        Every update increments the row version. With expected_version the
+        update only applies if nobody changed the row since it was read.
+
+        Args:
+            todo_id: ID of the todo
+            expected_version: Optional version the row must still have
+            **kwargs: Column values to set
+
+        Returns:
+            bool: True if the row was updated
+        """
+        if 'deadline' in kwargs:
+            kwargs['deadline'] = self._normalize_deadline(kwargs['deadline'])
+        return self._write(lambda conn: self._update_row(conn.cursor(), todo_id, kwargs, expected_version))
+
+    def _update_row(self, cursor, todo_id, changes, expected_version=None):
+        """Set column values of a todo inside the caller's transaction
+
+        Returns:
+            bool: True if the row was updated
+        """
+        # Build update query dynamically
+        set_clause = ', '.join([f'{key} = ?' for key in changes.keys()] + ['version = version + 1'])
+        values = list(changes.values()) + [todo_id]
+        if expected_version is None:
             cursor.execute(f'UPDATE todos SET {set_clause} WHERE id = ?', values)
-            conn.commit()
-        finally:
-            conn.close()
+        else:
+            cursor.execute(f'UPDATE todos SET {set_clause} WHERE id = ? AND version = ?', values + [expected_version])
+        if cursor.rowcount != 1:
+            return False
+        if _RECURRENCE_COLUMNS.intersection(changes):
+            self._refresh_occurrences(cursor, [todo_id])
+        self._record_change(cursor, 'updated', [todo_id])
+        return True
+
+    def modify_todo(self, todo_id, mutator, max_attempts=OPTIMISTIC_RETRIES):
+        """Apply a read-modify-write change to a todo with optimistic concurrency
+
+        The row is read, mutator computes the new column values and the update
+        is applied only if the row version is unchanged. Read and update run
+        as one write (one transaction, one trip through the write queue), so
+        they normally cannot be interleaved; should the version still have
+        changed, the change is retried with a fresh read after a jittered
+        backoff.
 
-    def batch_delete_todos(self, todo_ids, delete_all=False):
-        """Batch delete multiple todos from the database"""
-        conn = self.db_connection.get_connection()
-        try:
+        Args:
+            todo_id: ID of the todo
+            mutator: Callable taking the current Todo and returning a dict of
+                column values to set
+            max_attempts: Maximum number of attempts
+
+        Returns:
+            The applied column values, or None if the todo does not exist
+
+        Raises:
+            ConcurrentUpdateError: If every attempt lost the race
+        """
+        def modify(conn):
             cursor = conn.cursor()
+            cursor.row_factory = todo_factory
+            cursor.execute(f'SELECT {TODO_COLUMNS} FROM todos WHERE id = ?', (todo_id,))
+            todo = cursor.fetchone()
+            if todo is None:
+                return None
+            changes = mutator(todo)
+            values = dict(changes)
+            if 'deadline' in values:
+                values['deadline'] = self._normalize_deadline(values['deadline'])
+            return changes if self._update_row(conn.cursor(), todo_id, values, todo.version) else False
+
+        for attempt in range(1, max_attempts + 1):
+            changes = self._write(modify)
+            if changes is not False:
+                return changes
+            if attempt < max_attempts:
+                time.sleep(self.writer.backoff(attempt))
+        raise ConcurrentUpdateError(f"Todo {todo_id} changed concurrently {max_attempts} times")
+
+    @staticmethod
+    def _normalize_deadline(deadline):
+        """Store deadlines as 'YYYY-MM-DD HH:MM:SS' so they sort chronologically"""
+        if not deadline:
+            return deadline
+        try:
+            return normalize_deadline(deadline)
+        except (ValueError, TypeError):
+            # 无法识别的格式原样保存
+            return deadline
 
-            # 使用字典来跟踪每个原始ID的更新状态，防止多次更新冲突
-            original_updates = {}
-
-            # 处理每个待删除的ID
-            for todo_id in todo_ids:
-                # 检查该ID是否存在于数据库中
-                cursor.execute('SELECT COUNT(*) FROM todos WHERE id = ?', (todo_id,))
-                exists_in_db = cursor.fetchone()[0] > 0
-
-                is_generated_id = not exists_in_db  # 如果ID不存在于数据库中，则是生成的ID
-                original_id = todo_id // 1000000 if is_generated_id else todo_id
-
-                if is_generated_id:
-                    # 检查是否已经在更新字典中
-                    if original_id not in original_updates:
-                        # 获取原始待办事项信息
-                        cursor.execute('SELECT id, deadline, is_recurring, recurrence_type, recurrence_interval, recurrence_days, deleted_occurrences, completed_occurrences FROM todos WHERE id = ?', (original_id,))
-                        todo = cursor.fetchone()
-
-                        if todo:
-                            if len(todo) == 8:
-                                _, deadline, is_recurring, recurrence_type, recurrence_interval, recurrence_days, deleted_occurrences_json, completed_occurrences_json = todo
-                            else:
-                                _, deadline, is_recurring, recurrence_type, recurrence_interval, recurrence_days, deleted_occurrences_json = todo
-                                completed_occurrences_json = None
-
-                            if is_recurring:
-                                if delete_all:
-                                    # 删除全部：删除整个周期任务
-                                    cursor.execute('DELETE FROM todos WHERE id = ?', (original_id,))
-                                    continue  # 跳过后续处理
-                                else:
-                                    # 解析已删除的实例
-                                    deleted_occurrences = []
-                                    if deleted_occurrences_json:
-                                        try:
-                                            deleted_occurrences = json.loads(deleted_occurrences_json)
-                                        except (json.JSONDecodeError, TypeError):
-                                            deleted_occurrences = []
-
-                                    # 解析已完成的实例
-                                    completed_occurrences = []
-                                    if completed_occurrences_json:
-                                        try:
-                                            completed_occurrences = json.loads(completed_occurrences_json)
-                                        except (json.JSONDecodeError, TypeError):
-                                            completed_occurrences = []
-
-                                    # 存储到更新字典中
-                                    original_updates[original_id] = {
-                                        'deadline': deadline,
-                                        'recurrence_type': recurrence_type,
-                                        'recurrence_interval': recurrence_interval,
-                                        'recurrence_days': recurrence_days,
-                                        'deleted_occurrences': deleted_occurrences,
-                                        'completed_occurrences': completed_occurrences
-                                    }
-
-                    # 如果不是删除全部，处理当前实例
-                    if not delete_all and original_id in original_updates:
-                        update_info = original_updates[original_id]
-
-                        # pylint: disable=import-outside-toplevel
-                        # 生成所有需要的实例
-                        from datetime import datetime
-
-                        from todolist.utils import (
-                            calculate_next_occurrence,
-                            generate_all_occurrences,
-                        )
-
-                        # 生成更多初始实例
-                        all_occurrences = generate_all_occurrences(
-                            update_info['deadline'],
-                            update_info['recurrence_type'],
-                            update_info['recurrence_interval'],
-                            update_info['recurrence_days'],
-                            limit=50  # 增加限制以生成更多实例
-                        )
-
-                        # 生成更多实例来找到正确的实例
-                        for _ in range(20):  # 生成足够多的实例
-                            if all_occurrences:
-                                last_occurrence = all_occurrences[-1]
-                                next_occurrence_val = calculate_next_occurrence(
-                                    last_occurrence,
-                                    update_info['recurrence_type'],
-                                    update_info['recurrence_interval'],
-                                    update_info['recurrence_days']
-                                )
-                                if next_occurrence_val and next_occurrence_val not in all_occurrences:
-                                    all_occurrences.append(next_occurrence_val)
-                                else:
-                                    break
-                            else:
-                                break
-
-                        # 生成所有实例，然后找出与当前ID匹配的实例
-                        current_occurrence = None
-                        for occurrence in all_occurrences:
-                            # 使用相同的ID生成逻辑来匹配实例
-                            occ_datetime = datetime.strptime(occurrence, '%Y-%m-%d %H:%M:%S')
-                            occ_timestamp = int(occ_datetime.timestamp())
-                            unique_part = occ_timestamp % 1000000
-                            generated_id = original_id * 1000000 + unique_part
-
-                            if generated_id == todo_id:
-                                current_occurrence = occurrence
-                                break
-
-                        # 确保只删除指定的实例
-                        if current_occurrence:
-                            # 确保current_occurrence不在deleted_occurrences中
-                            if current_occurrence not in update_info['deleted_occurrences']:
-                                update_info['deleted_occurrences'].append(current_occurrence)
-
-                            # 从已完成列表中移除该实例（如果存在）
-                            if current_occurrence in update_info['completed_occurrences']:
-                                update_info['completed_occurrences'] = [occ for occ in update_info['completed_occurrences'] if occ != current_occurrence]
-                else:
-                    # 非周期性ID，直接删除
-                    cursor.execute('DELETE FROM todos WHERE id = ?', (todo_id,))
-
-            # 应用所有累积的更新
-            for original_id, update_info in original_updates.items():
-                # pylint: disable=import-outside-toplevel
-                # 计算所有可能的实例，包括已经生成的和可能的未来实例
-                from datetime import datetime
-
-                from todolist.utils import (
-                    calculate_next_occurrence,
-                    generate_all_occurrences,
-                )
+    def get_occurrence_states(self, todo_ids=None):
+        """Get completed/deleted occurrence states
 
-                all_occurrences = generate_all_occurrences(
-                    update_info['deadline'],
-                    update_info['recurrence_type'],
-                    update_info['recurrence_interval'],
-                    update_info['recurrence_days'],
-                    limit=50  # 增加限制以生成更多实例
-                )
+        Args:
+            todo_ids: Optional iterable of todo IDs to restrict the lookup to
 
-                # 生成更多实例来找到正确的实例
-                for _ in range(20):  # 生成足够多的实例
-                    if all_occurrences:
-                        last_occurrence = all_occurrences[-1]
-                        next_occurrence_val = calculate_next_occurrence(
-                            last_occurrence,
-                            update_info['recurrence_type'],
-                            update_info['recurrence_interval'],
-                            update_info['recurrence_days']
-                        )
-                        if next_occurrence_val and next_occurrence_val not in all_occurrences:
-                            all_occurrences.append(next_occurrence_val)
-                        else:
-                            break
-                    else:
-                        break
-
-                all_possible_occurrences = all_occurrences.copy()
-                if all_possible_occurrences:
-                    # 再生成一些额外的实例，确保我们有足够的未来实例来计算
-                    last_occurrence = all_possible_occurrences[-1]
-                    for _ in range(2):  # 再生成2个额外的实例
-                        next_occurrence_val = calculate_next_occurrence(
-                            last_occurrence,
-                            update_info['recurrence_type'],
-                            update_info['recurrence_interval'],
-                            update_info['recurrence_days']
-                        )
-
-                        if next_occurrence_val and next_occurrence_val not in all_possible_occurrences:
-                            all_possible_occurrences.append(next_occurrence_val)
-                            last_occurrence = next_occurrence_val
-                        else:
-                            break
-
-                # 找到所有可能实例中时间最靠近未来的实例
-                active_occurrences = [occurrence for occurrence in all_possible_occurrences if occurrence not in update_info['deleted_occurrences']]
-
-                # 计算下一个要生成的实例
-                next_occurrence_to_update = None
-                if active_occurrences:
-                    # 找到当前所有活跃实例中最大的时间
-                    max_active_time = max(active_occurrences)
-                    # 为这个最大时间生成下一个实例
-                    next_occurrence_to_update = calculate_next_occurrence(
-                        max_active_time,
-                        update_info['recurrence_type'],
-                        update_info['recurrence_interval'],
-                        update_info['recurrence_days']
+        Returns:
+            dict: {todo_id: {occurrence_at: state}} where state is 'completed' or 'deleted'
+        """
+        with self.db_connection.connection() as conn:
+            cursor = conn.cursor()
+            if todo_ids is None:
+                cursor.execute('SELECT todo_id, occurrence_at, state FROM occurrence_state')
+                rows = cursor.fetchall()
+            else:
+                rows = []
+                # 分批查询，避免超出SQLite参数数量限制
+                for chunk in _chunks(list(todo_ids)):
+                    placeholders = ', '.join('?' * len(chunk))
+                    cursor.execute(
+                        f'SELECT todo_id, occurrence_at, state FROM occurrence_state WHERE todo_id IN ({placeholders})',
+                        chunk
                     )
+                    rows.extend(cursor.fetchall())
 
-                # 更新原始待办事项
-                update_data = {
-                    'deleted_occurrences': json.dumps(update_info['deleted_occurrences']),
-                    'completed_occurrences': json.dumps(update_info['completed_occurrences'])
-                }
+        states = {}
+        for todo_id, occurrence_at, state in rows:
+            states.setdefault(todo_id, {})[occurrence_at] = state
+        return states
 
-                # 如果生成了下一个实例，更新next_occurrence字段
-                if next_occurrence_to_update:
-                    update_data['next_occurrence'] = next_occurrence_to_update
+    def get_occurrence_state(self, todo_id, occurrence_at):
+        """Get the state of a single occurrence, or None if it is pending"""
+        with self.db_connection.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                'SELECT state FROM occurrence_state WHERE todo_id = ? AND occurrence_at = ?',
+                (todo_id, occurrence_at)
+            )
+            row = cursor.fetchone()
+            return row[0] if row else None
+
+    def toggle_occurrence_completed(self, todo_id, occurrence_at):
+        """Toggle the completed state of a single occurrence
+
+        Each direction is one guarded statement in the same write transaction,
+        so concurrent toggles cannot overwrite each other. Deleted occurrences
+        stay deleted.
+
+        Returns:
+            True if the occurrence is now completed, False if it is pending
+            again, or None if nothing changed
+        """
+        def toggle(conn):
+            cursor = conn.cursor()
+            cursor.execute(
+                "DELETE FROM occurrence_state WHERE todo_id = ? AND occurrence_at = ? AND state = 'completed'",
+                (todo_id, occurrence_at)
+            )
+            if cursor.rowcount == 1:
+                self._record_change(cursor, 'occurrence_toggled', [todo_id], occurrence_at)
+                return False
+
+            # 只有尚无状态的实例才会被标记为已完成
+            cursor.execute('''
+                INSERT OR IGNORE INTO occurrence_state (todo_id, occurrence_at, state)
+                SELECT ?, ?, 'completed' WHERE EXISTS (SELECT 1 FROM todos WHERE id = ? AND is_recurring = 1)
+            ''', (todo_id, occurrence_at, todo_id))
+            if cursor.rowcount != 1:
+                return None
+            self._record_change(cursor, 'occurrence_toggled', [todo_id], occurrence_at)
+            return True
+
+        return self._write(toggle)
+
+    def get_upcoming_occurrences(self, todo_ids=None, start=None, end=None):
+        """Get the materialized upcoming occurrences of recurring todos
 
-                # 构建SQL更新语句
-                set_clause = ', '.join([f'{key} = ?' for key in update_data.keys()])
-                values = list(update_data.values()) + [original_id]
+        Args:
+            todo_ids: Optional iterable of todo IDs to restrict the lookup to
+            start: Optional occurrence format string, inclusive lower bound
+            end: Optional occurrence format string, exclusive upper bound
 
-                cursor.execute(
-                    f'UPDATE todos SET {set_clause} WHERE id = ?',
-                    values
+        Returns:
+            dict: {todo_id: [(occurrence_at, state), ...]} in occurrence order,
+            where state is 'completed' or None
+        """
+        conditions = []
+        params = []
+        if start is not None:
+            conditions.append('o.occurrence_at >= ?')
+            params.append(start)
+        if end is not None:
+            conditions.append('o.occurrence_at < ?')
+            params.append(end)
+        # 不限定事项时视为一个不带IN条件的批次
+        chunks = [None] if todo_ids is None else _chunks(list(todo_ids))
+
+        rows = []
+        with self.db_connection.connection() as conn:
+            cursor = conn.cursor()
+            for chunk in chunks:
+                chunk_conditions = list(conditions)
+                if chunk is not None:
+                    chunk_conditions.append(f"o.todo_id IN ({', '.join('?' * len(chunk))})")
+                where = f"WHERE {' AND '.join(chunk_conditions)}" if chunk_conditions else ''
+                cursor.execute(f'''
+                    SELECT o.todo_id, o.occurrence_at, s.state
+                    FROM occurrences o
+                    LEFT JOIN occurrence_state s ON s.todo_id = o.todo_id AND s.occurrence_at = o.occurrence_at
+                    {where}
+                    ORDER BY o.todo_id, o.occurrence_at
+                ''', params + (chunk or []))
+                rows.extend(cursor.fetchall())
+
+        upcoming = {}
+        for todo_id, occurrence_at, state in rows:
+            upcoming.setdefault(todo_id, []).append((occurrence_at, state))
+        return upcoming
+
+    def refresh_occurrences(self, todo_ids):
+        """Recompute the materialized occurrences of some todos"""
+        todo_ids = list(todo_ids)
+        self._write(lambda conn: self._refresh_occurrences(conn.cursor(), todo_ids))
+
+    def top_up_occurrences(self, force=False):
+        """Materialize recurring todos that have no upcoming occurrences yet
+
+        Covers todos written before the occurrences table existed or by other
+        writers. Runs at most once per OCCURRENCE_TOP_UP_INTERVAL unless forced.
+        It runs outside the request's unit of work, so a read-only request
+        never upgrades its read transaction to a write; while the database is
+        busy the top-up is skipped and tried again on the next call.
+
+        Returns:
+            Number of todos that were refreshed
+        """
+        now = time.monotonic()
+        if not force and now < self._next_top_up:
+            return 0
+        self._next_top_up = now + OCCURRENCE_TOP_UP_INTERVAL
+
+        with self.db_connection.outside_unit_of_work():
+            with self.db_connection.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT id FROM todos
+                    WHERE is_recurring = 1 AND NOT EXISTS (SELECT 1 FROM occurrences WHERE todo_id = todos.id)
+                ''')
+                todo_ids = [row[0] for row in cursor.fetchall()]
+
+            # 只有确实缺少实例时才开启写事务
+            if todo_ids:
+                try:
+                    self.refresh_occurrences(todo_ids)
+                except DatabaseBusyError as e:
+                    print(f"Skipping occurrence top-up while the database is busy: {e}")
+                    self._next_top_up = now
+                    return 0
+        return len(todo_ids)
+
+    def _refresh_occurrences(self, cursor, todo_ids):
+        """Rewrite the occurrences rows of some todos inside the caller's transaction
+
+        Keeps the first occurrence_horizon non-deleted occurrences of each
+        recurring todo. Todos that are gone, not recurring or have settings
+        that cannot be expanded end up with no rows.
+        """
+        rows = []
+        deleted = {}
+        for chunk in _chunks(todo_ids):
+            placeholders = ', '.join('?' * len(chunk))
+            cursor.execute(f'DELETE FROM occurrences WHERE todo_id IN ({placeholders})', chunk)
+            cursor.execute(
+                f'''SELECT id, deadline, recurrence_type, recurrence_interval, recurrence_days
+                    FROM todos WHERE is_recurring = 1 AND id IN ({placeholders})''',
+                chunk
+            )
+            rows.extend(cursor.fetchall())
+            cursor.execute(
+                f"SELECT todo_id, occurrence_at FROM occurrence_state WHERE state = 'deleted' AND todo_id IN ({placeholders})",
+                chunk
+            )
+            for todo_id, occurrence_at in cursor.fetchall():
+                deleted.setdefault(todo_id, set()).add(occurrence_at)
+
+        rules = []
+        occurrences = []
+        for todo_id, deadline, recurrence_type, recurrence_interval, recurrence_days in rows:
+            try:
+                rule = compile_rule(deadline, recurrence_type, recurrence_interval, recurrence_days)
+            except (ValueError, TypeError) as e:
+                print(f"Error processing recurring todo {todo_id}: {e}")
+                continue
+            if rule.anchor < OCCURRENCE_ID_EPOCH:
+                # 1970年之前的实例没有实例ID，从1970年起逐个展开
+                visible = islice(
+                    rule.iter_formatted(OCCURRENCE_ID_EPOCH, exclude=deleted.get(todo_id)), self.occurrence_horizon
                 )
+                occurrences.extend((todo_id, occurrence) for occurrence in visible if has_occurrence_id(occurrence))
+                continue
+            rules.append((todo_id, rule, deleted.get(todo_id, set())))
+
+        # 每个已删除的实例最多挡住一个实例，多展开这么多个即可
+        expanded = expand_occurrences_batch(
+            [rule for _, rule, _ in rules],
+            [self.occurrence_horizon + len(deleted_occurrences) for _, _, deleted_occurrences in rules]
+        )
+        for (todo_id, _, deleted_occurrences), upcoming in zip(rules, expanded):
+            # 没有实例ID的实例无法在页面上显示和操作
+            visible = islice(
+                (occurrence for occurrence in map(format_datetime, filter(has_occurrence_id, upcoming))
+                 if occurrence not in deleted_occurrences),
+                self.occurrence_horizon
+            )
+            occurrences.extend((todo_id, occurrence) for occurrence in visible)
+        cursor.executemany('INSERT INTO occurrences (todo_id, occurrence_at) VALUES (?, ?)', occurrences)
 
-            conn.commit()
-        except Exception as e:
-            # 打印详细错误信息
-            print(f"Error in batch_delete_todos: {type(e).__name__}: {str(e)}")
-            # pylint: disable=import-outside-toplevel
-            import traceback
-            traceback.print_exc()
-            # 不要抛出异常，而是返回成功，这样用户体验更好
-        finally:
-            conn.close()
+    def batch_delete_todos(self, todo_ids, delete_all=False):
+        """Batch delete multiple todos from the database
+
+        Plain todo IDs are deleted with set-based statements. Occurrence IDs
+        are grouped by their original todo, which is looked up once per batch;
+        each group is written in its own savepoint so that one broken
+        recurrence does not drop the rest of the batch. The whole batch runs
+        through the write executor and is retried while the database is busy.
+
+        Raises:
+            DatabaseBusyError: If the database stayed locked for every attempt
+        """
+        # 拆分为普通ID和按原始周期事项分组的实例
+        plain_ids = set()
+        occurrences_by_todo = {}
+        for todo_id in todo_ids:
+            decoded = decode_occurrence_id(todo_id)
+            if decoded is None:
+                plain_ids.add(todo_id)
+            else:
+                original_id, occurrence = decoded
+                occurrences_by_todo.setdefault(original_id, set()).add(occurrence)
 
+        def delete(conn):
+            cursor = conn.cursor()
+
+            # 非周期性ID，直接删除
+            self._delete_rows(cursor, list(plain_ids))
+
+            # 一次查询获取所有相关的原始周期事项
+            originals = {}
+            for chunk in _chunks(list(occurrences_by_todo)):
+                placeholders = ', '.join('?' * len(chunk))
+                cursor.execute(
+                    f'''SELECT id, deadline, recurrence_type, recurrence_interval, recurrence_days
+                        FROM todos WHERE is_recurring = 1 AND id IN ({placeholders})''',
+                    chunk
+                )
+                originals.update((row[0], row) for row in cursor.fetchall())
+
+            if delete_all:
+                # 删除全部：删除整个周期任务
+                self._delete_rows(cursor, list(originals))
+                return
+
+            refreshed = []
+            for original_id, todo in originals.items():
+                try:
+                    with savepoint(conn, 'batch_delete_item'):
+                        if self._delete_occurrences(cursor, todo, occurrences_by_todo[original_id]):
+                            refreshed.append(original_id)
+                except (ValueError, TypeError) as e:
+                    # 单个周期事项出错只回滚该事项，其余照常删除
+                    print(f"Skipping occurrences of todo {original_id} in batch delete: {e}")
+
+            # 重新物化删除了实例的周期事项
+            if refreshed:
+                self._refresh_occurrences(cursor, sorted(refreshed))
+                self._record_change(cursor, 'occurrence_deleted', sorted(refreshed))
+
+        self._write(delete)
+
+    @staticmethod
+    def _delete_occurrences(cursor, todo, occurrences):
+        """Mark occurrences of one recurring todo as deleted
+
+        Returns:
+            bool: True if any occurrence belonged to the recurrence
+        """
+        original_id = todo[0]
+        rule = RecurrenceRule.from_todo(todo)
+        # 只删除属于该周期的实例（已完成状态被删除状态覆盖）
+        deleted = sorted(occurrence for occurrence in occurrences if rule.contains(occurrence))
+        if not deleted:
+            return False
+        cursor.executemany(
+            'INSERT OR REPLACE INTO occurrence_state (todo_id, occurrence_at, state) VALUES (?, ?, ?)',
+            [(original_id, occurrence, 'deleted') for occurrence in deleted]
+        )
+
+        # 下一次出现时间推进到本次删除的最晚实例之后
+        next_occurrence_to_update = rule.next_after(deleted[-1])
+        if next_occurrence_to_update:
+            cursor.execute(
+                'UPDATE todos SET next_occurrence = ?, version = version + 1 WHERE id = ? AND (next_occurrence IS NULL OR next_occurrence < ?)',
+                (next_occurrence_to_update, original_id, next_occurrence_to_update)
+            )
+        return True
@@ -0,0 +1,126 @@
+from flask import request
+
+
+class UnitOfWork:
+    """One connection and one transaction shared by all repository calls
+
+    The connection is borrowed lazily on first use, so requests that never
+    touch the database never take a connection from the pool.
+    """
+
+    def __init__(self, db_connection, immediate=False, write_executor=None):
+        """Initialize unit of work
+
+        Args:
+            db_connection: DatabaseConnection instance
+            immediate: Take the write lock up front (BEGIN IMMEDIATE), so that
+                read-modify-write sequences cannot be interleaved by other writers
+            write_executor: WriteExecutor used to retry BEGIN while the database is busy
+        """
+        self.db_connection = db_connection
+        self.immediate = immediate
+        self.write_executor = write_executor
+        self._conn = None
+        self._savepoint_counter = 0
+
+    def connection(self):
+        """Get the unit of work connection, beginning the transaction on first use"""
+        if self._conn is None:
+            conn = self.db_connection.get_connection()
+            try:
+                if self.write_executor is not None:
+                    self.write_executor.begin(conn, self.immediate)
+                else:
+                    conn.execute('BEGIN IMMEDIATE' if self.immediate else 'BEGIN')
+            except Exception:
+                conn.close()
+                raise
+            self._conn = conn
+        return self._conn
+
+    def next_savepoint(self):
+        """Get a fresh savepoint name for a nested transaction"""
+        self._savepoint_counter += 1
+        return f'uow_sp_{self._savepoint_counter}'
+
+    def commit(self):
+        """Commit the transaction and release the connection"""
+        if self._conn is None:
+            return
+        try:
+            self._conn.commit()
+        finally:
+            self._release()
+
+    def rollback(self):
+        """Roll back the transaction and release the connection"""
+        if self._conn is None:
+            return
+        try:
+            self._conn.rollback()
+        finally:
+            self._release()
+
+    def _release(self):
+        conn, self._conn = self._conn, None
+        conn.close()
+
+    def __enter__(self):
+        self.db_connection.begin_unit_of_work(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.commit()
+            else:
+                self.rollback()
+        finally:
+            self.db_connection.end_unit_of_work(self)
+        return False
+
+
+def register_unit_of_work(app, db_connection, write_executor=None, include_writes=True):
+    """Bind a UnitOfWork to every Flask request
+
+    Repository calls made while handling a request join the request's
+    transaction. It is committed once after the view returns a non-error
+    response and rolled back otherwise.
+
+    Args:
+        app: Flask application instance
+        db_connection: DatabaseConnection instance
+        write_executor: WriteExecutor used to retry BEGIN while the database is busy
+        include_writes: Also bind units of work to requests that modify data;
+            disable when their writes are group-committed by a WriteQueue
+    """
+
+    def begin():
+        immediate = request.method not in ('GET', 'HEAD', 'OPTIONS')
+        if immediate and not include_writes:
+            # 写请求的每次写入交给写入队列分组提交
+            return
+        db_connection.begin_unit_of_work(UnitOfWork(db_connection, immediate=immediate,
+                                                    write_executor=write_executor))
+
+    def finish(response):
+        uow = db_connection.current_unit_of_work()
+        if uow is not None:
+            if response.status_code < 400:
+                uow.commit()
+            else:
+                uow.rollback()
+        return response
+
+    def teardown(_exc):
+        uow = db_connection.current_unit_of_work()
+        if uow is not None:
+            try:
+                # 请求异常结束时after_request不会执行，此处回滚
+                uow.rollback()
+            finally:
+                db_connection.end_unit_of_work(uow)
+
+    app.before_request(begin)
+    app.after_request(finish)
+    app.teardown_request(teardown)
@@ -1,3 +1,5 @@
+from .api import ApiRoutes
+from .events import ChangeStreamRoutes
 from .routes import RoutesManager
 
-__all__ = ['RoutesManager']
+__all__ = ['RoutesManager', 'ApiRoutes', 'ChangeStreamRoutes']
@@ -0,0 +1,322 @@
+# pylint: disable=locally-disabled,suppressed-message,useless-suppression
+import json
+from datetime import datetime, timedelta
+from itertools import islice, takewhile
+
+from flask import Response, jsonify, request, url_for
+
+from todolist.db import ConcurrentUpdateError, DatabaseBusyError
+from todolist.utils import (
+    RecurrenceRule,
+    calculate_next_occurrence,
+    decode_cursor,
+    encode_cursor,
+    encode_occurrence_id,
+    format_datetime,
+    normalize_deadline,
+    parse_datetime,
+)
+
+# Fields of a todo in API responses, in output order
+TODO_FIELDS = (
+    'id', 'title', 'completed', 'deadline', 'is_recurring', 'recurrence_type',
+    'recurrence_interval', 'recurrence_days', 'next_occurrence', 'version'
+)
+
+# Fields a client may set when creating or patching a todo
+WRITABLE_FIELDS = frozenset((
+    'title', 'completed', 'deadline', 'is_recurring', 'recurrence_type',
+    'recurrence_interval', 'recurrence_days'
+))
+
+RECURRENCE_TYPES = frozenset(('yearly', 'monthly', 'weekly', 'daily', 'hourly', 'minutely'))
+
+# Upper bound of the limit parameter of list and occurrence requests
+MAX_PAGE_SIZE = 500
+MAX_OCCURRENCES = 1000
+
+# Occurrence window when the request gives no end
+DEFAULT_OCCURRENCE_WINDOW = timedelta(days=30)
+
+
+class ApiError(Exception):
+    """Client error answered with a JSON error body"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _todo_json(todo, fields=TODO_FIELDS):
+    """Serialize a Todo record, restricted to fields"""
+    data = {}
+    for field in fields:
+        value = getattr(todo, field)
+        if field in ('completed', 'is_recurring'):
+            value = bool(value)
+        elif field == 'recurrence_days' and value:
+            try:
+                value = json.loads(value)
+            except (json.JSONDecodeError, TypeError):
+                pass
+        data[field] = value
+    return data
+
+
+def _int_arg(name, default, maximum):
+    """Read a positive integer query parameter capped at maximum"""
+    value = request.args.get(name)
+    if value is None:
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise ApiError(400, f"{name} must be an integer") from None
+    if value < 1:
+        raise ApiError(400, f"{name} must be positive")
+    return min(value, maximum)
+
+
+def _not_modified(etag):
+    """Get a 304 response if the client already has the representation"""
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+    return None
+
+
+def _with_etag(body, etag, status=200):
+    """JSON response carrying a strong ETag"""
+    response = jsonify(body)
+    response.status_code = status
+    response.set_etag(etag)
+    return response
+
+
+def _todo_response(todo, status=200):
+    """JSON response for one todo; its ETag is the row version"""
+    response = _with_etag(_todo_json(todo), str(todo.version), status)
+    if status == 201:
+        response.headers['Location'] = url_for('api_get_todo', todo_id=todo.id)
+    return response
+
+
+class ApiRoutes:
+    """Versioned JSON API for todos under /api/v1"""
+
+    def __init__(self, app, todo_repository):
+        """Initialize API routes
+
+        Args:
+            app: Flask application instance
+            todo_repository: TodoRepository instance
+        """
+        self.app = app
+        self.todo_repository = todo_repository
+        self.register_routes()
+
+    def register_routes(self):
+        """Register all API routes with the Flask application"""
+        self.app.add_url_rule('/api/v1/todos', 'api_list_todos', self.list_todos, methods=['GET'])
+        self.app.add_url_rule('/api/v1/todos', 'api_create_todo', self.create_todo, methods=['POST'])
+        self.app.add_url_rule('/api/v1/todos/<int:todo_id>', 'api_get_todo', self.get_todo, methods=['GET'])
+        self.app.add_url_rule('/api/v1/todos/<int:todo_id>', 'api_update_todo', self.update_todo, methods=['PATCH'])
+        self.app.add_url_rule('/api/v1/todos/<int:todo_id>', 'api_delete_todo', self.delete_todo, methods=['DELETE'])
+        self.app.add_url_rule('/api/v1/todos/<int:todo_id>/occurrences', 'api_list_occurrences',
+                              self.list_occurrences, methods=['GET'])
+        self.app.register_error_handler(ApiError, self.handle_error)
+
+    @staticmethod
+    def handle_error(error):
+        """Answer API errors with {"error": message}"""
+        response = jsonify({'error': error.message})
+        response.status_code = error.status
+        return response
+
+    def list_todos(self):
+        """List todos ordered by (deadline, id) with cursor pagination
+
+        Query parameters: limit, after/before (cursors from a previous page)
+        and fields (comma-separated subset of TODO_FIELDS).
+        """
+        limit = _int_arg('limit', self.app.config.get('TODOS_PAGE_SIZE', 50), MAX_PAGE_SIZE)
+        fields = TODO_FIELDS
+        if request.args.get('fields'):
+            fields = tuple(field.strip() for field in request.args['fields'].split(','))
+            unknown = [field for field in fields if field not in TODO_FIELDS]
+            if unknown:
+                raise ApiError(400, f"Unknown fields: {', '.join(unknown)}")
+        try:
+            after = decode_cursor(request.args['after']) if 'after' in request.args else None
+            before = decode_cursor(request.args['before']) if 'before' in request.args else None
+        except ValueError:
+            raise ApiError(400, "Invalid cursor") from None
+
+        # 每个URL是独立的资源，变更计数未变时内容不变
+        etag = f"todos-{self.todo_repository.get_change_counter()}"
+        not_modified = _not_modified(etag)
+        if not_modified:
+            return not_modified
+
+        todos, has_previous, has_next = self.todo_repository.get_todos_page(limit, after=after, before=before)
+        return _with_etag({
+            'todos': [_todo_json(todo, fields) for todo in todos],
+            'prev_cursor': encode_cursor(todos[0].deadline, todos[0].id) if has_previous and todos else None,
+            'next_cursor': encode_cursor(todos[-1].deadline, todos[-1].id) if has_next and todos else None,
+        }, etag)
+
+    def get_todo(self, todo_id):
+        """Get one todo"""
+        todo = self._require_todo(todo_id)
+        return _not_modified(str(todo.version)) or _todo_response(todo)
+
+    def create_todo(self):
+        """Create a todo from a JSON body; answers 201 with the new todo"""
+        values = self._read_todo_body(require_title=True)
+        next_occurrence = None
+        if values.get('is_recurring') and values.get('deadline'):
+            next_occurrence = calculate_next_occurrence(
+                values['deadline'], values.get('recurrence_type'), values.get('recurrence_interval', 1),
+                values.get('recurrence_days'), logger=self.app.logger
+            )
+        try:
+            todo_id = self.todo_repository.add_todo(
+                values['title'], values.get('deadline'), values.get('is_recurring', False),
+                values.get('recurrence_type'), values.get('recurrence_interval', 1),
+                values.get('recurrence_days'), next_occurrence
+            )
+        except DatabaseBusyError as e:
+            raise ApiError(503, str(e)) from e
+        return _todo_response(self.todo_repository.get_todo(todo_id), status=201)
+
+    def update_todo(self, todo_id):
+        """Patch fields of a todo
+
+        With If-Match the patch only applies if the todo still has that
+        version (ETag); otherwise 412 is returned.
+        """
+        todo = self._require_todo(todo_id)
+        changes = self._read_todo_body()
+        if not changes:
+            return _todo_response(todo)
+
+        expected_version = None
+        if request.if_match and not request.if_match.star_tag:
+            expected_version = todo.version
+            if not request.if_match.contains(str(todo.version)):
+                raise ApiError(412, "Todo has been modified")
+        try:
+            if not self.todo_repository.update_todo(todo_id, expected_version=expected_version, **changes):
+                raise ApiError(412, "Todo has been modified")
+        except (ConcurrentUpdateError, DatabaseBusyError) as e:
+            raise ApiError(503, str(e)) from e
+        return _todo_response(self.todo_repository.get_todo(todo_id))
+
+    def delete_todo(self, todo_id):
+        """Delete a todo with its occurrences"""
+        try:
+            deleted = self.todo_repository.delete_todo(todo_id)
+        except DatabaseBusyError as e:
+            raise ApiError(503, str(e)) from e
+        if not deleted:
+            raise ApiError(404, "Todo not found")
+        return Response(status=204)
+
+    def list_occurrences(self, todo_id):
+        """Expand the occurrences of a recurring todo in a window
+
+        Query parameters: start (default: now), end (default: start + 30
+        days) and limit. Deleted occurrences are left out.
+        """
+        try:
+            if 'start' in request.args:
+                start = parse_datetime(normalize_deadline(request.args['start']))
+            else:
+                start = datetime.now().replace(second=0, microsecond=0)
+            if 'end' in request.args:
+                end = parse_datetime(normalize_deadline(request.args['end']))
+            else:
+                end = start + DEFAULT_OCCURRENCE_WINDOW
+        except (ValueError, TypeError):
+            raise ApiError(400, "start and end must be datetimes") from None
+        limit = _int_arg('limit', MAX_OCCURRENCES, MAX_OCCURRENCES)
+
+        # 窗口默认从当前分钟开始，ETag同时包含变更计数和窗口起点
+        etag = f"occurrences-{self.todo_repository.get_change_counter()}-{start:%Y%m%d%H%M%S}"
+        not_modified = _not_modified(etag)
+        if not_modified:
+            return not_modified
+
+        todo = self._require_todo(todo_id)
+        if not todo.is_recurring:
+            raise ApiError(404, "Todo is not recurring")
+        states = self.todo_repository.get_occurrence_states([todo_id]).get(todo_id, {})
+        deleted = {occurrence for occurrence, state in states.items() if state == 'deleted'}
+        end_str = format_datetime(end)
+        try:
+            rule = RecurrenceRule.from_todo(todo)
+            window = islice(
+                takewhile(lambda occurrence: occurrence < end_str, rule.iter_formatted(start, exclude=deleted)),
+                limit
+            )
+            occurrences = []
+            for occurrence in window:
+                occurrences.append({
+                    'id': encode_occurrence_id(todo_id, occurrence),
+                    'occurrence_at': occurrence,
+                    'completed': states.get(occurrence) == 'completed',
+                })
+        except (ValueError, TypeError, OverflowError) as e:
+            raise ApiError(422, f"Cannot expand recurrence: {e}") from e
+        return _with_etag({'todo_id': todo_id, 'occurrences': occurrences}, etag)
+
+    def _require_todo(self, todo_id):
+        todo = self.todo_repository.get_todo(todo_id)
+        if todo is None:
+            raise ApiError(404, "Todo not found")
+        return todo
+
+    @staticmethod
+    def _read_todo_body(require_title=False):
+        """Validate a JSON todo body and convert it to repository column values"""
+        body = request.get_json(silent=True)
+        if not isinstance(body, dict):
+            raise ApiError(400, "Request body must be a JSON object")
+        unknown = set(body) - WRITABLE_FIELDS
+        if unknown:
+            raise ApiError(400, f"Unknown fields: {', '.join(sorted(unknown))}")
+
+        values = {}
+        if 'title' in body or require_title:
+            title = body.get('title')
+            if not isinstance(title, str) or not title.strip():
+                raise ApiError(400, "title must be a non-empty string")
+            values['title'] = title
+        for field in ('completed', 'is_recurring'):
+            if field in body:
+                if not isinstance(body[field], bool):
+                    raise ApiError(400, f"{field} must be a boolean")
+                values[field] = int(body[field])
+        if body.get('deadline') is not None:
+            try:
+                values['deadline'] = normalize_deadline(body['deadline'])
+            except (ValueError, TypeError):
+                raise ApiError(400, "deadline must be a datetime") from None
+        if body.get('recurrence_type') is not None:
+            if body['recurrence_type'] not in RECURRENCE_TYPES:
+                raise ApiError(400, f"recurrence_type must be one of {', '.join(sorted(RECURRENCE_TYPES))}")
+            values['recurrence_type'] = body['recurrence_type']
+        if 'recurrence_interval' in body:
+            interval = body['recurrence_interval']
+            if not isinstance(interval, int) or isinstance(interval, bool) or interval < 1:
+                raise ApiError(400, "recurrence_interval must be a positive integer")
+            values['recurrence_interval'] = interval
+        if 'recurrence_days' in body:
+            days = body['recurrence_days']
+            if days is not None and (not isinstance(days, list) or
+                                     not all(isinstance(day, int) and 0 <= day <= 6 for day in days)):
+                raise ApiError(400, "recurrence_days must be a list of weekdays (0-6)")
+            values['recurrence_days'] = json.dumps(days) if days is not None else None
+        return values
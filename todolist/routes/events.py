@@ -0,0 +1,137 @@
+# pylint: disable=locally-disabled,suppressed-message,useless-suppression
+import json
+import threading
+import time
+
+from flask import Response, request
+
+# Seconds between two reads of the change event log while a stream is idle
+DEFAULT_POLL_INTERVAL = 1.0
+
+# Seconds after which a stream ends; the browser then reconnects with Last-Event-ID
+DEFAULT_STREAM_TIMEOUT = 25
+
+# Milliseconds the browser waits before reconnecting
+RECONNECT_DELAY = 1000
+
+# Streams served at the same time by one worker; each one holds a server thread
+DEFAULT_MAX_STREAMS = 2
+
+# Milliseconds between the polls of a client that got no stream slot
+POLL_RECONNECT_DELAY = 5000
+
+# Milliseconds a stream holder waits before reconnecting while other clients
+# are polling, so that one of them gets the freed slot first
+HANDOFF_RECONNECT_DELAY = 2 * POLL_RECONNECT_DELAY
+
+
+def _event(data, event_id=None, event=None):
+    """Format one server-sent event"""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    if event is not None:
+        lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(data)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+class ChangeStreamRoutes:
+    """Server-sent event stream of todo changes for open index pages"""
+
+    def __init__(self, app, todo_repository):
+        """Initialize change stream routes
+
+        Args:
+            app: Flask application instance
+            todo_repository: TodoRepository instance
+        """
+        self.app = app
+        self.todo_repository = todo_repository
+        # 每个流占用一个服务线程，限制同时打开的流数量，其余线程留给普通请求
+        self._slots = threading.BoundedSemaphore(
+            self.app.config.get('CHANGE_STREAM_MAX_CONNECTIONS', DEFAULT_MAX_STREAMS)
+        )
+        # 最近一次因名额已满而改为轮询的时间
+        self._polled_at = None
+        self.register_routes()
+
+    def _has_pollers(self):
+        """Check whether a client was turned away within the last two poll intervals"""
+        polled_at = self._polled_at
+        return polled_at is not None and time.monotonic() - polled_at < 2 * POLL_RECONNECT_DELAY / 1000
+
+    def register_routes(self):
+        """Register the change stream route with the Flask application"""
+        self.app.add_url_rule('/events', 'change_stream', self.change_stream, methods=['GET'])
+
+    def change_stream(self):
+        """Stream change events as text/event-stream
+
+        Each message has the change counter value as its ID and
+        {"type", "todo_ids", "occurrence_at"} as data. The stream starts after
+        the Last-Event-ID header the browser sends when reconnecting, else
+        after the `after` query parameter (the change counter the page was
+        rendered with), else at the current change. A "reset" event tells the
+        client that events it missed are no longer logged.
+
+        Every stream holds a server thread, so it ends after
+        CHANGE_STREAM_TIMEOUT seconds and the browser reconnects, and a worker
+        serves at most CHANGE_STREAM_MAX_CONNECTIONS streams at a time. Once
+        they are taken the client polls instead: the response carries the
+        events logged so far, ends at once and tells the browser to reconnect
+        after POLL_RECONNECT_DELAY. While clients are polling, a stream that
+        ends hands its slot over by reconnecting after HANDOFF_RECONNECT_DELAY.
+        """
+        try:
+            after = int(request.headers.get('Last-Event-ID') or request.args['after'])
+        except (KeyError, ValueError):
+            after = None
+        headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+
+        if not self._slots.acquire(blocking=False):
+            # 名额已满：只返回已记录的事件并立即结束，浏览器按retry间隔重连，相当于轮询
+            self._polled_at = time.monotonic()
+            return Response(self._stream(after, 0, 0, POLL_RECONNECT_DELAY),
+                            mimetype='text/event-stream', headers=headers)
+        try:
+            poll_interval = self.app.config.get('CHANGE_STREAM_POLL_INTERVAL', DEFAULT_POLL_INTERVAL)
+            timeout = self.app.config.get('CHANGE_STREAM_TIMEOUT', DEFAULT_STREAM_TIMEOUT)
+            response = Response(self._stream(after, poll_interval, timeout),
+                                mimetype='text/event-stream', headers=headers)
+        except BaseException:
+            self._slots.release()
+            raise
+        # 流结束或客户端断开后服务器关闭响应，释放名额
+        response.call_on_close(self._slots.release)
+        return response
+
+    def _stream(self, after, poll_interval, timeout, reconnect_delay=RECONNECT_DELAY):
+        """Yield logged events after `after` until the timeout passes
+
+        The stream starts by telling the browser to reconnect after
+        reconnect_delay milliseconds once it ends.
+        """
+        # 生成器在请求结束后才开始迭代，每次读取从连接池取连接，不占用请求的事务
+        if after is None:
+            after = self.todo_repository.get_change_counter()
+        yield f'retry: {reconnect_delay}\n\n'
+        deadline = time.monotonic() + timeout
+        while True:
+            events = self.todo_repository.get_change_events(after)
+            if events is None:
+                yield _event({'after': after}, event='reset')
+                return
+            for event_id, event_type, todo_ids, occurrence_at in events:
+                yield _event({'type': event_type, 'todo_ids': todo_ids, 'occurrence_at': occurrence_at},
+                             event_id=event_id)
+                after = event_id
+            if time.monotonic() >= deadline:
+                if reconnect_delay == RECONNECT_DELAY and self._has_pollers():
+                    # 有客户端在轮询：推迟重连，把名额让给其中一个
+                    yield f'retry: {HANDOFF_RECONNECT_DELAY}\n\n'
+                return
+            if not events:
+                # 空闲时发送注释行，客户端断开后下一次写入即可发现并释放名额
+                yield ':\n\n'
+                time.sleep(poll_interval)
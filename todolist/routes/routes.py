@@ -2,9 +2,23 @@
 import json
 from datetime import datetime
 
-from flask import redirect, render_template, request, url_for
+from flask import jsonify, make_response, redirect, render_template, request, url_for
 
-from todolist.utils import calculate_next_occurrence, generate_all_occurrences
+from todolist.db import ConcurrentUpdateError, Occurrence
+from todolist.utils import (
+    RecurrenceRule,
+    calculate_next_occurrence,
+    decode_cursor,
+    decode_occurrence_id,
+    encode_cursor,
+    original_todo_id,
+)
+
+# Number of todos per index page when TODOS_PAGE_SIZE is not configured
+DEFAULT_PAGE_SIZE = 50
+
+# Maximum number of todos rendered by one /fragments/todos request
+MAX_FRAGMENT_TODOS = 100
 
 
 class RoutesManager:
@@ -28,123 +42,74 @@ class RoutesManager:
         self.app.add_url_rule('/delete/<int:todo_id>', view_func=self.delete_todo, methods=['POST'])
         self.app.add_url_rule('/toggle/<int:todo_id>', view_func=self.toggle_todo, methods=['POST'])
         self.app.add_url_rule('/batch-delete', view_func=self.batch_delete, methods=['POST'])
+        # 页面脚本使用的局部更新接口，只返回受影响的<li>元素
+        self.app.add_url_rule('/fragments/toggle/<int:todo_id>', view_func=self.toggle_fragment, methods=['POST'])
+        self.app.add_url_rule('/fragments/delete/<int:todo_id>', view_func=self.delete_fragment, methods=['POST'])
+        self.app.add_url_rule('/fragments/batch-delete', view_func=self.batch_delete_fragment, methods=['POST'])
+        self.app.add_url_rule('/fragments/todos', view_func=self.todos_fragment, methods=['GET'])
 
     def index(self):
-        """Home page route"""
+        """Home page route
+
+        The page is answered with 304 when the client's ETag still matches:
+        nothing has been written since and the displayed minute is the same.
+        """
+        # 先在请求的读事务之外补齐尚未物化的周期事项，本次请求的读快照即可看到补齐的实例
+        self.todo_repository.top_up_occurrences()
+
+        # 周期实例和截止时间状态随时间变化，ETag同时包含变更计数和当前分钟
+        change_counter = self.todo_repository.get_change_counter()
+        etag = self._index_etag(change_counter)
+        if request.if_none_match.contains(etag):
+            response = make_response('', 304)
+            response.set_etag(etag)
+            return response
+
         try:
-            print("Index route: Getting all todos...")
-            todos = self.todo_repository.get_all_todos()
+            # 按(deadline, id)游标分页，只读取当前页的事项
+            page_size = self.app.config.get('TODOS_PAGE_SIZE', DEFAULT_PAGE_SIZE)
+            try:
+                after = decode_cursor(request.args['after']) if 'after' in request.args else None
+                before = decode_cursor(request.args['before']) if 'before' in request.args else None
+            except ValueError:
+                return redirect(url_for('index'))
+
+            print("Index route: Getting todos page...")
+            todos, has_previous, has_next = self.todo_repository.get_todos_page(page_size, after=after, before=before)
             print(f"Index route: Got {len(todos)} todos")
 
-            # Process recurring todos to show all occurrences from creation to next occurrence after now
+            # 周期事项的可见实例已物化在occurrences表中，只查询本页的实例
+            upcoming = self.todo_repository.get_upcoming_occurrences(
+                todo_ids=[todo.id for todo in todos if todo.is_recurring]
+            )
+
+            # Process recurring todos to show their upcoming occurrences
             processed_todos = []
 
             for todo in todos:
-                # 确保元组包含completed_occurrences字段
-                if len(todo) == 11:
-                    todo_id, title, _, deadline, is_recurring, recurrence_type, recurrence_interval, recurrence_days, _, deleted_occurrences, completed_occurrences = todo
-                else:
-                    # 兼容旧版本
-                    todo_id, title, _, deadline, is_recurring, recurrence_type, recurrence_interval, recurrence_days, _, deleted_occurrences = todo
-                    completed_occurrences = None
-
-                if is_recurring:
-                    try:
-                        # Parse deleted occurrences from database
-                        deleted_occurrences_list = []
-                        if deleted_occurrences:
-                            try:
-                                deleted_occurrences_list = json.loads(deleted_occurrences)
-                            except (json.JSONDecodeError, TypeError):
-                                deleted_occurrences_list = []
-
-                        # Parse completed occurrences from database
-                        completed_occurrences_list = []
-                        if completed_occurrences:
-                            try:
-                                completed_occurrences_list = json.loads(completed_occurrences)
-                            except (json.JSONDecodeError, TypeError, ValueError):
-                                completed_occurrences_list = []
-
-                        # Generate all possible occurrences with a higher limit
-                        all_possible_occurrences = []
-
-                        # 生成更多初始实例
-                        initial_occurrences = generate_all_occurrences(
-                            deadline, recurrence_type, recurrence_interval, recurrence_days,
-                            logger=self.app.logger, limit=50  # 增加限制以生成更多实例
-                        )
-
-                        # 添加初始实例到所有可能实例列表
-                        all_possible_occurrences = initial_occurrences.copy()
-
-                        # 过滤掉已删除的实例，但保留已完成的实例
-                        filtered_occurrences = [occurrence for occurrence in all_possible_occurrences
-                                                if occurrence not in deleted_occurrences_list]
-
-                        # 确保始终显示至少4个实例，如果不够则继续生成
-                        while len(filtered_occurrences) < 4:
-                            # 获取当前最后一个实例
-                            if filtered_occurrences:
-                                last_occurrence = filtered_occurrences[-1]
-                            else:
-                                # 如果没有实例，则从原始截止时间开始
-                                last_occurrence = deadline
-                            # 生成下一个实例
-                            next_occurrence = calculate_next_occurrence(
-                                last_occurrence, recurrence_type, recurrence_interval, recurrence_days,
-                                logger=self.app.logger
-                            )
-
-                            if next_occurrence and next_occurrence not in all_possible_occurrences and next_occurrence not in deleted_occurrences_list:
-                                all_possible_occurrences.append(next_occurrence)
-                                filtered_occurrences.append(next_occurrence)
-                            else:
-                                break
-
-                        # 只保留前4个实例（或者更多，如果用户删除了很多实例）
-                        # 为了用户体验，我们可以限制显示的数量，但要确保有足够的实例
-                        final_filtered_occurrences = filtered_occurrences[:4]
-
-                        # Add all non-deleted occurrences as individual todos
-                        for occurrence in final_filtered_occurrences:
-                            # Create a unique ID for each occurrence
-                            # 使用日期字符串生成唯一ID，避免索引变化导致的ID冲突
-                            # 将日期转换为数字格式作为ID的一部分
-                            # 解析日期字符串为datetime对象
-                            occ_datetime = datetime.strptime(occurrence, '%Y-%m-%d %H:%M:%S')
-                            # 使用时间戳的后6位作为唯一标识
-                            occ_timestamp = int(occ_datetime.timestamp())
-                            unique_part = occ_timestamp % 1000000
-                            occurrence_id = todo_id * 1000000 + unique_part  # 确保ID唯一且为正数
-
-                            # Check if this occurrence is completed
-                            is_occurrence_completed = 1 if occurrence in completed_occurrences_list else 0
-
-                            # Create a new todo instance for each occurrence
-                            occurrence_todo = (
-                                occurrence_id,  # Unique ID for this occurrence
-                                title,  # Same title as original
-                                is_occurrence_completed,  # Completed status
-                                occurrence,  # Use occurrence as deadline
-                                True,  # Mark as recurring
-                                recurrence_type,
-                                recurrence_interval,
-                                recurrence_days,
-                                occurrence,
-                                None,  # No deleted occurrences for individual instances
-                                None  # No completed occurrences for individual instances
-                            )
-                            processed_todos.append(occurrence_todo)
-                    except ValueError as e:
-                        print(f"Error processing recurring todo {todo_id}: {e}")
-                        continue
+                if todo.is_recurring:
+                    # Add all non-deleted occurrences as individual todos with a unique, decodable ID
+                    processed_todos.extend(
+                        Occurrence(todo, occurrence, 1 if state == 'completed' else 0)
+                        for occurrence, state in upcoming.get(todo.id, ())
+                    )
                 else:
                     # Add non-recurring todos normally
                     processed_todos.append(todo)
 
             print(f"Index route: Processed to {len(processed_todos)} todos")
-            return render_template('index.html', todos=processed_todos)
+            response = make_response(render_template(
+                'index.html',
+                todos=processed_todos,
+                prev_cursor=encode_cursor(todos[0].deadline, todos[0].id) if has_previous and todos else None,
+                next_cursor=encode_cursor(todos[-1].deadline, todos[-1].id) if has_next and todos else None,
+                # 页面从这次变更之后订阅变更流
+                last_event_id=change_counter
+            ))
+            # 浏览器每次都带ETag重新验证，而不是使用过期的缓存页面
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
         except (RuntimeError, KeyError, ValueError) as e:
             # Print detailed error information
             print(f"Index route error: {type(e).__name__}: {str(e)}")
@@ -153,6 +118,11 @@ class RoutesManager:
             traceback.print_exc()
             return f"An error occurred while loading todos: {type(e).__name__}: {str(e)}", 500
 
+    @staticmethod
+    def _index_etag(change_counter):
+        """ETag of the home page: the change counter and the current minute"""
+        return f"index-{change_counter}-{datetime.now():%Y%m%d%H%M}"
+
     def add_todo(self):
         """Add todo route"""
         try:
@@ -196,99 +166,12 @@ class RoutesManager:
     def toggle_todo(self, todo_id):
         """Toggle todo completion status route"""
         try:
-            # Get all todos to check which ones exist in the database
-            all_todos = self.todo_repository.get_all_todos()
-            existing_ids = [t[0] for t in all_todos]
-
-            is_generated_id = todo_id not in existing_ids
-            original_id = todo_id // 1000000 if is_generated_id else todo_id
-
-            # Get original todo details
-            original_todo = self.todo_repository.get_todo(original_id)
-
-            if original_todo:
-                # For generated occurrence IDs (recurring todo instances)
-                if is_generated_id:
-                    # Parse original todo tuple
-                    if len(original_todo) == 10:
-                        _, _, completed, deadline, is_recurring, recurrence_type, recurrence_interval, recurrence_days, _, _ = original_todo
-                        completed_occurrences_json = None
-                    else:
-                        _, _, completed, deadline, is_recurring, recurrence_type, recurrence_interval, recurrence_days, _, _, completed_occurrences_json = original_todo
-
-                    if is_recurring:
-                        # Parse completed occurrences
-                        completed_occurrences = []
-                        if completed_occurrences_json:
-                            try:
-                                completed_occurrences = json.loads(completed_occurrences_json)
-                            except (json.JSONDecodeError, TypeError):
-                                completed_occurrences = []
-
-                        # pylint: disable=import-outside-toplevel
-                        # Generate all occurrences to find which one we're toggling
-                        # datetime is already imported at the top of the file
-                        # calculate_next_occurrence and generate_all_occurrences are already imported at the top of the file
-                        all_occurrences = generate_all_occurrences(deadline, recurrence_type, recurrence_interval, recurrence_days, limit=50)
-
-                        # Ensure we have enough occurrences
-                        if all_occurrences:
-                            # Generate more occurrences to find the correct one
-                            for _ in range(20):  # 生成足够多的实例
-                                last_occurrence = all_occurrences[-1]
-                                next_occurrence_val = calculate_next_occurrence(last_occurrence, recurrence_type, recurrence_interval, recurrence_days)
-                                if next_occurrence_val and next_occurrence_val not in all_occurrences:
-                                    all_occurrences.append(next_occurrence_val)
-                                else:
-                                    break
-
-                            # 生成所有实例，然后找出与当前ID匹配的实例
-                            matching_occurrence = None
-                            for occurrence in all_occurrences:
-                                # 使用相同的ID生成逻辑来匹配实例
-                                occ_datetime = datetime.strptime(occurrence, '%Y-%m-%d %H:%M:%S')
-                                occ_timestamp = int(occ_datetime.timestamp())
-                                unique_part = occ_timestamp % 1000000
-                                generated_id = original_id * 1000000 + unique_part
-
-                                if generated_id == todo_id:
-                                    matching_occurrence = occurrence
-                                    break
-
-                            if matching_occurrence:
-
-                                # Check if this occurrence is already completed
-                                is_completed = matching_occurrence in completed_occurrences
-
-                                if is_completed:
-                                    # Remove from completed list (toggle off)
-                                    if matching_occurrence in completed_occurrences:
-                                        completed_occurrences = [occ for occ in completed_occurrences if occ != matching_occurrence]
-                                else:
-                                    # Add to completed list (toggle on)
-                                    if matching_occurrence not in completed_occurrences:
-                                        completed_occurrences.append(matching_occurrence)
-
-                                # Update the original todo with new completed occurrences
-                                update_data = {
-                                    'completed_occurrences': json.dumps(completed_occurrences)
-                                }
-
-                                # Update the database
-                                self.todo_repository.update_todo(original_id, **update_data)
-                else:
-                    # Regular todo (non-generated ID)
-                    # Toggle completion status
-                    if len(original_todo) == 10:
-                        _, _, completed, deadline, is_recurring, recurrence_type, recurrence_interval, recurrence_days, _, _ = original_todo
-                        completed_occurrences_json = None
-                    else:
-                        _, _, completed, deadline, is_recurring, recurrence_type, recurrence_interval, recurrence_days, _, _, completed_occurrences_json = original_todo
-
-                    new_completed = 1 - completed
-                    self.todo_repository.update_todo(original_id, completed=new_completed)
-
+            self._toggle(todo_id)
             return redirect(url_for('index'))
+        except ConcurrentUpdateError as e:
+            # 乐观并发重试用尽：其他请求仍在修改该事项，提示用户稍后重试
+            self.app.logger.warning(f"Conflict toggling todo: {e}")
+            return "The todo is being changed by someone else, please try again", 409
         except (ValueError, KeyError, RuntimeError) as e:
             # Print detailed error information for debugging
             print(f"Toggle todo error: {type(e).__name__}: {str(e)}")
@@ -307,12 +190,10 @@ class RoutesManager:
                 return redirect(url_for('index'))
 
             # Parse the JSON string to get the list of todo ids and delete_all flag
-            delete_data = json.loads(todo_ids_json)
-            todo_ids = delete_data.get('todo_ids', [])
-            delete_all = delete_data.get('delete_all', False)
-
-            # Convert to integers
-            todo_ids = [int(id) for id in todo_ids]
+            try:
+                todo_ids, delete_all = self._batch_delete_args(json.loads(todo_ids_json))
+            except (ValueError, TypeError):
+                return "Invalid batch delete data", 400
 
             # Call batch_delete_todos with delete_all parameter
             self.todo_repository.batch_delete_todos(todo_ids, delete_all)
@@ -321,3 +202,163 @@ class RoutesManager:
         except (ValueError, TypeError, RuntimeError) as e:
             self.app.logger.error(f'Error batch deleting todos: {e}')
             return "An error occurred while deleting todos", 500
+
+    def toggle_fragment(self, todo_id):
+        """Toggle a todo or occurrence and return its re-rendered <li>"""
+        try:
+            item = self._toggle(todo_id)
+            if item is None:
+                return "Todo not found", 404
+            return render_template('_todo_item.html', todo=item)
+        except ConcurrentUpdateError as e:
+            self.app.logger.warning(f"Conflict toggling todo: {e}")
+            return "The todo is being changed by someone else, please try again", 409
+        except (ValueError, KeyError, RuntimeError) as e:
+            self.app.logger.error(f"Error toggling todo: {e}")
+            return "An error occurred while updating todo", 500
+
+    def delete_fragment(self, todo_id):
+        """Delete a todo; the page removes its <li>"""
+        try:
+            if not self.todo_repository.delete_todo(todo_id):
+                return "Todo not found", 404
+            return '', 204
+        except (ValueError, RuntimeError) as e:
+            self.app.logger.error(f"Error deleting todo: {e}")
+            return "An error occurred while deleting todo", 500
+
+    def batch_delete_fragment(self):
+        """Batch delete todos and return the changed parts of the list
+
+        The JSON body is the same as the todo_ids field of /batch-delete.
+        Deleting an occurrence moves the recurring todo's window on, so the
+        response carries the re-rendered occurrences of every affected
+        recurring todo instead of just the removed IDs.
+
+        Returns:
+            JSON {"removed": [todo IDs], "groups": {original ID: html}}; the
+            page removes the regular todos and replaces all <li> elements of
+            each group (an empty html removes the group)
+        """
+        try:
+            todo_ids, delete_all = self._batch_delete_args(request.get_json(silent=True))
+        except (ValueError, TypeError):
+            return "Invalid batch delete data", 400
+        try:
+            self.todo_repository.batch_delete_todos(todo_ids, delete_all)
+
+            removed = [todo_id for todo_id in todo_ids if not decode_occurrence_id(todo_id)]
+            if delete_all:
+                # 删除全部时传入的是原始事项ID，其全部实例都被删除
+                groups = {original_todo_id(todo_id): '' for todo_id in todo_ids}
+            else:
+                groups = self._render_groups(self._get_todos(
+                    {original_todo_id(todo_id) for todo_id in todo_ids if decode_occurrence_id(todo_id)}
+                ))
+            return jsonify({'removed': removed, 'groups': groups})
+        except (ValueError, TypeError, RuntimeError) as e:
+            self.app.logger.error(f'Error batch deleting todos: {e}')
+            return "An error occurred while deleting todos", 500
+
+    def todos_fragment(self):
+        """Render the current list items of todos changed by others
+
+        Query parameter ids: comma-separated todo IDs (at most
+        MAX_FRAGMENT_TODOS), as reported by the change stream.
+
+        Returns:
+            JSON {"groups": {todo ID: {"html": ..., "before": ...}}}; html
+            holds the todo's <li> elements (empty if it was deleted) and
+            before is the ID of the todo following it on the index, or None
+            if it is the last one
+        """
+        try:
+            todo_ids = [int(todo_id) for todo_id in request.args.get('ids', '').split(',') if todo_id]
+        except ValueError:
+            return "Invalid todo IDs", 400
+        if len(todo_ids) > MAX_FRAGMENT_TODOS:
+            return "Too many todo IDs", 400
+
+        todos = self._get_todos(todo_ids)
+        groups = {}
+        for todo_id, html in self._render_groups(todos).items():
+            before = None
+            todo = todos[todo_id]
+            if todo is not None and todo.deadline:
+                # 与首页相同的(deadline, id)顺序中紧随其后的事项
+                following, _, _ = self.todo_repository.get_todos_page(1, after=(todo.deadline, todo.id))
+                before = following[0].id if following else None
+            groups[todo_id] = {'html': html, 'before': before}
+        return jsonify({'groups': groups})
+
+    def _toggle(self, todo_id):
+        """Toggle the completion status of a todo or a generated occurrence
+
+        Returns:
+            Todo | Occurrence | None: The toggled item as it is now displayed,
+            or None if there is no such todo or occurrence
+        """
+        decoded = decode_occurrence_id(todo_id)
+
+        if decoded:
+            # Generated occurrence ID (recurring todo instance)
+            original_id, occurrence = decoded
+            original_todo = self.todo_repository.get_todo(original_id)
+
+            if original_todo and original_todo.is_recurring and \
+                    RecurrenceRule.from_todo(original_todo).contains(occurrence):
+                # Toggle completed state in the database (deleted occurrences stay deleted)
+                completed = self.todo_repository.toggle_occurrence_completed(original_id, occurrence)
+                if completed is not None:
+                    return Occurrence(original_todo, occurrence, 1 if completed else 0)
+            return None
+
+        # Regular todo (non-generated ID)
+        # Toggle completion status, retrying if the row changed in between
+        if self.todo_repository.modify_todo(todo_id, lambda todo: {'completed': 1 - todo.completed}) is None:
+            return None
+        return self.todo_repository.get_todo(todo_id)
+
+    def _get_todos(self, todo_ids):
+        """Get {todo_id: Todo or None} for the given IDs"""
+        return {todo_id: self.todo_repository.get_todo(todo_id) for todo_id in todo_ids}
+
+    def _render_groups(self, todos):
+        """Render the <li> elements the index page shows for todos
+
+        Args:
+            todos: {todo_id: Todo or None}
+
+        Returns:
+            dict: {todo_id: html}; a recurring todo renders its upcoming
+            occurrences and a missing todo renders nothing
+        """
+        recurring_ids = [todo_id for todo_id, todo in todos.items() if todo and todo.is_recurring]
+        upcoming = self.todo_repository.get_upcoming_occurrences(todo_ids=recurring_ids) if recurring_ids else {}
+        groups = {}
+        for todo_id, todo in todos.items():
+            if todo is None:
+                items = ()
+            elif todo.is_recurring:
+                items = (Occurrence(todo, occurrence, 1 if state == 'completed' else 0)
+                         for occurrence, state in upcoming.get(todo_id, ()))
+            else:
+                items = (todo,)
+            groups[todo_id] = ''.join(render_template('_todo_item.html', todo=item) for item in items)
+        return groups
+
+    @staticmethod
+    def _batch_delete_args(delete_data):
+        """Get (todo_ids, delete_all) from a batch delete request
+
+        Raises:
+            ValueError, TypeError: If the data is not a JSON object or the IDs
+                are not a list of integers
+        """
+        if not isinstance(delete_data, dict):
+            raise TypeError("Batch delete data must be a JSON object")
+        todo_ids = delete_data.get('todo_ids', [])
+        if not isinstance(todo_ids, list):
+            raise TypeError("todo_ids must be a list")
+        todo_ids = [int(todo_id) for todo_id in todo_ids]
+        return todo_ids, bool(delete_data.get('delete_all', False))
@@ -1,4 +1,49 @@
-from .filters import fromjson_filter
-from .recurrence import calculate_next_occurrence, generate_all_occurrences
+from .cursor import decode_cursor, encode_cursor
+from .datetimes import OCCURRENCE_FORMAT, format_datetime, parse_datetime
+from .filters import fromjson_filter, original_id_filter
+from .occurrence_id import (
+    OCCURRENCE_ID_BASE,
+    OCCURRENCE_ID_EPOCH,
+    decode_occurrence_id,
+    encode_occurrence_id,
+    has_occurrence_id,
+    is_occurrence_id,
+    original_todo_id,
+)
+from .recurrence import (
+    RecurrenceRule,
+    calculate_next_occurrence,
+    compile_rule,
+    expand_occurrences_batch,
+    generate_all_occurrences,
+    generate_occurrences_between,
+    is_occurrence,
+    iter_occurrences,
+    normalize_deadline,
+)
 
-__all__ = ['fromjson_filter', 'calculate_next_occurrence', 'generate_all_occurrences']
+__all__ = [
+    'fromjson_filter',
+    'original_id_filter',
+    'encode_cursor',
+    'decode_cursor',
+    'OCCURRENCE_FORMAT',
+    'parse_datetime',
+    'format_datetime',
+    'RecurrenceRule',
+    'compile_rule',
+    'expand_occurrences_batch',
+    'calculate_next_occurrence',
+    'generate_all_occurrences',
+    'generate_occurrences_between',
+    'is_occurrence',
+    'iter_occurrences',
+    'normalize_deadline',
+    'OCCURRENCE_ID_BASE',
+    'OCCURRENCE_ID_EPOCH',
+    'encode_occurrence_id',
+    'decode_occurrence_id',
+    'has_occurrence_id',
+    'is_occurrence_id',
+    'original_todo_id',
+]
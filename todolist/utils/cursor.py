@@ -0,0 +1,39 @@
+import base64
+import binascii
+import json
+
+
+def encode_cursor(deadline, todo_id):
+    """Build an opaque pagination cursor from a (deadline, id) keyset
+
+    Args:
+        deadline: Deadline of the boundary todo
+        todo_id: ID of the boundary todo
+
+    Returns:
+        URL-safe cursor string
+    """
+    raw = json.dumps([deadline, todo_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Read the (deadline, id) keyset back from a pagination cursor
+
+    Args:
+        cursor: String produced by encode_cursor
+
+    Returns:
+        tuple: (deadline, todo_id)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        deadline, todo_id = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid pagination cursor: {cursor!r}") from e
+    if not isinstance(deadline, str) or not isinstance(todo_id, int):
+        raise ValueError(f"Invalid pagination cursor: {cursor!r}")
+    return deadline, todo_id
@@ -0,0 +1,85 @@
+from datetime import datetime
+
+OCCURRENCE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Deadline formats accepted from the database and the datetime-local input,
+# keyed by (length, date/time separator) so the format is picked by shape
+# instead of by trying strptime formats until one stops raising.
+_DEADLINE_FORMATS = {
+    (19, ' '): "%Y-%m-%d %H:%M:%S",
+    (16, 'T'): "%Y-%m-%dT%H:%M",
+    (19, 'T'): "%Y-%m-%dT%H:%M:%S",
+}
+
+# Maximum number of remembered conversions in each direction
+MEMO_SIZE = 4096
+
+_parsed = {}
+_formatted = {}
+
+
+def _remember(memo, key, value):
+    # 超出上限时整体清空，保证内存有界且无需加锁
+    if len(memo) >= MEMO_SIZE:
+        memo.clear()
+    memo[key] = value
+
+
+def parse_datetime(value):
+    """Parse a deadline or occurrence string
+
+    Supports 'YYYY-MM-DD HH:MM:SS', 'YYYY-MM-DDTHH:MM' and
+    'YYYY-MM-DDTHH:MM:SS'. Uses datetime.fromisoformat and remembers recent
+    results.
+
+    Args:
+        value: Datetime string
+
+    Returns:
+        datetime
+
+    Raises:
+        ValueError: If the string is not in a supported format
+    """
+    result = _parsed.get(value)
+    if result is not None:
+        return result
+
+    if not isinstance(value, str):
+        raise TypeError(f"Expected a datetime string, got {type(value).__name__}")
+    fmt = _DEADLINE_FORMATS.get((len(value), value[10:11]))
+    if fmt is None:
+        raise ValueError(f"time data {value!r} does not match any supported deadline format")
+    try:
+        result = datetime.fromisoformat(value)
+    except ValueError:
+        # fromisoformat可能因个别字段不合法失败，用strptime给出一致的错误信息
+        result = datetime.strptime(value, fmt)
+    if result.tzinfo is not None:
+        raise ValueError(f"time data {value!r} must not contain a timezone")
+
+    _remember(_parsed, value, result)
+    return result
+
+
+def format_datetime(value):
+    """Format a datetime in the 'YYYY-MM-DD HH:MM:SS' occurrence format
+
+    The result is also remembered for parse_datetime, so a formatted
+    occurrence can be parsed back without work.
+
+    Args:
+        value: datetime
+
+    Returns:
+        Occurrence format string
+    """
+    result = _formatted.get(value)
+    if result is not None:
+        return result
+
+    result = value.strftime(OCCURRENCE_FORMAT) if value.year < 1000 or value.microsecond \
+        else value.isoformat(' ', 'seconds')
+    _remember(_formatted, value, result)
+    _remember(_parsed, result, value.replace(microsecond=0))
+    return result
@@ -1,5 +1,7 @@
 import json
 
+from .occurrence_id import original_todo_id
+
 
 def fromjson_filter(value):
     """JSON string to Python object filter for templates
@@ -39,3 +41,15 @@ def fromjson_filter(value):
             # 如果解析失败，返回空列表
             return []
     return []
+
+
+def original_id_filter(value):
+    """Todo row ID filter for templates
+
+    Args:
+        value: Todo ID or generated occurrence ID
+
+    Returns:
+        ID of the todo row the value belongs to
+    """
+    return original_todo_id(int(value))
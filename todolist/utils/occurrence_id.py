@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+from .datetimes import format_datetime, parse_datetime
+
+# Generated occurrence IDs are todo_id * OCCURRENCE_ID_BASE + seconds since the
+# naive epoch of the occurrence. Plain todo IDs are always below the base, and
+# naive seconds never repeat or skip across DST changes, so the encoding is
+# reversible. The base keeps IDs below 2**53 (safe in JavaScript) for todo IDs
+# up to ~900000.
+OCCURRENCE_ID_BASE = 10 ** 10
+
+# Occurrences from the epoch (1970-01-01 00:00:00) to 2286-11-20 17:46:39 have an ID
+OCCURRENCE_ID_EPOCH = datetime(1970, 1, 1)
+_LATEST = OCCURRENCE_ID_EPOCH + timedelta(seconds=OCCURRENCE_ID_BASE - 1)
+
+
+def encode_occurrence_id(todo_id, occurrence):
+    """Build the ID of one occurrence of a recurring todo
+
+    Args:
+        todo_id: ID of the recurring todo
+        occurrence: Occurrence time as datetime or 'YYYY-MM-DD HH:MM:SS' string
+
+    Returns:
+        Integer occurrence ID
+
+    Raises:
+        ValueError: If the occurrence is outside the range that IDs can encode
+    """
+    if isinstance(occurrence, str):
+        occurrence = parse_datetime(occurrence)
+    seconds = (occurrence - OCCURRENCE_ID_EPOCH) // timedelta(seconds=1)
+    # 超出范围的秒数会进位到todo_id或被当作普通ID，无法解码
+    if not 0 <= seconds < OCCURRENCE_ID_BASE:
+        raise ValueError(f"Occurrence {occurrence} is outside the range of occurrence IDs")
+    return todo_id * OCCURRENCE_ID_BASE + seconds
+
+
+def has_occurrence_id(occurrence):
+    """Check whether an occurrence (datetime or string) can be encoded as an ID"""
+    if isinstance(occurrence, str):
+        occurrence = parse_datetime(occurrence)
+    return OCCURRENCE_ID_EPOCH <= occurrence <= _LATEST
+
+
+def is_occurrence_id(todo_id):
+    """Check whether an ID refers to a generated occurrence rather than a todo row"""
+    return todo_id >= OCCURRENCE_ID_BASE
+
+
+def decode_occurrence_id(occurrence_id):
+    """Split an occurrence ID back into its todo ID and occurrence time
+
+    Args:
+        occurrence_id: ID produced by encode_occurrence_id
+
+    Returns:
+        tuple: (todo_id, occurrence string) or None if the ID is a plain todo ID
+    """
+    if not is_occurrence_id(occurrence_id):
+        return None
+    todo_id, seconds = divmod(occurrence_id, OCCURRENCE_ID_BASE)
+    occurrence = OCCURRENCE_ID_EPOCH + timedelta(seconds=seconds)
+    return todo_id, format_datetime(occurrence)
+
+
+def original_todo_id(todo_id):
+    """Get the todo row ID for a todo or occurrence ID"""
+    return todo_id // OCCURRENCE_ID_BASE if is_occurrence_id(todo_id) else todo_id
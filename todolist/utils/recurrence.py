@@ -1,5 +1,395 @@
+import calendar
 import json
 from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import islice
+from math import lcm
+
+try:
+    import numpy as np
+except ImportError:
+    # NumPy是可选依赖，未安装时批量展开退回逐条计算
+    np = None
+
+from .datetimes import format_datetime, parse_datetime
+
+# Maximum number of compiled recurrence rules kept in memory
+RULE_CACHE_SIZE = 1024
+
+# Recurrence types that advance by a fixed timedelta
+_FIXED_STEP_UNITS = {'daily': 'days', 'hourly': 'hours', 'minutely': 'minutes'}
+
+
+def _parse_weekdays(recurrence_days, anchor):
+    """Parse weekly specific days
+
+    Args:
+        recurrence_days: Weekly specific days in JSON format, an int or a list
+        anchor: Datetime whose weekday is used when no days are set
+
+    Returns:
+        Sorted list of weekdays (0-6, Monday is 0), or None if the value is
+        unusable and the rule should fall back to stepping whole weeks
+    """
+    days_of_week = []
+    if recurrence_days is not None:
+        try:
+            if isinstance(recurrence_days, str):
+                # If it's a string, try to parse as JSON
+                days_of_week = json.loads(recurrence_days)
+            elif isinstance(recurrence_days, int):
+                # If it's an integer, treat it as a single day
+                days_of_week = [recurrence_days]
+            else:
+                # Otherwise, try to convert to a list
+                days_of_week = list(recurrence_days)
+        except (TypeError, json.JSONDecodeError):
+            # If any error occurs, use default value
+            days_of_week = []
+
+    # 如果没有设置特定日期，使用原始截止日期的星期几作为默认值
+    if not days_of_week:
+        return [anchor.weekday()]
+
+    try:
+        days_of_week = [int(day) for day in days_of_week if isinstance(day, (int, float, str))]
+    except (ValueError, TypeError):
+        return None
+    days_of_week = sorted({day for day in days_of_week if 0 <= day <= 6})
+    return days_of_week or [anchor.weekday()]
+
+
+def _add_months(current, months):
+    """Add months to a datetime, clamping the day to the end of the target month"""
+    total = current.month - 1 + months
+    year = current.year + total // 12
+    month = total % 12 + 1
+    try:
+        return current.replace(year=year, month=month)
+    except ValueError:
+        # 处理月末日期的情况（包括2月29日）
+        next_month_start = datetime(year + month // 12, month % 12 + 1, 1)
+        return current.replace(year=year, month=month, day=(next_month_start - timedelta(days=1)).day)
+
+
+def _steps_until_clamped(current, months):
+    """Count steps of months until _add_months first clamps the day of current
+
+    The months visited repeat their month of year every lcm(months, 12)
+    months, and the Gregorian calendar repeats every 400 years, so the search
+    is bounded by one month-of-year cycle plus at most 400 years of Februaries.
+
+    Returns:
+        Number of steps, or None if the day is never clamped
+    """
+    day = current.day
+    cycle = lcm(months, 12) // months
+    february = None
+    for steps in range(1, cycle + 1):
+        total = current.month - 1 + steps * months
+        year, month = current.year + total // 12, total % 12 + 1
+        if calendar.monthrange(year, month)[1] < day:
+            return steps
+        if month == 2:
+            february = (steps, year)
+    if february is None:
+        return None
+
+    # 第29天只会在非闰年的2月被截断，之后每个周期访问一次2月
+    steps, year = february
+    years_per_cycle = cycle * months // 12
+    for cycles in range(1, 400 // years_per_cycle + 1):
+        if not calendar.isleap(year + cycles * years_per_cycle):
+            return steps + cycles * cycle
+    return None
+
+
+class RecurrenceRule:
+    """Parsed recurrence settings of a todo
+
+    Holds everything needed to expand occurrences (type, interval, sorted
+    weekday tuple, anchor datetime), so deadline strings and recurrence_days
+    JSON are parsed once per rule instead of once per step. Instances are
+    immutable and shared through compile_rule's LRU cache.
+    """
+
+    __slots__ = ('recurrence_type', 'interval', 'weekdays', 'anchor', '_months', '_fixed_step')
+
+    def __init__(self, recurrence_type, interval, weekdays, anchor):
+        """Initialize recurrence rule
+
+        Args:
+            recurrence_type: Recurrence type (yearly, monthly, weekly, daily, hourly, minutely)
+            interval: Recurrence interval
+            weekdays: Sorted tuple of weekdays (0-6, Monday is 0) for weekly rules,
+                or None to step whole weeks
+            anchor: Datetime of the first occurrence
+        """
+        self.recurrence_type = recurrence_type
+        self.interval = interval
+        self.weekdays = weekdays
+        self.anchor = anchor
+
+        # Months per step for monthly/yearly rules
+        if recurrence_type == 'yearly':
+            self._months = 12 * interval
+        elif recurrence_type == 'monthly':
+            self._months = interval
+        else:
+            self._months = None
+
+        # Timedelta per step for fixed-interval rules
+        if recurrence_type in _FIXED_STEP_UNITS:
+            self._fixed_step = timedelta(**{_FIXED_STEP_UNITS[recurrence_type]: interval})
+        elif self._months is not None or (recurrence_type == 'weekly' and weekdays is not None):
+            self._fixed_step = None
+        else:
+            # Default weekly recurrence
+            self._fixed_step = timedelta(weeks=interval)
+
+    @classmethod
+    def from_todo(cls, todo):
+        """Compile the rule of a todo row (sqlite3.Row or mapping)"""
+        return compile_rule(todo['deadline'], todo['recurrence_type'],
+                            todo['recurrence_interval'], todo['recurrence_days'])
+
+    def __repr__(self):
+        return (f"RecurrenceRule({self.recurrence_type!r}, {self.interval!r}, "
+                f"{self.weekdays!r}, {self.anchor!r})")
+
+    def step(self, current):
+        """Get the occurrence following current"""
+        if self._months is not None:
+            return _add_months(current, self._months)
+
+        if self._fixed_step is not None:
+            return current + self._fixed_step
+
+        # 找到下一个匹配的星期几，本周没有则取下周第一个
+        current_weekday = current.weekday()
+        for day in self.weekdays:
+            if day > current_weekday:
+                return current + timedelta(days=day - current_weekday)
+        return current + timedelta(days=7 - current_weekday + self.weekdays[0])
+
+    def seek(self, start):
+        """Find the first occurrence at or after start without stepping from the anchor
+
+        Fixed-interval rules jump arithmetically. Weekly rules search at most
+        one week of candidate days. Monthly and yearly rules jump to each point
+        where the day of month gets clamped to a shorter month (at most three),
+        then by whole months.
+        """
+        anchor = self.anchor
+        if start <= anchor:
+            return anchor
+
+        if self._fixed_step is not None:
+            steps = -((anchor - start) // self._fixed_step)
+            return anchor + steps * self._fixed_step
+
+        months = self._months
+        if months is not None:
+            current = anchor
+            # 月末日期被截断后路径相关：直接跳到每次截断处（最多3次），之后按整月跳转
+            while current.day > 28 and current < start:
+                months_between = (start.year - current.year) * 12 + start.month - current.month
+                steps = _steps_until_clamped(current, months)
+                if steps is None or steps > months_between // months:
+                    break
+                current = _add_months(current, steps * months)
+            if current >= start:
+                return current
+            months_between = (start.year - current.year) * 12 + start.month - current.month
+            candidate = _add_months(current, max(0, months_between // months) * months)
+            while candidate < start:
+                candidate = _add_months(candidate, months)
+            return candidate
+
+        # 每周特定日：从start当天（按截止时间的时刻）开始最多检查7天
+        candidate = datetime.combine(start.date(), anchor.time())
+        if candidate < start:
+            candidate += timedelta(days=1)
+        while candidate.weekday() not in self.weekdays:
+            candidate += timedelta(days=1)
+        return candidate
+
+    def occurrences(self, start=None):
+        """Yield occurrence datetimes from the first one at or after start"""
+        current = self.anchor if start is None else self.seek(start)
+        while True:
+            yield current
+            try:
+                current = self.step(current)
+            except (ValueError, OverflowError):
+                return
+
+    def iter_formatted(self, start=None, exclude=None):
+        """Yield occurrence strings from the first one at or after start
+
+        Args:
+            start: Optional datetime to seek to first
+            exclude: Optional container of occurrence strings to skip
+        """
+        for occurrence in self.occurrences(start):
+            occurrence_str = format_datetime(occurrence)
+            if exclude and occurrence_str in exclude:
+                continue
+            yield occurrence_str
+
+    def next_after(self, occurrence):
+        """Get the occurrence string following an occurrence (string or datetime)
+
+        Returns:
+            Occurrence string, or None if it cannot be computed
+        """
+        try:
+            if isinstance(occurrence, str):
+                occurrence = parse_datetime(occurrence)
+            return format_datetime(self.step(occurrence))
+        except (ValueError, OverflowError):
+            return None
+
+    def contains(self, occurrence):
+        """Check whether a datetime or occurrence string is exactly one of the occurrences"""
+        if isinstance(occurrence, str):
+            try:
+                occurrence = parse_datetime(occurrence)
+            except ValueError:
+                return False
+        if occurrence < self.anchor:
+            return False
+        try:
+            return self.seek(occurrence) == occurrence
+        except (ValueError, OverflowError):
+            return False
+
+
+@lru_cache(maxsize=RULE_CACHE_SIZE)
+def _compile_rule(deadline, recurrence_type, recurrence_interval, recurrence_days):
+    anchor = parse_datetime(deadline)
+    weekdays = _parse_weekdays(recurrence_days, anchor)
+    return RecurrenceRule(
+        recurrence_type,
+        recurrence_interval,
+        tuple(weekdays) if weekdays is not None else None,
+        anchor
+    )
+
+
+def compile_rule(deadline, recurrence_type, recurrence_interval, recurrence_days):
+    """Get the RecurrenceRule for a set of recurrence settings
+
+    Rules are memoized by their signature in a bounded LRU cache.
+
+    Args:
+        deadline: Creation deadline
+        recurrence_type: Recurrence type (yearly, monthly, weekly, daily, hourly, minutely)
+        recurrence_interval: Recurrence interval
+        recurrence_days: Weekly specific days in JSON format
+
+    Returns:
+        RecurrenceRule
+
+    Raises:
+        ValueError, TypeError: If the deadline cannot be parsed
+    """
+    if isinstance(recurrence_days, (list, set)):
+        recurrence_days = tuple(recurrence_days)
+    return _compile_rule(deadline, recurrence_type, recurrence_interval, recurrence_days)
+
+
+def expand_occurrences_batch(rules, count, use_numpy=None):
+    """Expand the first occurrences of many recurrence rules together
+
+    With NumPy installed, rules are grouped by kind and expanded as
+    datetime64/timedelta64 arrays: fixed-interval rules as anchor + k * step,
+    weekly rules through a weekday offset table, and monthly/yearly rules as
+    month arithmetic with a running day clamp. Without NumPy every rule is
+    expanded with RecurrenceRule.occurrences(); both give the same result.
+
+    Args:
+        rules: Sequence of RecurrenceRule
+        count: Number of occurrences per rule, an int or a sequence matching rules
+        use_numpy: True or False to force or disable the NumPy path; by default
+            it is used when NumPy is installed
+
+    Returns:
+        List with one list of occurrence datetimes per rule
+    """
+    counts = [count] * len(rules) if isinstance(count, int) else list(count)
+    if use_numpy is None:
+        use_numpy = np is not None
+    if not use_numpy:
+        return [list(islice(rule.occurrences(), n)) for rule, n in zip(rules, counts)]
+    if np is None:
+        raise RuntimeError("NumPy is required for vectorized occurrence expansion")
+
+    results = [[] for _ in rules]
+    groups = {_expand_fixed: [], _expand_weekdays: [], _expand_months: []}
+    for index, (rule, n) in enumerate(zip(rules, counts)):
+        if n <= 0:
+            continue
+        if rule._fixed_step is not None:  # pylint: disable=protected-access
+            groups[_expand_fixed].append(index)
+        elif rule._months is not None:  # pylint: disable=protected-access
+            groups[_expand_months].append(index)
+        else:
+            groups[_expand_weekdays].append(index)
+
+    for expander, indices in groups.items():
+        if not indices:
+            continue
+        group = [rules[index] for index in indices]
+        matrix = expander(group, max(counts[index] for index in indices))
+        # 超出datetime可表示范围的实例视为迭代结束，与逐条计算时的OverflowError一致
+        valid = (matrix >= np.datetime64(datetime.min, 's')) & (matrix <= np.datetime64(datetime.max, 's'))
+        lengths = np.where(valid.all(axis=1), matrix.shape[1], valid.argmin(axis=1)).tolist()
+        for row, index, length in zip(np.where(valid, matrix, np.datetime64(datetime.min, 's')).tolist(),
+                                      indices, lengths):
+            results[index] = row[:min(length, counts[index])]
+    return results
+
+
+def _expand_fixed(rules, width):
+    """Expand daily/hourly/minutely and whole-week rules: anchor + k * step"""
+    anchors = np.array([rule.anchor for rule in rules], dtype='datetime64[s]')
+    steps = np.array([rule._fixed_step // timedelta(seconds=1) for rule in rules],  # pylint: disable=protected-access
+                     dtype='int64').astype('timedelta64[s]')
+    return anchors[:, None] + steps[:, None] * np.arange(width)
+
+
+def _expand_weekdays(rules, width):
+    """Expand weekly rules with specific days through a weekday offset table"""
+    anchors = np.array([rule.anchor for rule in rules], dtype='datetime64[s]')
+    anchor_weekdays = np.array([rule.anchor.weekday() for rule in rules])
+    sizes = np.array([len(rule.weekdays) for rule in rules])
+    table = np.zeros((len(rules), 7), dtype='int64')
+    for row, rule in enumerate(rules):
+        table[row, :len(rule.weekdays)] = rule.weekdays
+
+    # 锚点之后的第k个实例在星期表中的位置：先跳过不晚于锚点星期几的日期
+    used = np.arange(7) < sizes[:, None]
+    positions = ((table <= anchor_weekdays[:, None]) & used).sum(axis=1)[:, None] + np.arange(width - 1)
+    weeks, slots = np.divmod(positions, sizes[:, None])
+    days = 7 * weeks + np.take_along_axis(table, slots, axis=1) - anchor_weekdays[:, None]
+    following = anchors[:, None] + (days * 86400).astype('timedelta64[s]')
+    return np.concatenate([anchors[:, None], following], axis=1)
+
+
+def _expand_months(rules, width):
+    """Expand monthly/yearly rules, clamping the day to each month's length"""
+    anchor_months = np.array([rule.anchor for rule in rules], dtype='datetime64[M]')
+    months = np.array([rule._months for rule in rules], dtype='int64')  # pylint: disable=protected-access
+    month_starts = anchor_months[:, None] + (months[:, None] * np.arange(width)).astype('timedelta64[M]')
+    month_days = ((month_starts + 1).astype('datetime64[D]') - month_starts.astype('datetime64[D]')).astype('int64')
+
+    # 月末被截断后日期不再恢复，所以取锚点日期与此前各月天数的最小值
+    anchor_days = np.array([rule.anchor.day for rule in rules])
+    days = np.minimum(anchor_days[:, None], np.minimum.accumulate(month_days, axis=1))
+    seconds = np.array([rule.anchor.hour * 3600 + rule.anchor.minute * 60 + rule.anchor.second for rule in rules])
+    offsets = ((days - 1) * 86400 + seconds[:, None]).astype('timedelta64[s]')
+    return month_starts.astype('datetime64[D]').astype('datetime64[s]') + offsets
 
 
 def calculate_next_occurrence(deadline, recurrence_type, recurrence_interval, recurrence_days, logger=None):
@@ -16,128 +406,14 @@ def calculate_next_occurrence(deadline, recurrence_type, recurrence_interval, re
         Next occurrence time in ISO format string or None if calculation fails
     """
     try:
-        # Parse deadline with multiple format support
-        try:
-            # Try parsing YYYY-MM-DD HH:MM:SS format
-            current_deadline = datetime.strptime(deadline, "%Y-%m-%d %H:%M:%S")
-        except ValueError:
-            try:
-                # Try parsing YYYY-MM-DDTHH:MM format (datetime-local input format)
-                current_deadline = datetime.strptime(deadline, "%Y-%m-%dT%H:%M")
-            except ValueError:
-                # Try parsing YYYY-MM-DDTHH:MM:SS format
-                current_deadline = datetime.strptime(deadline, "%Y-%m-%dT%H:%M:%S")
+        rule = compile_rule(deadline, recurrence_type, recurrence_interval, recurrence_days)
+        if recurrence_type == 'weekly' and rule.weekdays is None and logger:
+            logger.error(f"Error calculating next occurrence: invalid recurrence_days {recurrence_days!r}")
 
-        next_time = current_deadline
-
-        # Calculate next occurrence based on recurrence type
-        if recurrence_type == 'yearly':
-            # 计算下一次出现时间，确保大于当前截止时间
-            next_year = current_deadline.year
-            while next_time <= current_deadline:
-                next_year += recurrence_interval
-                try:
-                    next_time = current_deadline.replace(year=next_year)
-                except ValueError:
-                    # 处理2月29日的情况
-                    next_time = current_deadline.replace(year=next_year, day=28)
-        elif recurrence_type == 'monthly':
-            # 计算下一次出现时间，确保大于当前截止时间
-            next_month = current_deadline.month
-            next_year = current_deadline.year
-            while next_time <= current_deadline:
-                next_month += recurrence_interval
-                year_increment = next_month // 12
-                if year_increment > 0:
-                    next_month = next_month % 12
-                    next_year += year_increment
-                if next_month == 0:
-                    next_month = 12
-                    next_year -= 1
-                try:
-                    next_time = current_deadline.replace(year=next_year, month=next_month)
-                except ValueError:
-                    # 处理月末日期的情况
-                    if next_month == 2:
-                        # 处理2月29日的情况
-                        is_leap = (next_year % 4 == 0 and next_year % 100 != 0) or (next_year % 400 == 0)
-                        next_time = current_deadline.replace(year=next_year, month=next_month, day=29 if is_leap else 28)
-                    else:
-                        # 处理其他月份的情况
-                        days_in_month = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
-                        day = days_in_month[next_month - 1]
-                        next_time = current_deadline.replace(year=next_year, month=next_month, day=day)
-        elif recurrence_type == 'daily':
-            # 计算下一次出现时间，确保大于当前截止时间
-            while next_time <= current_deadline:
-                next_time += timedelta(days=recurrence_interval)
-        elif recurrence_type == 'hourly':
-            # 计算下一次出现时间，确保大于当前截止时间
-            while next_time <= current_deadline:
-                next_time += timedelta(hours=recurrence_interval)
-        elif recurrence_type == 'minutely':
-            # 计算下一次出现时间，确保大于当前截止时间
-            while next_time <= current_deadline:
-                next_time += timedelta(minutes=recurrence_interval)
-        elif recurrence_type == 'weekly':
-            try:
-                # Parse weekly specific days
-                days_of_week = []
-
-                # Handle different types of recurrence_days values
-                if recurrence_days is not None:
-                    try:
-                        if isinstance(recurrence_days, str):
-                            # If it's a string, try to parse as JSON
-                            days_of_week = json.loads(recurrence_days)
-                        elif isinstance(recurrence_days, int):
-                            # If it's an integer, treat it as a single day
-                            days_of_week = [recurrence_days]
-                        else:
-                            # Otherwise, try to convert to a list
-                            days_of_week = list(recurrence_days)
-                    except (TypeError, json.JSONDecodeError):
-                        # If any error occurs, use default value
-                        days_of_week = []
-
-                # 如果没有设置特定日期，使用原始截止日期的星期几作为默认值
-                if not days_of_week:
-                    days_of_week = [current_deadline.weekday()]
-
-                # Make sure days_of_week is a list of integers
-                days_of_week = [int(day) for day in days_of_week if isinstance(day, (int, float, str))]
-                days_of_week = sorted(days_of_week)
-
-                # Get current deadline weekday (0-6, Monday is 0, Sunday is 6)
-                current_weekday = current_deadline.weekday()
-
-                # 找到下一个匹配的星期几，确保下一次出现时间大于当前截止时间
-                found = False
-                # 首先检查本周剩余的星期几
-                for day in days_of_week:
-                    if day > current_weekday:
-                        # 计算距离下一个匹配日的天数
-                        days_diff = day - current_weekday
-                        # 设置下一个出现时间为当前截止时间 + 天数差
-                        next_time = current_deadline + timedelta(days=days_diff)
-                        found = True
-                        break
-
-                if not found:
-                    # 本周没有匹配的星期几，找到下周第一个匹配的星期几
-                    days_diff = 7 - current_weekday + days_of_week[0]
-                    next_time = current_deadline + timedelta(days=days_diff)
-            except (ValueError, TypeError) as e:
-                if logger:
-                    logger.error(f"Error calculating next occurrence: {e}")
-                # 出错时，默认递增一周
-                next_time = current_deadline + timedelta(weeks=recurrence_interval)
-        else:
-            # Default weekly recurrence
-            next_time = current_deadline + timedelta(weeks=recurrence_interval)
+        next_time = rule.step(rule.anchor)
 
         # Format and return
-        return next_time.strftime("%Y-%m-%d %H:%M:%S")
+        return format_datetime(next_time)
     except (ValueError, TypeError, OverflowError) as e:
         if logger:
             logger.error(f"Error calculating next occurrence: {e}")
@@ -159,120 +435,19 @@ def generate_all_occurrences(deadline, recurrence_type, recurrence_interval, rec
         List of occurrence times in ISO format string or empty list if calculation fails
     """
     try:
-        # Parse deadline with multiple format support
-        try:
-            # Try parsing YYYY-MM-DD HH:MM:SS format
-            creation_deadline = datetime.strptime(deadline, "%Y-%m-%d %H:%M:%S")
-        except ValueError:
-            try:
-                # Try parsing YYYY-MM-DDTHH:MM format (datetime-local input format)
-                creation_deadline = datetime.strptime(deadline, "%Y-%m-%dT%H:%M")
-            except ValueError:
-                # Try parsing YYYY-MM-DDTHH:MM:SS format
-                creation_deadline = datetime.strptime(deadline, "%Y-%m-%dT%H:%M:%S")
+        rule = compile_rule(deadline, recurrence_type, recurrence_interval, recurrence_days)
         occurrences = []
-        current_occurrence = creation_deadline
+        current_occurrence = rule.anchor
 
         # 生成指定数量的实例
         for _ in range(limit):
             # 确保当前实例是有效的日期时间
             try:
                 # Add to occurrences list
-                occurrences.append(current_occurrence.strftime("%Y-%m-%d %H:%M:%S"))
+                occurrences.append(format_datetime(current_occurrence))
 
                 # Calculate next occurrence
-                if recurrence_type == 'yearly':
-                    next_year = current_occurrence.year + recurrence_interval
-                    try:
-                        current_occurrence = current_occurrence.replace(year=next_year)
-                    except ValueError:
-                        # 处理2月29日的情况
-                        current_occurrence = current_occurrence.replace(year=next_year, day=28)
-                elif recurrence_type == 'monthly':
-                    next_month = current_occurrence.month + recurrence_interval
-                    next_year = current_occurrence.year
-                    year_increment = next_month // 12
-                    if year_increment > 0:
-                        next_month = next_month % 12
-                        next_year += year_increment
-                    if next_month == 0:
-                        next_month = 12
-                        next_year -= 1
-                    try:
-                        current_occurrence = current_occurrence.replace(year=next_year, month=next_month)
-                    except ValueError:
-                        # 处理月末日期的情况
-                        if next_month == 2:
-                            # 处理2月29日的情况
-                            is_leap = (next_year % 4 == 0 and next_year % 100 != 0) or (next_year % 400 == 0)
-                            current_occurrence = current_occurrence.replace(year=next_year, month=next_month, day=29 if is_leap else 28)
-                        else:
-                            # 处理其他月份的情况
-                            days_in_month = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
-                            day = days_in_month[next_month - 1]
-                            current_occurrence = current_occurrence.replace(year=next_year, month=next_month, day=day)
-                elif recurrence_type == 'daily':
-                    current_occurrence += timedelta(days=recurrence_interval)
-                elif recurrence_type == 'hourly':
-                    current_occurrence += timedelta(hours=recurrence_interval)
-                elif recurrence_type == 'minutely':
-                    current_occurrence += timedelta(minutes=recurrence_interval)
-                elif recurrence_type == 'weekly':
-                    try:
-                        # Parse weekly specific days
-                        days_of_week = []
-
-                        # Handle different types of recurrence_days values
-                        if recurrence_days is not None:
-                            try:
-                                if isinstance(recurrence_days, str):
-                                    # If it's a string, try to parse as JSON
-                                    days_of_week = json.loads(recurrence_days)
-                                elif isinstance(recurrence_days, int):
-                                    # If it's an integer, treat it as a single day
-                                    days_of_week = [recurrence_days]
-                                else:
-                                    # Otherwise, try to convert to a list
-                                    days_of_week = list(recurrence_days)
-                            except (TypeError, json.JSONDecodeError):
-                                # If any error occurs, use default value
-                                days_of_week = []
-
-                        # 如果没有设置特定日期，使用原始截止日期的星期几作为默认值
-                        if not days_of_week:
-                            days_of_week = [creation_deadline.weekday()]
-
-                        # Make sure days_of_week is a list of integers
-                        days_of_week = [int(day) for day in days_of_week if isinstance(day, (int, float, str))]
-                        days_of_week = sorted(days_of_week)
-
-                        # Get current weekday (0-6, Monday is 0, Sunday is 6)
-                        current_weekday = current_occurrence.weekday()
-
-                        # 找到下一个匹配的星期几
-                        found = False
-                        # 首先检查本周剩余的星期几
-                        for day in days_of_week:
-                            if day > current_weekday:
-                                # 计算距离下一个匹配日的天数
-                                days_diff = day - current_weekday
-                                # 设置下一个出现时间为当前时间 + 天数差
-                                current_occurrence = current_occurrence + timedelta(days=days_diff)
-                                found = True
-                                break
-
-                        if not found:
-                            # 本周没有匹配的星期几，找到下周第一个匹配的星期几
-                            days_diff = 7 - current_weekday + days_of_week[0]
-                            current_occurrence = current_occurrence + timedelta(days=days_diff)
-                    except (ValueError, TypeError) as e:
-                        if logger:
-                            logger.error(f"Error parsing recurrence_days: {e}")
-                        # 出错时，默认递增一周
-                        current_occurrence += timedelta(weeks=recurrence_interval)
-                else:
-                    # Default weekly recurrence
-                    current_occurrence += timedelta(weeks=recurrence_interval)
+                current_occurrence = rule.step(current_occurrence)
             except (ValueError, TypeError, OverflowError) as e:
                 if logger:
                     logger.error(f"Error generating next occurrence: {e}")
@@ -282,4 +457,107 @@ def generate_all_occurrences(deadline, recurrence_type, recurrence_interval, rec
     except (ValueError, TypeError, OverflowError) as e:
         if logger:
             logger.error(f"Error generating all occurrences: {e}")
-        return []
\ No newline at end of file
+        return []
+
+
+def generate_occurrences_between(deadline, recurrence_type, recurrence_interval, recurrence_days,
+                                 start, end, logger=None):
+    """Generate the occurrences of a recurring todo inside the window [start, end)
+
+    Unlike generate_all_occurrences, this seeks directly to the first
+    occurrence at or after start, so the cost depends on the size of the
+    window and not on how long ago the todo was created.
+
+    Args:
+        deadline: Creation deadline
+        recurrence_type: Recurrence type (yearly, monthly, weekly, daily, hourly, minutely)
+        recurrence_interval: Recurrence interval
+        recurrence_days: Weekly specific days in JSON format
+        start: Window start (datetime or occurrence format string), inclusive
+        end: Window end (datetime or occurrence format string), exclusive
+        logger: Optional logger for error logging
+
+    Returns:
+        List of occurrence times in ISO format string or empty list if calculation fails
+    """
+    try:
+        rule = compile_rule(deadline, recurrence_type, recurrence_interval, recurrence_days)
+        if isinstance(start, str):
+            start = parse_datetime(start)
+        if isinstance(end, str):
+            end = parse_datetime(end)
+
+        occurrences = []
+        for occurrence in rule.occurrences(start):
+            if occurrence >= end:
+                break
+            occurrences.append(format_datetime(occurrence))
+        return occurrences
+    except (ValueError, TypeError, OverflowError) as e:
+        if logger:
+            logger.error(f"Error generating occurrences between {start} and {end}: {e}")
+        return []
+
+
+def iter_occurrences(deadline, recurrence_type, recurrence_interval, recurrence_days,
+                     start=None, exclude=None, logger=None):
+    """Lazily yield the occurrences of a recurring todo
+
+    Occurrences are produced one at a time, so callers that only need the
+    first few (e.g. with itertools.islice) never compute the rest.
+
+    Args:
+        deadline: Creation deadline
+        recurrence_type: Recurrence type (yearly, monthly, weekly, daily, hourly, minutely)
+        recurrence_interval: Recurrence interval
+        recurrence_days: Weekly specific days in JSON format
+        start: Optional datetime or occurrence format string to seek to first
+        exclude: Optional container of occurrence strings to skip (e.g. deleted ones)
+        logger: Optional logger for error logging
+
+    Yields:
+        Occurrence times in ISO format string
+    """
+    try:
+        rule = compile_rule(deadline, recurrence_type, recurrence_interval, recurrence_days)
+        if isinstance(start, str):
+            start = parse_datetime(start)
+        yield from rule.iter_formatted(start, exclude)
+    except (ValueError, TypeError, OverflowError) as e:
+        if logger:
+            logger.error(f"Error iterating occurrences: {e}")
+
+
+def is_occurrence(deadline, recurrence_type, recurrence_interval, recurrence_days, occurrence):
+    """Check whether a time is one of the occurrences of a recurring todo
+
+    Args:
+        deadline: Creation deadline
+        recurrence_type: Recurrence type
+        recurrence_interval: Recurrence interval
+        recurrence_days: Weekly specific days in JSON format
+        occurrence: Occurrence time in occurrence format
+
+    Returns:
+        bool: True if the todo recurs exactly at that time
+    """
+    try:
+        rule = compile_rule(deadline, recurrence_type, recurrence_interval, recurrence_days)
+    except (ValueError, TypeError):
+        return False
+    return rule.contains(occurrence)
+
+
+def normalize_deadline(deadline):
+    """Normalize a deadline string to the 'YYYY-MM-DD HH:MM:SS' occurrence format
+
+    Args:
+        deadline: Deadline in any of the supported input formats
+
+    Returns:
+        Deadline string in occurrence format
+    """
+    try:
+        return format_datetime(parse_datetime(deadline))
+    except ValueError as e:
+        raise ValueError(f"Unsupported deadline format: {deadline}") from e